@@ -0,0 +1,58 @@
+from fastapi import APIRouter, Response
+
+from app.core.bounded_executor import BoundedExecutor
+from app.core.jwt_helper import password_executor
+from app.core.metrics import CONTENT_TYPE, Counter, Gauge, HistogramMetric, Metric, registry
+from app.db.pg_engine import sessionmanager
+
+router = APIRouter()
+
+
+def executor_metrics(*executors: BoundedExecutor) -> list[Metric]:
+    """Occupancy and counters of bounded executors, labelled by name."""
+    gauges = {
+        stat: Gauge(f"executor_{stat}", f"Executor {stat} (see BoundedExecutor.stats).", ("executor",))
+        for stat in ("workers", "running", "queued")
+    }
+    counters = {
+        stat: Counter(f"executor_{stat}_total", f"Executor calls {stat}.", ("executor",))
+        for stat in ("completed", "failed", "cancelled", "rejected")
+    }
+    for executor in executors:
+        stats = executor.stats()
+        for stat, gauge in gauges.items():
+            gauge.set(stats[stat], executor=executor.name)
+        for stat, counter in counters.items():
+            counter.inc(stats[stat], executor=executor.name)
+    return [*gauges.values(), *counters.values()]
+
+
+def pool_metrics() -> list[Metric]:
+    """Occupancy, timeouts and checkout waits of the database pools."""
+    gauges = {
+        "size": Gauge("db_pool_size", "Connections the pool keeps open.", ("pool",)),
+        "checked_out": Gauge("db_pool_checked_out", "Connections in use.", ("pool",)),
+        "overflow": Gauge("db_pool_overflow", "Connections open beyond the pool size.", ("pool",)),
+    }
+    timeouts = Counter(
+        "db_pool_timeouts_total", "Checkouts that gave up after the pool timeout.", ("pool",)
+    )
+    waits = HistogramMetric(
+        "db_pool_checkout_wait_seconds", "Time to check a connection out of the pool.", ("pool",)
+    )
+    for name, pool in sessionmanager.pools().items():
+        gauges["size"].set(pool.size(), pool=name)
+        gauges["checked_out"].set(pool.checkedout(), pool=name)
+        gauges["overflow"].set(max(pool.overflow(), 0), pool=name)
+        timeouts.inc(pool.timeouts, pool=name)
+        waits.attach(pool.wait_histogram, pool=name)
+    return [*gauges.values(), timeouts, waits]
+
+
+registry.add_collector(lambda: executor_metrics(password_executor))
+registry.add_collector(pool_metrics)
+
+
+@router.get("/metrics", include_in_schema=False)
+async def metrics() -> Response:
+    return Response(registry.render(), media_type=CONTENT_TYPE)
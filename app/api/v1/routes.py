@@ -1,19 +1,36 @@
 from datetime import datetime
+from typing import Annotated
 
-from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Query, Depends, Request
+from fastapi import APIRouter, File, UploadFile, Form, HTTPException, Header, Query, Depends, Request, Response
+from fastapi.responses import RedirectResponse, StreamingResponse
+from app.core.http_metrics import TimedRoute
 from app.core.logger import logger
 
-from app.db.pg_engine import get_db_session
-from app.services.auth.auth_dependency import auth_dependency
+from app.db.pg_engine import get_db_session, get_read_db_session, sessionmanager
+from app.services.auth.auth_dependency import (
+    auth_dependency,
+    get_user_db_session,
+    get_user_read_db_session,
+    read_auth_dependency,
+)
 from app.services.image_uploads.schemas import (
+    BatchUploadMetadata,
+    BatchUploadResponse,
+    ImageUploadDeleteResponse,
     ImageUploadResponse,
     ImageUploadInputRequest,
     ImageUploadRecord,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    CompleteUploadRequest,
+    UploadListQuery,
 )
+from app.services.image_uploads.status_events import upload_status_hub
 from app.services.image_uploads.uploads import upload_service
 from app.services.auth.email_password.email_registration import email_registration
 from app.services.auth.email_password.login_user_pass import LoginUserPass
 from app.services.auth.email_password.logout import Logout
+from app.services.auth.email_password.refresh import RefreshSession
 from app.services.auth.email_password.schemas import (
     EmailRegistrationInput,
     EmailRegistrationResponse,
@@ -21,9 +38,11 @@ from app.services.auth.email_password.schemas import (
     LoginEmailResponse,
     LogoutInput,
     LogoutResponse,
+    RefreshInput,
+    RefreshResponse,
 )
 
-router = APIRouter()
+router = APIRouter(route_class=TimedRoute)
 
 
 # The upload endpoint previously omitted a trailing slash.  FastAPI interprets
@@ -34,7 +53,7 @@ router = APIRouter()
 async def upload_image(
         file: UploadFile = File(...),
         metadata: str = Form(...),
-        db=Depends(get_db_session),
+        db=Depends(get_user_db_session),
         auth=Depends(auth_dependency),
 ):
     try:
@@ -54,12 +73,92 @@ async def upload_image(
     return upload_resp
 
 
+@router.post("/image/upload/batch", response_model=BatchUploadResponse)
+async def upload_images(
+        files: list[UploadFile] = File(...),
+        metadata: str = Form(...),
+        db=Depends(get_user_db_session),
+        auth=Depends(auth_dependency),
+):
+    try:
+        meta_list = BatchUploadMetadata.model_validate_json(metadata).root
+    except Exception:
+        logger.exception("Invalid batch upload metadata")
+        raise HTTPException(status_code=400, detail="Invalid upload metadata")
+    return await upload_service.upload_images(db, files, meta_list, user_id=auth["user_id"])
+
+
+@router.post("/image/upload/presign", response_model=PresignedUploadResponse)
+async def presign_upload(
+        body: PresignedUploadRequest,
+        auth=Depends(auth_dependency),
+):
+    return await upload_service.create_presigned_upload(auth["user_id"], body)
+
+
+@router.post("/image/upload/complete", response_model=ImageUploadResponse)
+async def complete_upload(
+        body: CompleteUploadRequest,
+        db=Depends(get_user_db_session),
+        auth=Depends(auth_dependency),
+):
+    return await upload_service.complete_presigned_upload(db, auth["user_id"], body.upload_id)
+
+
 @router.get("/image/uploads/", response_model=list[ImageUploadRecord])
 async def get_user_uploads(
+        query: Annotated[UploadListQuery, Query()],
+        if_none_match: Annotated[str | None, Header()] = None,
+        db=Depends(get_user_read_db_session),
+        auth=Depends(read_auth_dependency),
+):
+    listing = await upload_service.get_user_uploads_cached(db, auth["user_id"], query)
+    # The body stays a plain list; the next page is requested with
+    # ``?cursor=<X-Next-Cursor>``.
+    headers = {"ETag": listing.etag, "Cache-Control": "private, no-cache"}
+    if listing.next_cursor:
+        headers["X-Next-Cursor"] = listing.next_cursor
+    if listing.matches(if_none_match):
+        return Response(status_code=304, headers=headers)
+    return Response(listing.body, media_type="application/json", headers=headers)
+
+
+@router.get("/image/uploads/events", response_class=StreamingResponse)
+async def stream_upload_events(
+        last_event_id: Annotated[str | None, Header()] = None,
+        read_db=Depends(get_read_db_session),
+        auth=Depends(read_auth_dependency),
+):
+    events = upload_status_hub.open_stream(auth["user_id"], last_event_id)
+    # The stream outlives the session the auth check used; return its
+    # connection to the pool now rather than when the client goes away.
+    await read_db.close()
+    return StreamingResponse(
+        events,
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
+
+
+@router.get("/image/uploads/{upload_id}/variants/{name}", response_class=RedirectResponse)
+async def get_upload_variant(
+        upload_id: int,
+        name: str,
         db=Depends(get_db_session),
         auth=Depends(auth_dependency),
 ):
-    return await upload_service.get_user_uploads(db, auth["user_id"])
+    url = await upload_service.get_variant_url(db, auth["user_id"], upload_id, name)
+    # The target key is deterministic, so clients may cache the redirect.
+    return RedirectResponse(url, status_code=307, headers={"Cache-Control": "private, max-age=86400"})
+
+
+@router.delete("/image/uploads/{upload_id}", response_model=ImageUploadDeleteResponse)
+async def delete_upload(
+        upload_id: int,
+        db=Depends(get_user_db_session),
+        auth=Depends(auth_dependency),
+):
+    return await upload_service.delete_upload(db, auth["user_id"], upload_id)
 
 
 @router.post("/auth/register", response_model=EmailRegistrationResponse, status_code=200)
@@ -86,6 +185,12 @@ async def login(body: LoginEmailInput, request: Request, db=Depends(get_db_sessi
     return resp
 
 
+@router.post("/auth/refresh", response_model=RefreshResponse, status_code=200)
+async def refresh(body: RefreshInput, request: Request, db=Depends(get_db_session)):
+    service = RefreshSession(db, body.refresh_token)
+    return await service.refresh(request=request)
+
+
 @router.post("/auth/logout", response_model=LogoutResponse, status_code=200)
 async def logout(
         body: LogoutInput,
@@ -105,6 +210,11 @@ async def health_check():
     }
 
 
+@router.get("/health/db-pool", tags=["health"])
+async def db_pool_stats():
+    return sessionmanager.pool_stats()
+
+
 @router.get("/")
 async def root():
     return {"message": "Hello World"}
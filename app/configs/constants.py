@@ -1,9 +1,30 @@
 from enum import IntEnum
 
+# Postgres NOTIFY channel carrying the id of each revoked auth session.
+SESSION_REVOKED_CHANNEL = "auth_session_revoked"
+
+# Postgres NOTIFY channel carrying the id of a user whose uploads changed
+# (created, deleted, or moved to another status).
+UPLOADS_CHANGED_CHANNEL = "image_uploads_changed"
+
+# Postgres NOTIFY channel carrying a JSON ``{"user_id", "id", "status",
+# "updated_at"}`` for each upload whose processing status changed.
+UPLOAD_STATUS_CHANNEL = "image_upload_status"
+
+# pg advisory lock key held by whichever worker is purging auth sessions
+# (the ASCII bytes of "sesspurg" as a bigint).
+SESSION_PURGE_LOCK_KEY = 0x7365737370757267
+
 class ProcessingStatus(IntEnum):
     UPLOADED = 0
     PROCESSING = 1
     COMPLETED = 2
+    FAILED = 3
+
+class OutboxStatus(IntEnum):
+    PENDING = 0
+    SENT = 1
+    FAILED = 2
 
 class UserStatus(IntEnum):
     INACTIVE = 0
@@ -19,13 +19,44 @@ class Settings(BaseSettings):
     """
     env: Literal["dev", "staging", "production"] = "dev"
     debug: bool = True
+    # Request and stage metrics in the Prometheus text format on
+    # ``GET /metrics``.  It is unauthenticated: keep it off the public network.
+    metrics_enabled: bool = True
     session_ttl_minutes: int = 15
+    # Active auth sessions are cached in-process so authenticated requests
+    # skip the ``auth_sessions`` lookup.  Revocations are pushed to every
+    # worker over LISTEN/NOTIFY; the TTL bounds staleness if one is missed.
+    auth_session_cache_enabled: bool = True
+    auth_session_cache_size: int = 10_000
+    auth_session_cache_ttl_seconds: float = 30.0
+    # Expired and revoked sessions are deleted in the background, in batches
+    # of ``auth_session_purge_batch_size``, once they are older than the
+    # retention window (revoked rows back refresh-token reuse detection).
+    # Every API worker runs the job; an advisory lock lets one at a time in.
+    auth_session_purge_enabled: bool = True
+    auth_session_purge_interval_seconds: float = 3600.0
+    auth_session_purge_batch_size: int = 5000
+    auth_session_purge_retention_days: int = 7
     log_level: str = "INFO"
 
 
     azure_vision_key: str = 'azure_vision_key'
     azure_vision_endpoint: str = 'azure_vision_endpoint'
 
+    # OCR worker (``python -m app.services.ocr.worker``).  Run as many worker
+    # processes as needed: rows are claimed with ``FOR UPDATE SKIP LOCKED``.
+    # A claim older than ``ocr_lease_seconds`` is assumed abandoned and
+    # retried, up to ``ocr_max_attempts`` claims before the upload is FAILED.
+    # A failed attempt is retried after ``ocr_retry_backoff_seconds``,
+    # doubling with each further attempt.
+    ocr_backend: Literal["azure", "fake"] = "azure"
+    ocr_batch_size: int = 16
+    ocr_concurrency: int = 4
+    ocr_poll_interval_seconds: float = 2.0
+    ocr_lease_seconds: int = 300
+    ocr_max_attempts: int = 3
+    ocr_retry_backoff_seconds: float = 30.0
+
     # Database connection defaults.  The previous placeholders prevented
     # SQLAlchemy from even parsing the connection URL (for instance the port was
     # non-numeric and the password contained angle brackets).  Using sensible
@@ -37,6 +68,40 @@ class Settings(BaseSettings):
     postgres_port: int = 5432
     postgres_dbname: str = 'pg_dbname'
     postgres_timeout: int = 5
+    # Connection pool, per worker process: ``postgres_pool_size`` kept open,
+    # up to ``postgres_max_overflow`` more under load; a request waiting
+    # longer than ``postgres_pool_timeout`` seconds for one fails.  Sessions
+    # are recycled after ``postgres_pool_recycle`` seconds and pinged on
+    # checkout.  ``GET /api/health/db-pool`` shows how busy the pool is.
+    postgres_pool_size: int = 10
+    postgres_max_overflow: int = 10
+    postgres_pool_timeout: float = 30.0
+    postgres_pool_recycle: int = 1800
+    postgres_pool_pre_ping: bool = True
+    # asyncpg prepared-statement cache per connection; set 0 behind
+    # PgBouncer in transaction mode.
+    postgres_statement_cache_size: int = 100
+    # Optional streaming replica for read-heavy queries (upload listings,
+    # session checks).  Reads fall back to the primary while the replica is
+    # more than ``postgres_replica_max_lag_seconds`` behind (re-measured at
+    # most every ``postgres_replica_lag_check_seconds``), and for
+    # ``postgres_read_your_writes_seconds`` after a user's own write.
+    postgres_replica_host: str | None = None
+    postgres_replica_port: int | None = None
+    postgres_replica_max_lag_seconds: float = 5.0
+    postgres_replica_lag_check_seconds: float = 1.0
+    postgres_read_your_writes_seconds: float = 10.0
+    # ``pg_dml.bulk_insert`` switches from multi-row INSERT to COPY at this
+    # many rows.
+    postgres_copy_threshold: int = 1000
+
+    # Object storage used for uploads: DigitalOcean Spaces in deployed
+    # environments; ``local`` and ``memory`` run the upload path without a
+    # network (development, benchmarks, load tests).
+    storage_backend: Literal["do_spaces", "local", "memory"] = "do_spaces"
+    storage_local_root: str = "/tmp/image-uploads"
+    storage_local_base_url: str = "http://localhost:8000/files"
+    storage_local_signing_key: str = "storage_local_signing_key"
 
     # DigitalOcean Spaces (S3 compatible) configuration.  Provide benign defaults
     # so that the storage client can be constructed in tests without contacting
@@ -46,6 +111,18 @@ class Settings(BaseSettings):
     do_spaces_region: str = 'us-east-1'
     do_spaces_bucket: str = 'do_space_bucket'
     do_spaces_endpoint: str = 'https://example.com'
+    # Uploads are streamed to Spaces in parts of this size; at most
+    # ``do_spaces_max_concurrency`` parts are in flight (and in memory) at once.
+    # S3 rejects non-final parts smaller than 5 MiB.
+    do_spaces_part_size_mb: int = 8
+    do_spaces_max_concurrency: int = 4
+    # Keep-alive HTTP pool shared by every storage call, plus per-call timeout
+    # (seconds) and retry budget for transient failures.
+    do_spaces_max_connections: int = 64
+    do_spaces_max_keepalive_connections: int = 32
+    do_spaces_keepalive_expiry: float = 30.0
+    do_spaces_timeout: float = 30.0
+    do_spaces_max_retries: int = 3
 
     # email related
     skip_email_verify: bool = False
@@ -59,6 +136,23 @@ class Settings(BaseSettings):
     mail_ssl_tls: bool = False
     use_credentials: bool = True
     validate_certs: bool = True
+    mail_timeout: float = 30.0
+    # Outgoing mail is written to the ``email_outbox`` table in the request's
+    # transaction and delivered by a background sender in every API worker,
+    # over one SMTP connection kept open while there is mail to send (closed
+    # after ``email_outbox_idle_seconds``).  Transient failures are retried
+    # with exponential backoff from ``email_outbox_backoff_seconds`` up to
+    # ``email_outbox_backoff_max_seconds``, ``email_outbox_max_attempts`` times.
+    # Each send is cut off after ``mail_timeout``; a batch is capped at what
+    # fits in ``email_outbox_lease_seconds`` at that rate.
+    email_outbox_enabled: bool = True
+    email_outbox_batch_size: int = 50
+    email_outbox_poll_interval_seconds: float = 2.0
+    email_outbox_lease_seconds: int = 300
+    email_outbox_max_attempts: int = 8
+    email_outbox_backoff_seconds: float = 30.0
+    email_outbox_backoff_max_seconds: float = 3600.0
+    email_outbox_idle_seconds: float = 60.0
 
     mail_token_secret_key: str = "mail_token_secret_key"
     mail_token_algorithm: str = "HS256"
@@ -66,6 +160,54 @@ class Settings(BaseSettings):
     access_token_secret_key : str = "access_token_secret_key"
     refresh_token_pepper: str = "refresh_token_pepper"
     refresh_token_bytes: int = 48
+    # A refresh token replayed this soon after it was rotated is taken for a
+    # client racing itself (two tabs refreshing at once) and only refused;
+    # later replays revoke every session of the user.
+    refresh_reuse_grace_seconds: float = 10.0
+    # bcrypt runs on this many dedicated threads (it releases the GIL), with
+    # at most ``password_hash_max_queue`` more calls waiting; further logins
+    # and registrations get ``503`` until the backlog drains.
+    password_hash_workers: int = 2
+    password_hash_max_queue: int = 16
+
+    # Presigned direct-to-storage uploads.  The upload id handed to the
+    # client is a JWT signed with ``upload_token_secret_key``.
+    upload_token_secret_key: str = "upload_token_secret_key"
+    upload_presign_expires_seconds: int = 900
+    upload_max_bytes: int = 25 * 1024 * 1024
+    # ``POST /image/upload/batch``: files per request, and how many of them
+    # are written to storage at once.
+    upload_batch_max_files: int = 50
+    upload_batch_concurrency: int = 4
+    # Serialized ``GET /image/uploads/`` pages are cached per user and query
+    # (served with an ETag), and dropped whenever that user's uploads change.
+    uploads_listing_cache_enabled: bool = True
+    uploads_listing_cache_size: int = 10_000
+    uploads_listing_cache_ttl_seconds: float = 30.0
+    # ``GET /image/uploads/events``: status changes are pushed to each open
+    # stream; a stream that falls ``uploads_events_queue_size`` events
+    # behind re-reads them from the database instead.  A comment line is
+    # sent after ``uploads_events_heartbeat_seconds`` of silence.  Catch-up
+    # re-reads ``uploads_events_overlap_seconds`` before the cursor, to pick
+    # up status changes whose transaction committed late; keep it above the
+    # longest status-changing transaction.
+    uploads_events_enabled: bool = True
+    uploads_events_queue_size: int = 100
+    uploads_events_heartbeat_seconds: float = 15.0
+    uploads_events_catchup_limit: int = 500
+    uploads_events_overlap_seconds: float = 5.0
+
+    # Server-side image normalization: uploads are auto-oriented, stripped of
+    # metadata, downsized to ``image_max_edge`` and re-encoded in a process
+    # pool; the result is stored next to the original.
+    image_normalize_enabled: bool = True
+    image_max_edge: int = 2048
+    image_normalize_format: Literal["WEBP", "JPEG"] = "WEBP"
+    image_normalize_quality: int = 82
+    image_process_workers: int = 2
+    # Smaller renditions for list screens, name -> longest edge in pixels.
+    # Rendered with the normalized copy at upload, or on first request.
+    image_variants: dict[str, int] = {"thumb": 256, "small": 720}
 
 
 # Singleton-style settings object
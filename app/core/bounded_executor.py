@@ -0,0 +1,103 @@
+import asyncio
+import threading
+from concurrent.futures import Executor, Future, ThreadPoolExecutor
+from typing import Any, Callable, Optional, TypeVar
+
+from fastapi import HTTPException
+
+T = TypeVar("T")
+
+
+class ExecutorSaturated(HTTPException):
+    """Raised instead of queueing more work; surfaces as ``503`` with ``Retry-After``."""
+
+    def __init__(self, name: str, retry_after: int = 1):
+        super().__init__(
+            status_code=503,
+            detail=f"Server busy ({name}); retry shortly",
+            headers={"Retry-After": str(retry_after)},
+        )
+
+
+class BoundedExecutor:
+    """
+    Runs blocking calls on a small dedicated pool, off the event loop.
+
+    At most ``max_workers`` calls run at once and at most ``max_queue`` more
+    wait for a worker; beyond that :meth:`run` sheds load by raising
+    :class:`ExecutorSaturated` immediately rather than letting latency grow
+    without bound.  A slot is held until the call itself finishes, not its
+    awaiter: cancelling a request does not stop a thread that is already
+    running.  Counters are exposed through :meth:`stats`.
+    """
+
+    def __init__(
+        self,
+        *,
+        name: str,
+        max_workers: int,
+        max_queue: int,
+        executor: Optional[Executor] = None,
+    ):
+        self.name = name
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self._executor = executor
+        # Released from worker threads, when each call finishes.
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.completed = 0
+        self.failed = 0
+        self.cancelled = 0
+        self.rejected = 0
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            self._executor = ThreadPoolExecutor(
+                max_workers=self.max_workers, thread_name_prefix=self.name
+            )
+        return self._executor
+
+    async def run(self, fn: Callable[..., T], *args: Any) -> T:
+        with self._lock:
+            if self._pending >= self.max_workers + self.max_queue:
+                self.rejected += 1
+                raise ExecutorSaturated(self.name)
+            self._pending += 1
+        try:
+            future = self._pool().submit(fn, *args)
+        except BaseException:
+            self._release(None)
+            raise
+        future.add_done_callback(self._release)
+        return await asyncio.wrap_future(future)
+
+    def _release(self, future: Optional[Future]) -> None:
+        with self._lock:
+            self._pending -= 1
+            if future is None:
+                return
+            if future.cancelled():
+                self.cancelled += 1
+            elif future.exception() is not None:
+                self.failed += 1
+            else:
+                self.completed += 1
+
+    def stats(self) -> dict[str, int]:
+        with self._lock:
+            running = min(self._pending, self.max_workers)
+            return {
+                "workers": self.max_workers,
+                "running": running,
+                "queued": self._pending - running,
+                "completed": self.completed,
+                "failed": self.failed,
+                "cancelled": self.cancelled,
+                "rejected": self.rejected,
+            }
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
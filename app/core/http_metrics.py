@@ -0,0 +1,95 @@
+import time
+from typing import Callable
+
+from fastapi import Request, Response, params
+from fastapi.routing import APIRoute
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+from app.core.metrics import SIZE_BUCKETS, Registry, registry, timed
+
+# Label for requests no route matched, so stray paths cannot add series.
+UNMATCHED = "unmatched"
+
+
+class MetricsMiddleware:
+    """
+    Records every HTTP request's latency, status code and response size
+    per route template, and how many requests are in flight.
+
+    A plain ASGI middleware rather than ``BaseHTTPMiddleware``, which would
+    buffer streaming responses.  Latency runs until the last body chunk is
+    sent, so for event streams it measures how long the stream stayed open.
+    """
+
+    def __init__(self, app: ASGIApp, registry: Registry = registry):
+        self.app = app
+        self.in_flight = registry.gauge(
+            "http_requests_in_flight", "HTTP requests being handled.", ("method",)
+        )
+        self.duration = registry.histogram(
+            "http_request_duration_seconds",
+            "HTTP request latency, from receipt to the last byte sent.",
+            ("method", "route", "status"),
+        )
+        self.size = registry.histogram(
+            "http_response_size_bytes",
+            "HTTP response body sizes.",
+            ("method", "route"),
+            buckets=SIZE_BUCKETS,
+        )
+
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] != "http":
+            await self.app(scope, receive, send)
+            return
+
+        method = scope["method"]
+        # An exception escaping the app becomes a 500 further out.
+        status, size = 500, 0
+
+        async def send_wrapper(message: Message) -> None:
+            nonlocal status, size
+            if message["type"] == "http.response.start":
+                status = message["status"]
+            elif message["type"] == "http.response.body":
+                size += len(message.get("body", b""))
+            await send(message)
+
+        self.in_flight.inc(method=method)
+        started = time.perf_counter()
+        try:
+            await self.app(scope, receive, send_wrapper)
+        finally:
+            elapsed = time.perf_counter() - started
+            self.in_flight.dec(method=method)
+            # The router records the matched route in the (shared) scope.
+            route = scope.get("route")
+            template = getattr(route, "path", UNMATCHED)
+            self.duration.observe(elapsed, method=method, route=template, status=status)
+            self.size.observe(size, method=method, route=template)
+
+
+class TimedRoute(APIRoute):
+    """
+    ``APIRoute`` that times multipart form parsing as the
+    ``multipart_parse`` stage.
+
+    The form is parsed up front; Starlette caches it on the request, so
+    FastAPI's own parse for the endpoint's parameters is free.  Only routes
+    with form parameters are parsed: FastAPI then closes the form (and its
+    spooled files) when the request ends, which it would not do for a form
+    the route never asked for.
+    """
+
+    def get_route_handler(self) -> Callable:
+        handler = super().get_route_handler()
+        if not (self.body_field and isinstance(self.body_field.field_info, params.Form)):
+            return handler
+
+        async def timed_handler(request: Request) -> Response:
+            if request.headers.get("content-type", "").startswith("multipart/form-data"):
+                with timed("multipart_parse"):
+                    await request.form()
+            return await handler(request)
+
+        return timed_handler
@@ -10,6 +10,16 @@ from jose.exceptions import JWTError
 from passlib.context import CryptContext
 
 from app.configs.settings import settings
+from app.core.bounded_executor import BoundedExecutor
+from app.core.metrics import timed
+
+# Shared by every JwtHelper instance: bcrypt is ~100-300ms of CPU per call
+# and must not run on the event loop.
+password_executor = BoundedExecutor(
+    name="bcrypt",
+    max_workers=settings.password_hash_workers,
+    max_queue=settings.password_hash_max_queue,
+)
 
 
 class JwtHelper:
@@ -31,6 +41,7 @@ class JwtHelper:
         self.secret_key: str = settings.mail_token_secret_key
         self.access_secret_key: str = settings.access_token_secret_key
         self.expire_hours: int = settings.mail_token_expire_hours
+        self.upload_secret_key: str = settings.upload_token_secret_key
 
         # Password hashing
         self.pwd_context = CryptContext(schemes=["bcrypt"], deprecated="auto")
@@ -50,6 +61,17 @@ class JwtHelper:
     def hash_password(self, plain: str) -> str:
         return self.pwd_context.hash(plain)
 
+    async def verify_password_async(self, plain: str, hashed: str) -> bool:
+        """``verify_password`` on the bcrypt pool; raises ``ExecutorSaturated`` when full."""
+        # Timed including the wait for a free worker.
+        with timed("bcrypt_verify"):
+            return await password_executor.run(self.pwd_context.verify, plain, hashed)
+
+    async def hash_password_async(self, plain: str) -> str:
+        """``hash_password`` on the bcrypt pool; raises ``ExecutorSaturated`` when full."""
+        with timed("bcrypt_hash"):
+            return await password_executor.run(self.pwd_context.hash, plain)
+
     # -------------------------
     # Access token_utils (JWT)
     # -------------------------
@@ -93,6 +115,26 @@ class JwtHelper:
         except JWTError:
             return {}
 
+    # -------------------------
+    # Upload token_utils (JWT)
+    # -------------------------
+    def create_upload_token(self, data: dict, expires_seconds: int) -> str:
+        """
+        Sign the pending upload described by `data` (owner, storage key, metadata)
+        so it can be handed to the client as an opaque upload id.
+        """
+        to_encode = data.copy()
+        expire = datetime.now(tz=timezone.utc) + timedelta(seconds=expires_seconds)
+        to_encode.update({"exp": expire, "typ": "upload"})
+        return jwt.encode(to_encode, self.upload_secret_key, algorithm=self.algorithm)
+
+    def verify_upload_token(self, token: str) -> Optional[dict]:
+        try:
+            payload = jwt.decode(token, self.upload_secret_key, algorithms=[self.algorithm])
+        except JWTError:
+            return None
+        return payload if payload.get("typ") == "upload" else None
+
     # -------------------------
     # Refresh token_utils (opaque)
     # -------------------------
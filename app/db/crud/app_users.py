@@ -4,7 +4,7 @@ from pydantic import EmailStr
 from sqlalchemy import select, func
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.db.models.app_users import AppUser
-from app.db.pg_dml import get_one
+from app.db.pg_dml import get_one, insert_returning
 
 class AppUserCrud:
     def __init__(self, session: AsyncSession):
@@ -19,8 +19,4 @@ class AppUserCrud:
         return result
 
     async def create(self, **fields) -> AppUser:
-        user = AppUser(**fields)
-        self.session.add(user)
-        await self.session.commit()
-        await self.session.refresh(user)
-        return user
\ No newline at end of file
+        return await insert_returning(self.session, AppUser, fields)
\ No newline at end of file
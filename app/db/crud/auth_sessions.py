@@ -1,19 +1,51 @@
-from datetime import datetime, timezone
+from datetime import datetime, timedelta, timezone
 from typing import Optional
 import uuid
 
+from dataclasses import dataclass
+
+from sqlalchemy import (
+    Text,
+    and_,
+    cast,
+    delete,
+    func,
+    insert,
+    literal,
+    literal_column,
+    or_,
+    select,
+    true,
+    update,
+)
+from sqlalchemy.dialects.postgresql import BYTEA, INET, UUID
 from sqlalchemy.ext.asyncio import AsyncSession
 
+from app.configs.constants import SESSION_REVOKED_CHANNEL
 from app.core.jwt_helper import JwtHelper
 from app.db.models.auth_sessions import AuthSessions
+from app.db.pg_notify import notify, notify_many
 
 from app.db.pg_dml import  (
-    insert_record,
-    upsert_record,
+    insert_returning,
+    update_returning,
     get_by_id,
-    get_many,
 )
 
+@dataclass(frozen=True)
+class RotatedSession:
+    id: uuid.UUID
+    user_id: int
+    expires_at: datetime
+
+
+@dataclass(frozen=True)
+class ReplayedToken:
+    user_id: int
+    # Rotated within the grace window: most likely a concurrent refresh.
+    recent: bool
+
+
 class AuthSessionCRUD:
     """
     CRUD for AuthSession that delegates to shared pg_dml helpers.
@@ -32,16 +64,19 @@ class AuthSessionCRUD:
         device_name: Optional[str] = None,
         days: int = 30,
     ) -> AuthSessions:
-        row = AuthSessions(
-            user_id=user_id,
-            refresh_hash=self.token_utils.hash_refresh(refresh_token_raw),
-            created_at=datetime.now(timezone.utc),
-            expires_at=AuthSessions.default_expiry(days),
-            ip=ip,
-            user_agent=user_agent,
-            device_name=device_name,
+        return await insert_returning(
+            db,
+            AuthSessions,
+            dict(
+                user_id=user_id,
+                refresh_hash=self.token_utils.hash_refresh(refresh_token_raw),
+                created_at=datetime.now(timezone.utc),
+                expires_at=AuthSessions.default_expiry(days),
+                ip=ip,
+                user_agent=user_agent,
+                device_name=device_name,
+            ),
         )
-        return await insert_record(db, row)
 
     async def find_valid_by_token(
         self,
@@ -49,29 +84,27 @@ class AuthSessionCRUD:
         *,
         user_id: int,
         refresh_token_raw: str,
-        window_limit: int = 50,  # cap to keep the in-Python hash check small
     ) -> Optional[AuthSessions]:
         """
-        We use get_many() for equality filters and ordering. Since your pg_dml
-        helper doesn't do range predicates, we filter `expires_at > now()` in Python.
+        Return the live session ``refresh_token_raw`` belongs to, if any.
+
+        A single probe of the unique ``refresh_hash`` index with the validity
+        checks in the same query, so at most one row comes back however many
+        sessions the user has.  Matching by hash in SQL needs no constant-time
+        compare: the lookup key is a peppered SHA-256 of a random token.
         """
-        # equality filters done in SQL
-        rows: list[AuthSessions] = await get_many(
-            db,
-            AuthSessions,
-            filters={"user_id": user_id, "is_revoked": False},
-            order_by=[AuthSessions.created_at.desc()],
-            limit=window_limit,
-            offset=None,
+        stmt = (
+            select(AuthSessions)
+            .where(
+                AuthSessions.refresh_hash == self.token_utils.hash_refresh(refresh_token_raw),
+                AuthSessions.user_id == user_id,
+                AuthSessions.is_revoked.is_(False),
+                AuthSessions.expires_at > func.now(),
+            )
+            .limit(1)
         )
-        # additional constraints in Python
-        now = datetime.now(timezone.utc)
-        probe = self.token_utils.hash_refresh(refresh_token_raw)
-
-        for r in rows:
-            if r.expires_at > now and self. token_utils.constant_time_eq(r.refresh_hash, probe):
-                return r
-        return None
+        result = await db.execute(stmt)
+        return result.scalars().first()
 
     async def get_active_by_id(
         self,
@@ -94,20 +127,138 @@ class AuthSessionCRUD:
         session_id: uuid.UUID,
         reason: Optional[str] = None,
     ) -> None:
-        row = await get_by_id(db, AuthSessions, session_id)
+        row = await update_returning(
+            db,
+            AuthSessions,
+            [AuthSessions.id == session_id],
+            dict(is_revoked=True, revoked_at=func.now(), revoke_reason=reason),
+            commit=False,
+        )
         if not row:
             return
-        row.is_revoked = True
-        row.revoked_at = datetime.utcnow()
-        row.revoke_reason = reason
-        await upsert_record(db, row)
+        # Delivered on commit: every worker drops the session from its cache.
+        await notify(db, SESSION_REVOKED_CHANNEL, str(session_id))
+        await db.commit()
+
+    async def rotate(
+        self,
+        db: AsyncSession,
+        *,
+        refresh_token_raw: str,
+        new_refresh_token_raw: str,
+        ip: Optional[str],
+        user_agent: Optional[str],
+    ) -> Optional[RotatedSession]:
+        """
+        Exchange a live refresh token for a new session in one statement.
+
+        A CTE revokes the old session (linking it to its replacement through
+        ``replaced_by``), inserts the replacement with the same user, device
+        and absolute expiry, and notifies ``SESSION_REVOKED_CHANNEL`` for
+        the old id.  Returns ``None`` if the token is unknown, expired or
+        already revoked; two concurrent rotations of one token cannot both
+        succeed because the second re-checks ``is_revoked`` after the first
+        commits.  Does not commit.
+        """
+        new_id = uuid.uuid4()
+        old = (
+            update(AuthSessions)
+            .where(
+                AuthSessions.refresh_hash == self.token_utils.hash_refresh(refresh_token_raw),
+                AuthSessions.is_revoked.is_(False),
+                AuthSessions.expires_at > func.now(),
+            )
+            .values(
+                is_revoked=True,
+                revoked_at=func.now(),
+                revoke_reason="rotated",
+                replaced_by=new_id,
+            )
+            .returning(
+                AuthSessions.id,
+                AuthSessions.user_id,
+                AuthSessions.expires_at,
+                AuthSessions.device_name,
+            )
+            .cte("old")
+        )
+        new = (
+            insert(AuthSessions)
+            .from_select(
+                [
+                    "id", "user_id", "refresh_hash", "created_at", "expires_at",
+                    "ip", "user_agent", "device_name", "is_revoked",
+                ],
+                select(
+                    literal(new_id, UUID(as_uuid=True)),
+                    old.c.user_id,
+                    literal(self.token_utils.hash_refresh(new_refresh_token_raw), BYTEA),
+                    func.now(),
+                    old.c.expires_at,
+                    cast(literal(ip, Text), INET),
+                    literal(user_agent, Text),
+                    old.c.device_name,
+                    literal(False),
+                ),
+            )
+            .returning(AuthSessions.id, AuthSessions.user_id, AuthSessions.expires_at)
+            .cte("new")
+        )
+        notified = select(
+            func.pg_notify(SESSION_REVOKED_CHANNEL, cast(old.c.id, Text)).label("sent")
+        ).subquery("notified")
+        stmt = select(new.c.id, new.c.user_id, new.c.expires_at).select_from(
+            new.join(notified, true())
+        )
+        row = (await db.execute(stmt)).first()
+        return RotatedSession(*row) if row else None
+
+    async def was_rotated(
+        self,
+        db: AsyncSession,
+        *,
+        refresh_token_raw: str,
+        grace_seconds: float = 0,
+    ) -> Optional[ReplayedToken]:
+        """
+        If ``refresh_token_raw`` belongs to a session that was already
+        rotated, the token is being replayed: return its ``user_id`` and
+        whether the rotation happened less than ``grace_seconds`` ago, by
+        the database clock.
+        """
+        stmt = select(
+            AuthSessions.user_id,
+            AuthSessions.revoked_at > func.now() - timedelta(seconds=grace_seconds),
+        ).where(
+            AuthSessions.refresh_hash == self.token_utils.hash_refresh(refresh_token_raw),
+            AuthSessions.replaced_by.is_not(None),
+        )
+        row = (await db.execute(stmt)).first()
+        return ReplayedToken(row[0], bool(row[1])) if row else None
+
+    async def revoke_all_for_user(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        reason: str,
+    ) -> int:
+        """Revoke every live session of ``user_id`` and commit; returns how many."""
+        stmt = (
+            update(AuthSessions)
+            .where(AuthSessions.user_id == user_id, AuthSessions.is_revoked.is_(False))
+            .values(is_revoked=True, revoked_at=func.now(), revoke_reason=reason)
+            .returning(AuthSessions.id)
+        )
+        revoked = list((await db.execute(stmt)).scalars().all())
+        await notify_many(db, SESSION_REVOKED_CHANNEL, [str(i) for i in revoked])
+        await db.commit()
+        return len(revoked)
 
     async def touch(self, db: AsyncSession, *, session_id: uuid.UUID) -> None:
-        row = await get_by_id(db, AuthSessions, session_id)
-        if not row:
-            return
-        row.last_seen_at = datetime.utcnow()
-        await upsert_record(db, row)
+        await update_returning(
+            db, AuthSessions, [AuthSessions.id == session_id], dict(last_seen_at=func.now())
+        )
 
     async def link_replacement(
         self,
@@ -116,55 +267,42 @@ class AuthSessionCRUD:
         old_id: uuid.UUID,
         new_id: uuid.UUID,
     ) -> None:
-        row = await get_by_id(db, AuthSessions, old_id)
-        if not row:
-            return
-        row.replaced_by = new_id
-        await upsert_record(db, row)
+        await update_returning(
+            db, AuthSessions, [AuthSessions.id == old_id], dict(replaced_by=new_id)
+        )
 
-    async def purge_old(
+    async def purge_batch(
         self,
         db: AsyncSession,
         *,
-        # NOTE: pg_dml has no delete helper; keep this simple and conservative:
-        # delete only items that are already revoked or expired AND older than `created_before`.
-        created_before: Optional[datetime] = None,
+        before: datetime,
+        limit: int,
     ) -> int:
         """
-        Purges in two passes using your helpers, to avoid raw DELETE.
-        If you expect millions of rows, replace with a single SQL DELETE.
+        Delete up to ``limit`` sessions that expired, or were revoked,
+        before ``before``; returns how many rows were deleted.
+
+        One ``DELETE ... WHERE ctid IN (SELECT ctid ... LIMIT n)`` statement,
+        so no rows are loaded into Python and each batch is a short
+        transaction.  Rows locked by a concurrent rotate or revoke are
+        skipped rather than waited on.  Does not commit.
         """
-        now = datetime.utcnow()
-        # Pull a reasonable batch and delete via session for safety.
-        # (Tune the limit or loop in batches if needed.)
-        candidates = await get_many(
-            db,
-            AuthSessions,
-            filters={"is_revoked": True},  # start with revoked
-            order_by=[AuthSessions.created_at.asc()],
-            limit=500,
-        )
-        extra = await get_many(
-            db,
-            AuthSessions,
-            filters={"is_revoked": False},  # still active but maybe expired
-            order_by=[AuthSessions.created_at.asc()],
-            limit=500,
+        ctid = literal_column("ctid")
+        doomed = (
+            select(ctid)
+            .select_from(AuthSessions)
+            .where(
+                or_(
+                    AuthSessions.expires_at < before,
+                    and_(
+                        AuthSessions.is_revoked.is_(True),
+                        func.coalesce(AuthSessions.revoked_at, AuthSessions.created_at) < before,
+                    ),
+                )
+            )
+            .limit(limit)
+            .with_for_update(skip_locked=True)
         )
-        to_delete: list[AuthSessions] = []
-        for r in candidates:
-            if (created_before is None or r.created_at < created_before):
-                to_delete.append(r)
-        for r in extra:
-            if r.expires_at < now and (created_before is None or r.created_at < created_before):
-                to_delete.append(r)
-
-        # Use the ORM session delete so we stay consistent with your pattern
-        # (this is the one place we don't have a pg_dml helper).
-        count = 0
-        for r in to_delete:
-            await db.delete(r)
-            count += 1
-        if count:
-            await db.commit()
-        return count
+        stmt = delete(AuthSessions).where(ctid.in_(doomed.scalar_subquery()))
+        result = await db.execute(stmt)
+        return result.rowcount
@@ -0,0 +1,139 @@
+from datetime import datetime, timedelta, timezone
+from typing import Optional
+
+from sqlalchemy import BigInteger, SmallInteger, and_, column, func, select, update, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.configs.constants import OutboxStatus
+from app.db.models.email_outbox import EmailOutbox
+from app.db.pg_dml import insert_returning
+
+
+class EmailOutboxCRUD:
+    """
+    Durable queue of outgoing mail.
+
+    None of these methods commit: messages are enqueued in the transaction
+    of whatever caused them, so a rolled-back registration sends nothing.
+    """
+
+    async def enqueue(
+        self,
+        db: AsyncSession,
+        *,
+        recipient: str,
+        subject: str,
+        body: str,
+        subtype: str = "html",
+    ) -> EmailOutbox:
+        now = datetime.now(timezone.utc)
+        return await insert_returning(
+            db,
+            EmailOutbox,
+            dict(
+                recipient=recipient,
+                subject=subject,
+                body=body,
+                subtype=subtype,
+                status=OutboxStatus.PENDING,
+                next_attempt_at=now,
+                created_at=now,
+            ),
+            commit=False,
+        )
+
+    async def claim_due(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> list[EmailOutbox]:
+        """
+        Claim up to ``limit`` pending messages that are due, oldest first.
+
+        A claim pushes ``next_attempt_at`` out by ``lease_seconds``, so a
+        sender that dies mid-batch leaves its messages to be retried once
+        the lease runs out, and bumps ``attempts``, which callers pass back
+        to :meth:`mark_sent` / :meth:`mark_failed` as a fencing token.
+        Rows claimed concurrently are skipped.  Due messages that have
+        already been claimed ``max_attempts`` times (their sender died each
+        time) are marked FAILED instead of being claimed again.
+        """
+        due = and_(
+            EmailOutbox.status == OutboxStatus.PENDING,
+            EmailOutbox.next_attempt_at <= func.now(),
+        )
+        exhausted = (
+            select(EmailOutbox.id)
+            .where(due, EmailOutbox.attempts >= max_attempts)
+            .with_for_update(skip_locked=True)
+        )
+        await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(exhausted.scalar_subquery()))
+            .values(
+                status=OutboxStatus.FAILED,
+                last_error=func.coalesce(EmailOutbox.last_error, "claim expired"),
+            )
+            .execution_options(synchronize_session=False)
+        )
+
+        claimable = (
+            select(EmailOutbox.id)
+            .where(due, EmailOutbox.attempts < max_attempts)
+            .order_by(EmailOutbox.next_attempt_at)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(EmailOutbox)
+            .where(EmailOutbox.id.in_(claimable.scalar_subquery()))
+            .values(
+                next_attempt_at=func.now() + timedelta(seconds=lease_seconds),
+                attempts=EmailOutbox.attempts + 1,
+            )
+            .returning(EmailOutbox)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return sorted(result.scalars().all(), key=lambda m: m.id)
+
+    async def mark_sent(self, db: AsyncSession, *, claims: dict[int, int]) -> None:
+        """
+        Mark delivered messages, given as ``{id: attempts}`` from the
+        claim, in one statement.
+        """
+        if not claims:
+            return
+        batch = values(
+            column("id", BigInteger), column("attempts", SmallInteger), name="batch"
+        ).data(list(claims.items()))
+        await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == batch.c.id, EmailOutbox.attempts == batch.c.attempts)
+            .values(status=OutboxStatus.SENT, sent_at=func.now(), last_error=None)
+            .execution_options(synchronize_session=False)
+        )
+
+    async def mark_failed(
+        self,
+        db: AsyncSession,
+        *,
+        message_id: int,
+        attempts: int,
+        error: str,
+        retry_at: Optional[datetime],
+    ) -> None:
+        """Schedule another attempt at ``retry_at``, or give up if it is ``None``."""
+        values = dict(last_error=error[:2000])
+        if retry_at is None:
+            values["status"] = OutboxStatus.FAILED
+        else:
+            values["next_attempt_at"] = retry_at
+        await db.execute(
+            update(EmailOutbox)
+            .where(EmailOutbox.id == message_id, EmailOutbox.attempts == attempts)
+            .values(**values)
+        )
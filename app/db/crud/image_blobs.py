@@ -0,0 +1,161 @@
+from datetime import datetime, timezone
+from typing import Optional
+
+from sqlalchemy import Integer, column, delete, select, update, values
+from sqlalchemy.dialects.postgresql import BYTEA, insert
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.image_blobs import ImageBlobs
+from app.db.pg_dml import insert_on_conflict
+
+
+class ImageBlobCRUD:
+    """
+    Reference-counted storage objects, deduplicated per user by content hash.
+
+    None of these methods commit: each reference change is meant to land in
+    the same transaction as the ``image_upload`` row that causes it.
+    """
+
+    async def acquire(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        content_hash: bytes,
+    ) -> Optional[ImageBlobs]:
+        """Take a reference on an existing blob; ``None`` if the hash is new."""
+        stmt = (
+            update(ImageBlobs)
+            .where(ImageBlobs.user_id == user_id, ImageBlobs.content_hash == content_hash)
+            .values(ref_count=ImageBlobs.ref_count + 1)
+            .returning(ImageBlobs)
+        )
+        result = await db.execute(stmt)
+        return result.scalars().first()
+
+    async def get_many(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        content_hashes: list[bytes],
+    ) -> dict[bytes, ImageBlobs]:
+        """Existing blobs among ``content_hashes``, keyed by hash.  Takes no references."""
+        stmt = select(ImageBlobs).where(
+            ImageBlobs.user_id == user_id, ImageBlobs.content_hash.in_(content_hashes)
+        )
+        result = await db.execute(stmt)
+        return {blob.content_hash: blob for blob in result.scalars()}
+
+    async def acquire_many(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        counts: dict[bytes, int],
+    ) -> dict[bytes, ImageBlobs]:
+        """
+        Take ``counts[hash]`` references on each existing blob in one
+        statement; hashes that no longer exist are missing from the result.
+        """
+        if not counts:
+            return {}
+        batch = values(
+            column("content_hash", BYTEA), column("n", Integer), name="batch"
+        ).data(list(counts.items()))
+        stmt = (
+            update(ImageBlobs)
+            .where(ImageBlobs.user_id == user_id, ImageBlobs.content_hash == batch.c.content_hash)
+            .values(ref_count=ImageBlobs.ref_count + batch.c.n)
+            .returning(ImageBlobs)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        return {blob.content_hash: blob for blob in result.scalars()}
+
+    async def register(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        content_hash: bytes,
+        file_path: str,
+        normalized_path: Optional[str] = None,
+    ) -> ImageBlobs:
+        """
+        Record a freshly stored blob with one reference.
+
+        If a concurrent upload registered the same content first, this takes
+        a reference on that blob instead; callers compare ``file_path`` to
+        find out whether their own copy is redundant.
+        """
+        return await insert_on_conflict(
+            db,
+            ImageBlobs,
+            dict(
+                user_id=user_id,
+                content_hash=content_hash,
+                file_path=file_path,
+                normalized_path=normalized_path,
+                ref_count=1,
+                created_at=datetime.now(timezone.utc),
+            ),
+            index_elements=[ImageBlobs.user_id, ImageBlobs.content_hash],
+            set_={"ref_count": ImageBlobs.ref_count + 1},
+            commit=False,
+        )
+
+    async def register_many(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        blobs: list[tuple[bytes, str, Optional[str], int]],
+    ) -> dict[bytes, ImageBlobs]:
+        """
+        Multi-row :meth:`register`: ``blobs`` holds ``(content_hash,
+        file_path, normalized_path, references)`` per freshly stored blob.
+        """
+        if not blobs:
+            return {}
+        now = datetime.now(timezone.utc)
+        stmt = insert(ImageBlobs).values([
+            dict(
+                user_id=user_id,
+                content_hash=content_hash,
+                file_path=file_path,
+                normalized_path=normalized_path,
+                ref_count=references,
+                created_at=now,
+            )
+            for content_hash, file_path, normalized_path, references in blobs
+        ])
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[ImageBlobs.user_id, ImageBlobs.content_hash],
+            set_={"ref_count": ImageBlobs.ref_count + stmt.excluded.ref_count},
+        ).returning(ImageBlobs)
+        result = await db.execute(stmt)
+        return {blob.content_hash: blob for blob in result.scalars()}
+
+    async def release(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        content_hash: bytes,
+    ) -> Optional[str]:
+        """
+        Drop a reference; returns the blob's ``file_path`` once nothing
+        references it any more, so the caller can delete the object.
+        """
+        where = (ImageBlobs.user_id == user_id, ImageBlobs.content_hash == content_hash)
+        await db.execute(
+            update(ImageBlobs).where(*where).values(ref_count=ImageBlobs.ref_count - 1)
+        )
+        result = await db.execute(
+            delete(ImageBlobs)
+            .where(*where, ImageBlobs.ref_count <= 0)
+            .returning(ImageBlobs.file_path)
+        )
+        return result.scalars().first()
@@ -0,0 +1,37 @@
+from datetime import datetime, timezone
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.db.models.image_ocr_results import ImageOcrResults
+from app.db.pg_dml import insert_on_conflict
+
+
+class ImageOcrResultCRUD:
+    """CRUD helper for :class:`ImageOcrResults`."""
+
+    async def save(
+        self,
+        db: AsyncSession,
+        *,
+        upload_id: int,
+        text: str,
+        lines: list[str],
+    ) -> None:
+        """
+        Store (or replace) the text extracted from an upload.  Does not
+        commit, so it lands together with the status change.
+        """
+        await insert_on_conflict(
+            db,
+            ImageOcrResults,
+            dict(
+                upload_id=upload_id,
+                text=text,
+                lines=lines,
+                created_at=datetime.now(timezone.utc),
+            ),
+            index_elements=[ImageOcrResults.upload_id],
+            set_=["text", "lines", "created_at"],
+            commit=False,
+        )
+
@@ -1,13 +1,65 @@
-from datetime import datetime, timezone
+import json
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import Row, Select, and_, or_, select, tuple_, update
 from sqlalchemy.ext.asyncio import AsyncSession
 
-from app.configs.constants import ProcessingStatus
+from app.configs.constants import UPLOAD_STATUS_CHANNEL, UPLOADS_CHANGED_CHANNEL, ProcessingStatus
 from app.db.models.image_uploads import ImageUploads
-from app.db.pg_dml import insert_record, get_many
+from app.db.pg_dml import (
+    bulk_insert,
+    bulk_insert_returning,
+    delete_record,
+    get_one,
+    insert_on_conflict,
+    insert_returning,
+)
+from app.db.pg_notify import notify_many
 
+# What a listing page needs, in ``ImageUploadRecord`` field order, plus the
+# page cursor.
+LISTING_COLUMNS = (
+    ImageUploads.id,
+    ImageUploads.file_path,
+    ImageUploads.normalized_path,
+    ImageUploads.status,
+    ImageUploads.chapter,
+    ImageUploads.line_start,
+    ImageUploads.line_end,
+    ImageUploads.upload_timestamp,
+)
 
 class ImageUploadCRUD:
-    """CRUD helper for :class:`ImageUploads`."""
+    """
+    CRUD helper for :class:`ImageUploads`.
+
+    Every write that changes what a user's listing shows also notifies
+    ``UPLOADS_CHANGED_CHANNEL`` with the user id, in the same transaction,
+    so cached listings in every process are dropped once it commits.
+    Status changes are additionally published, row by row, on
+    ``UPLOAD_STATUS_CHANNEL`` for the status event stream.
+    """
+
+    async def _changed(self, db: AsyncSession, user_ids) -> None:
+        await notify_many(db, UPLOADS_CHANGED_CHANNEL, (str(u) for u in user_ids))
+
+    async def _status_changed(self, db: AsyncSession, rows) -> None:
+        """Notify ``(user_id, id, status, updated_at)`` tuples; does not commit."""
+        await notify_many(
+            db,
+            UPLOAD_STATUS_CHANNEL,
+            (
+                json.dumps(
+                    {
+                        "user_id": user_id,
+                        "id": upload_id,
+                        "status": int(status),
+                        "updated_at": updated_at.isoformat(),
+                    },
+                    separators=(",", ":"),
+                )
+                for user_id, upload_id, status, updated_at in rows
+            ),
+        )
 
     async def create(
         self,
@@ -21,9 +73,12 @@ class ImageUploadCRUD:
         script_id: int | None = None,
         status: int = ProcessingStatus.UPLOADED,
         upload_timestamp: datetime | None = None,
+        content_hash: bytes | None = None,
+        normalized_path: str | None = None,
     ) -> ImageUploads:
         """Insert a new ``ImageUploads`` row."""
-        row = ImageUploads(
+        upload_timestamp = upload_timestamp or datetime.now(timezone.utc)
+        values = dict(
             user_id=user_id,
             file_path=file_path,
             chapter=chapter,
@@ -31,14 +86,351 @@ class ImageUploadCRUD:
             line_end=line_end,
             status=status,
             script_id=script_id,
-            upload_timestamp=upload_timestamp or datetime.now(timezone.utc),
+            upload_timestamp=upload_timestamp,
+            updated_at=upload_timestamp,
+            content_hash=content_hash,
+            normalized_path=normalized_path,
+        )
+        row = await insert_returning(db, ImageUploads, values, commit=False)
+        await self._changed(db, [user_id])
+        await db.commit()
+        return row
+
+    async def create_or_get(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        file_path: str,
+        chapter: int,
+        line_start: int,
+        line_end: int,
+        script_id: int | None = None,
+    ) -> ImageUploads:
+        """
+        Record a user's upload of an object that is not deduplicated (no
+        content hash), or return the row already recorded for ``file_path``,
+        and commit.
+
+        ``INSERT ... ON CONFLICT DO NOTHING`` on the partial unique index
+        ``(user_id, file_path) WHERE content_hash IS NULL``, so concurrent
+        calls for the same object record it exactly once.
+        """
+        [values] = self._with_defaults([dict(
+            user_id=user_id,
+            file_path=file_path,
+            chapter=chapter,
+            line_start=line_start,
+            line_end=line_end,
+            script_id=script_id,
+        )])
+        row = await insert_on_conflict(
+            db,
+            ImageUploads,
+            values,
+            index_elements=[ImageUploads.user_id, ImageUploads.file_path],
+            index_where=ImageUploads.content_hash.is_(None),
+            commit=False,
         )
-        return await insert_record(db, row)
+        if row is None:
+            row = await self.get_by_file_path(db, user_id=user_id, file_path=file_path)
+        else:
+            await self._changed(db, [user_id])
+        await db.commit()
+        return row
+
+    async def create_many(
+        self,
+        db: AsyncSession,
+        rows: list[dict],
+    ) -> list[int]:
+        """
+        Insert many ``ImageUploads`` rows and commit; returns their ids in
+        the order given.
+
+        Executed as batched multi-row ``INSERT ... RETURNING`` statements
+        rather than one round trip per row.  Each dict takes the keyword
+        arguments of :meth:`create`.
+        """
+        ids = await bulk_insert_returning(db, ImageUploads, self._with_defaults(rows), commit=False)
+        await self._changed(db, {row["user_id"] for row in rows})
+        await db.commit()
+        return ids
+
+    async def bulk_create(
+        self,
+        db: AsyncSession,
+        rows: list[dict],
+    ) -> int:
+        """
+        Insert many ``ImageUploads`` rows and commit, without returning ids;
+        for imports and backfills.  Large batches are loaded with COPY.
+        """
+        count = await bulk_insert(db, ImageUploads, self._with_defaults(rows), commit=False)
+        await self._changed(db, {row["user_id"] for row in rows})
+        await db.commit()
+        return count
+
+    @staticmethod
+    def _with_defaults(rows: list[dict]) -> list[dict]:
+        now = datetime.now(timezone.utc)
+        filled = []
+        for row in rows:
+            row = {"status": ProcessingStatus.UPLOADED, "upload_timestamp": now, "attempts": 0, **row}
+            row.setdefault("updated_at", row["upload_timestamp"])
+            filled.append(row)
+        return filled
 
     async def get_by_user(
         self,
         db: AsyncSession,
         user_id: int,
+        *,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+        chapter: int | None = None,
+        script_id: int | None = None,
+        status: int | None = None,
+        line_from: int | None = None,
+        line_to: int | None = None,
     ) -> list[ImageUploads]:
-        """Fetch all uploads for a given user."""
-        return await get_many(db, ImageUploads, filters={"user_id": user_id})
+        """
+        Fetch a user's uploads, newest first.
+
+        Keyset paginated: pass the ``(upload_timestamp, id)`` of the last
+        row of the previous page as ``after``.  With the
+        ``(user_id, upload_timestamp DESC, id DESC)`` index every page is an
+        index range scan, however deep.  ``line_from``/``line_to`` select
+        uploads whose line range overlaps the given one.
+        """
+        stmt = self._by_user(
+            select(ImageUploads),
+            user_id,
+            limit=limit,
+            after=after,
+            chapter=chapter,
+            script_id=script_id,
+            status=status,
+            line_from=line_from,
+            line_to=line_to,
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_listing_by_user(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        **filters,
+    ) -> list[Row]:
+        """
+        :meth:`get_by_user`, but only the ``LISTING_COLUMNS``, as plain rows.
+
+        Skips building ORM objects and tracking them in the session's
+        identity map, which dominates the cost of large listings.
+        """
+        result = await db.execute(self._by_user(select(*LISTING_COLUMNS), user_id, **filters))
+        return list(result.all())
+
+    @staticmethod
+    def _by_user(
+        stmt: Select,
+        user_id: int,
+        *,
+        limit: int | None = None,
+        after: tuple[datetime, int] | None = None,
+        chapter: int | None = None,
+        script_id: int | None = None,
+        status: int | None = None,
+        line_from: int | None = None,
+        line_to: int | None = None,
+    ) -> Select:
+        stmt = (
+            stmt.where(ImageUploads.user_id == user_id)
+            .order_by(ImageUploads.upload_timestamp.desc(), ImageUploads.id.desc())
+        )
+        if after is not None:
+            stmt = stmt.where(tuple_(ImageUploads.upload_timestamp, ImageUploads.id) < tuple_(*after))
+        if chapter is not None:
+            stmt = stmt.where(ImageUploads.chapter == chapter)
+        if script_id is not None:
+            stmt = stmt.where(ImageUploads.script_id == script_id)
+        if status is not None:
+            stmt = stmt.where(ImageUploads.status == status)
+        if line_from is not None:
+            stmt = stmt.where(ImageUploads.line_end >= line_from)
+        if line_to is not None:
+            stmt = stmt.where(ImageUploads.line_start <= line_to)
+        if limit is not None:
+            stmt = stmt.limit(limit)
+        return stmt
+
+    async def changed_since(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        *,
+        after: tuple[datetime, int],
+        limit: int,
+    ) -> list[ImageUploads]:
+        """
+        A user's uploads whose status changed after ``after``, an
+        ``(updated_at, id)`` pair, oldest change first.  An index range scan
+        on ``(user_id, updated_at, id)``.
+        """
+        stmt = (
+            select(ImageUploads)
+            .where(
+                ImageUploads.user_id == user_id,
+                tuple_(ImageUploads.updated_at, ImageUploads.id) > tuple_(*after),
+            )
+            .order_by(ImageUploads.updated_at, ImageUploads.id)
+            .limit(limit)
+        )
+        result = await db.execute(stmt)
+        return list(result.scalars().all())
+
+    async def get_by_file_path(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        file_path: str,
+    ) -> ImageUploads | None:
+        """Fetch a user's upload by its stored file URL."""
+        return await get_one(db, ImageUploads, user_id=user_id, file_path=file_path)
+
+    async def get_owned(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        upload_id: int,
+    ) -> ImageUploads | None:
+        """Fetch an upload by id, only if it belongs to ``user_id``."""
+        return await get_one(db, ImageUploads, id=upload_id, user_id=user_id)
+
+    async def delete(self, db: AsyncSession, row: ImageUploads) -> None:
+        """Delete an upload row and commit."""
+        await self._changed(db, [row.user_id])
+        await delete_record(db, row)
+
+    async def claim_pending(
+        self,
+        db: AsyncSession,
+        *,
+        limit: int,
+        lease_seconds: int,
+        max_attempts: int,
+    ) -> list[ImageUploads]:
+        """
+        Claim up to ``limit`` uploads for processing and mark them PROCESSING.
+
+        Picks UPLOADED rows, plus PROCESSING rows whose claim is older than
+        ``lease_seconds`` (the worker holding them is presumed dead), once
+        any retry delay set by :meth:`finish_processing` has passed.  Rows
+        locked by another worker's concurrent claim are skipped rather than
+        waited on, so any number of workers can poll without double work.
+        Each claim bumps ``attempts``, which callers pass back to
+        :meth:`finish_processing` as a fencing token.
+
+        A due row that has already been claimed ``max_attempts`` times is
+        marked FAILED instead, so an upload whose worker keeps dying is not
+        retried forever.  Does not commit.
+        """
+        now = datetime.now(timezone.utc)
+        due = and_(
+            or_(
+                ImageUploads.status == ProcessingStatus.UPLOADED,
+                and_(
+                    ImageUploads.status == ProcessingStatus.PROCESSING,
+                    ImageUploads.claimed_at < now - timedelta(seconds=lease_seconds),
+                ),
+            ),
+            or_(ImageUploads.next_attempt_at.is_(None), ImageUploads.next_attempt_at <= now),
+        )
+
+        exhausted = (
+            select(ImageUploads.id)
+            .where(due, ImageUploads.attempts >= max_attempts)
+            .with_for_update(skip_locked=True)
+        )
+        failed = (
+            await db.execute(
+                update(ImageUploads)
+                .where(ImageUploads.id.in_(exhausted.scalar_subquery()))
+                .values(
+                    status=ProcessingStatus.FAILED,
+                    claimed_at=None,
+                    next_attempt_at=None,
+                    updated_at=now,
+                )
+                .returning(ImageUploads.user_id, ImageUploads.id)
+                .execution_options(synchronize_session=False)
+            )
+        ).all()
+
+        claimable = (
+            select(ImageUploads.id)
+            .where(due, ImageUploads.attempts < max_attempts)
+            .order_by(ImageUploads.id)
+            .limit(limit)
+            .with_for_update(skip_locked=True)
+        )
+        stmt = (
+            update(ImageUploads)
+            .where(ImageUploads.id.in_(claimable.scalar_subquery()))
+            .values(
+                status=ProcessingStatus.PROCESSING,
+                claimed_at=now,
+                next_attempt_at=None,
+                updated_at=now,
+                attempts=ImageUploads.attempts + 1,
+            )
+            .returning(ImageUploads)
+            .execution_options(synchronize_session=False)
+        )
+        result = await db.execute(stmt)
+        rows = list(result.scalars().all())
+
+        changes = [(user_id, upload_id, ProcessingStatus.FAILED, now) for user_id, upload_id in failed]
+        changes += [(row.user_id, row.id, row.status, now) for row in rows]
+        await self._changed(db, {user_id for user_id, *_ in changes})
+        await self._status_changed(db, changes)
+        return rows
+
+    async def finish_processing(
+        self,
+        db: AsyncSession,
+        *,
+        upload_id: int,
+        attempts: int,
+        status: int,
+        next_attempt_at: datetime | None = None,
+    ) -> bool:
+        """
+        Move a claimed upload out of PROCESSING.
+
+        Only applies if the row is still held by the claim identified by
+        ``attempts``; returns ``False`` if the lease expired and another
+        worker re-claimed it.  An upload put back to UPLOADED is not claimed
+        again before ``next_attempt_at``.  Does not commit.
+        """
+        now = datetime.now(timezone.utc)
+        stmt = (
+            update(ImageUploads)
+            .where(
+                ImageUploads.id == upload_id,
+                ImageUploads.status == ProcessingStatus.PROCESSING,
+                ImageUploads.attempts == attempts,
+            )
+            .values(status=status, claimed_at=None, next_attempt_at=next_attempt_at, updated_at=now)
+            .returning(ImageUploads.user_id)
+            .execution_options(synchronize_session=False)
+        )
+        user_id = (await db.execute(stmt)).scalar_one_or_none()
+        if user_id is None:
+            return False
+        await self._changed(db, [user_id])
+        await self._status_changed(db, [(user_id, upload_id, status, now)])
+        return True
@@ -12,7 +12,7 @@ class AuthSessions(Base):
 
     id: Mapped[uuid.UUID] = mapped_column(UUID(as_uuid=True), primary_key=True, default=uuid.uuid4)
     user_id: Mapped[int] = mapped_column(BigInteger, index=True)
-    refresh_hash: Mapped[bytes] = mapped_column(BYTEA, nullable=False)
+    refresh_hash: Mapped[bytes] = mapped_column(BYTEA, nullable=False, unique=True)
     created_at: Mapped[datetime] = mapped_column(
         TIMESTAMP(timezone=True),
         nullable=False,
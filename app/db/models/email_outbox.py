@@ -0,0 +1,25 @@
+from sqlalchemy.orm import Mapped, mapped_column, declarative_base
+from sqlalchemy import BigInteger, SmallInteger, String, Text, TIMESTAMP
+from datetime import datetime
+from typing import Optional
+
+Base = declarative_base()
+
+
+class EmailOutbox(Base):
+    __tablename__ = "email_outbox"
+
+    id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    recipient: Mapped[str] = mapped_column(String(500))
+    subject: Mapped[str] = mapped_column(Text)
+    body: Mapped[str] = mapped_column(Text)
+    # MIME text subtype of ``body``: ``html`` or ``plain``.
+    subtype: Mapped[str] = mapped_column(String(10), default="html")
+    status: Mapped[int] = mapped_column(SmallInteger, default=0)
+    # Delivery bookkeeping: claims so far, and when the message is next due
+    # (also the lease deadline while a sender holds it).
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0)
+    next_attempt_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+    last_error: Mapped[Optional[str]] = mapped_column(Text, nullable=True)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
+    sent_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
@@ -0,0 +1,18 @@
+from datetime import datetime
+from typing import Optional
+from sqlalchemy.orm import Mapped, mapped_column, declarative_base
+from sqlalchemy import BigInteger, Integer, String, TIMESTAMP
+from sqlalchemy.dialects.postgresql import BYTEA
+
+Base = declarative_base()
+
+class ImageBlobs(Base):
+    """One stored object per (user, content hash), shared by that user's uploads."""
+    __tablename__ = "image_blobs"
+
+    user_id: Mapped[int] = mapped_column(BigInteger, primary_key=True)
+    content_hash: Mapped[bytes] = mapped_column(BYTEA, primary_key=True)
+    file_path: Mapped[str] = mapped_column(String(255))
+    normalized_path: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
+    ref_count: Mapped[int] = mapped_column(Integer)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
@@ -0,0 +1,16 @@
+from datetime import datetime
+from sqlalchemy.orm import Mapped, mapped_column, declarative_base
+from sqlalchemy import Integer, Text, TIMESTAMP
+from sqlalchemy.dialects.postgresql import JSONB
+
+Base = declarative_base()
+
+
+class ImageOcrResults(Base):
+    __tablename__ = "image_ocr_results"
+
+    upload_id: Mapped[int] = mapped_column(Integer, primary_key=True)
+    text: Mapped[str] = mapped_column(Text)
+    # Recognised lines in reading order.
+    lines: Mapped[list[str]] = mapped_column(JSONB)
+    created_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
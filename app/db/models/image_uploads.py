@@ -1,18 +1,42 @@
 from sqlalchemy.orm import Mapped, mapped_column, declarative_base
-from sqlalchemy import BigInteger, SmallInteger, TIMESTAMP, String
+from sqlalchemy import BigInteger, Index, SmallInteger, TIMESTAMP, String, text
+from sqlalchemy.dialects.postgresql import BYTEA
 from datetime import datetime
+from typing import Optional
 
 Base = declarative_base()
 
 class ImageUploads(Base):
     __tablename__ = "image_upload"
+    __table_args__ = (
+        # One row per directly uploaded object.  Deduplicated uploads (with a
+        # content hash) share their blob's ``file_path`` by design.
+        Index(
+            "image_upload_user_id_file_path_key",
+            "user_id",
+            "file_path",
+            unique=True,
+            postgresql_where=text("content_hash IS NULL"),
+        ),
+    )
 
     id: Mapped[int] = mapped_column(primary_key=True)
     user_id: Mapped[int] = mapped_column(BigInteger)
     file_path: Mapped[str] = mapped_column(String(255))
+    # Downsized, metadata-free re-encode of ``file_path``, when one was made.
+    normalized_path: Mapped[Optional[str]] = mapped_column(String(255), nullable=True)
     upload_timestamp: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
     chapter: Mapped[int] = mapped_column(SmallInteger)
     line_start: Mapped[int] = mapped_column(SmallInteger)
     line_end: Mapped[int] = mapped_column(SmallInteger)
     status: Mapped[int] = mapped_column(SmallInteger)
     script_id: Mapped[int] = mapped_column(SmallInteger)
+    # SHA-256 of the uploaded bytes; NULL for uploads that bypassed the API.
+    content_hash: Mapped[Optional[bytes]] = mapped_column(BYTEA, nullable=True)
+    # OCR bookkeeping: claims so far, when the current claim was taken, and
+    # the earliest a failed attempt may be retried (NULL: no retry pending).
+    attempts: Mapped[int] = mapped_column(SmallInteger, default=0)
+    claimed_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    next_attempt_at: Mapped[Optional[datetime]] = mapped_column(TIMESTAMP(timezone=True), nullable=True)
+    # Last status change (or creation); the cursor of the status event stream.
+    updated_at: Mapped[datetime] = mapped_column(TIMESTAMP(timezone=True))
@@ -1,37 +1,284 @@
 from sqlalchemy.ext.asyncio import AsyncSession
-from typing import TypeVar, Any, Optional, Type, Sequence
-from sqlalchemy import exc, select
+from typing import TypeVar, Any, Mapping, Optional, Type, Sequence
+from sqlalchemy import ColumnElement, Table, column, exc, select, update, values as values_
+from sqlalchemy.dialects.postgresql import insert
 from sqlalchemy.orm import InstrumentedAttribute
+from app.configs.settings import settings
 from app.core.logger import logger
+from app.core.metrics import timed
 
 T = TypeVar("T", bound=object)
 
+# asyncpg refuses statements with more than 32767 bind parameters.
+MAX_BIND_PARAMS = 32767
 
-async def insert_record(
+
+def _insert_stage(table: Table) -> str:
+    """``app_stage_duration_seconds`` label for inserts (with their commit) into ``table``."""
+    return f"db_insert:{table.name}"
+
+
+async def insert_returning(
     session: AsyncSession,
-    model_instance: T,
+    model: Type[T],
+    values: Mapping[str, Any],
+    *,
+    commit: bool = True,
 ) -> T:
+    """
+    ``INSERT ... RETURNING`` the new row as a model instance, in one round
+    trip.  Python-side column defaults apply as for an ORM insert.
+    """
     try:
-        session.add(model_instance)
-        await session.commit()
-        await session.refresh(model_instance)
-        return model_instance
-    except exc.SQLAlchemyError as e:
+        with timed(_insert_stage(model.__table__)):
+            result = await session.execute(insert(model).values(**values).returning(model))
+            row = result.scalars().one()
+            if commit:
+                await session.commit()
+        return row
+    except exc.SQLAlchemyError:
         await session.rollback()
         logger.exception("Failed to insert record")
         raise
 
-async def upsert_record(session: AsyncSession, instance: T) -> T:
+
+async def update_returning(
+    session: AsyncSession,
+    model: Type[T],
+    where: Sequence[ColumnElement[bool]],
+    values: Mapping[str, Any],
+    *,
+    commit: bool = True,
+) -> Optional[T]:
+    """
+    ``UPDATE ... WHERE ... RETURNING`` without loading the row first.
+    Returns the updated row, or ``None`` if nothing matched (for several
+    matches, the first).  ``values`` may hold SQL expressions such as
+    ``func.now()`` or ``Model.counter + 1``.
+    """
+    stmt = (
+        update(model)
+        .where(*where)
+        .values(**values)
+        .returning(model)
+        .execution_options(synchronize_session=False)
+    )
     try:
-        merged = await session.merge(instance)
-        await session.commit()
-        return merged
-    except Exception:
+        result = await session.execute(stmt)
+        row = result.scalars().first()
+        if commit:
+            await session.commit()
+        return row
+    except exc.SQLAlchemyError:
+        await session.rollback()
+        logger.exception("Failed to update record")
+        raise
+
+
+async def insert_on_conflict(
+    session: AsyncSession,
+    model: Type[T],
+    values: Mapping[str, Any],
+    *,
+    index_elements: Sequence[Any],
+    index_where: Any = None,
+    set_: Sequence[str] | Mapping[str, Any] | None = None,
+    commit: bool = True,
+) -> Optional[T]:
+    """
+    ``INSERT ... ON CONFLICT (index_elements) DO UPDATE ... RETURNING``.
+
+    ``set_`` names the columns to overwrite from the proposed row, or maps
+    column names to SQL expressions (e.g. ``{"hits": Model.hits + 1}``).
+    Without it the statement is ``DO NOTHING`` and ``None`` is returned
+    when the row already existed.  ``index_where`` is the predicate of a
+    partial unique index.
+    """
+    stmt = insert(model).values(**values)
+    if set_ is None:
+        stmt = stmt.on_conflict_do_nothing(index_elements=index_elements, index_where=index_where)
+    else:
+        if not isinstance(set_, Mapping):
+            set_ = {name: stmt.excluded[name] for name in set_}
+        stmt = stmt.on_conflict_do_update(
+            index_elements=index_elements, index_where=index_where, set_=set_
+        )
+    try:
+        with timed(_insert_stage(model.__table__)):
+            result = await session.execute(stmt.returning(model))
+            row = result.scalars().first()
+            if commit:
+                await session.commit()
+        return row
+    except exc.SQLAlchemyError:
         await session.rollback()
         logger.exception("Failed to upsert record")
         raise
 
 
+def _bulk_columns(table: Table, rows: Sequence[Mapping[str, Any]]) -> list[str]:
+    names = list(rows[0])
+    for row in rows:
+        if row.keys() != rows[0].keys():
+            raise ValueError("bulk rows must all have the same keys")
+    unknown = [name for name in names if name not in table.c]
+    if unknown:
+        raise ValueError(f"unknown columns for {table.name}: {unknown}")
+    return names
+
+
+def _with_python_defaults(table: Table, rows: Sequence[Mapping[str, Any]]) -> list[dict[str, Any]]:
+    """
+    Fill in the Python-side column defaults (``default=uuid.uuid4`` and the
+    like) that SQLAlchemy would apply on INSERT but COPY knows nothing about.
+    """
+    missing = [c for c in table.c if c.name not in rows[0] and c.default is not None]
+    out = []
+    for row in rows:
+        row = dict(row)
+        for col in missing:
+            if col.default.is_callable:
+                row[col.name] = col.default.arg(None)
+            elif col.default.is_scalar:
+                row[col.name] = col.default.arg
+        out.append(row)
+    return out
+
+
+async def bulk_insert(
+    session: AsyncSession,
+    model: Type[T],
+    rows: Sequence[Mapping[str, Any]],
+    *,
+    copy_threshold: int = settings.postgres_copy_threshold,
+    commit: bool = True,
+) -> int:
+    """
+    Insert many rows given as column dicts; returns how many were inserted.
+
+    Batches of ``copy_threshold`` rows or more are streamed with asyncpg's
+    binary ``COPY`` on the session's own connection (and transaction);
+    smaller ones go through SQLAlchemy's batched multi-row ``INSERT``.
+    Neither path builds ORM instances.  Use :func:`bulk_insert_returning`
+    when the generated keys are needed.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    _bulk_columns(table, rows)
+    try:
+        with timed(_insert_stage(table)):
+            if len(rows) >= copy_threshold:
+                rows = _with_python_defaults(table, rows)
+                names = list(rows[0])
+                conn = await session.connection()
+                raw = await conn.get_raw_connection()
+                await raw.driver_connection.copy_records_to_table(
+                    table.name,
+                    schema_name=table.schema,
+                    columns=names,
+                    records=[tuple(row[name] for name in names) for row in rows],
+                )
+            else:
+                await session.execute(insert(table), list(rows))
+            if commit:
+                await session.commit()
+        return len(rows)
+    except Exception:
+        await session.rollback()
+        logger.exception("Failed to bulk insert into %s", table.name)
+        raise
+
+
+async def bulk_insert_returning(
+    session: AsyncSession,
+    model: Type[T],
+    rows: Sequence[Mapping[str, Any]],
+    *,
+    commit: bool = True,
+) -> list[Any]:
+    """
+    Multi-row ``INSERT ... RETURNING`` of the primary key; returns the keys
+    in the order of ``rows`` (scalars for single-column keys, tuples
+    otherwise).  COPY cannot return anything, so this never uses it.
+    """
+    if not rows:
+        return []
+    table = model.__table__
+    _bulk_columns(table, rows)
+    pk = list(table.primary_key.columns)
+    stmt = insert(table).returning(*pk, sort_by_parameter_order=True)
+    try:
+        with timed(_insert_stage(table)):
+            result = await session.execute(stmt, list(rows))
+            keys = list(result.scalars()) if len(pk) == 1 else [tuple(r) for r in result]
+            if commit:
+                await session.commit()
+        return keys
+    except exc.SQLAlchemyError:
+        await session.rollback()
+        logger.exception("Failed to bulk insert into %s", table.name)
+        raise
+
+
+async def bulk_update(
+    session: AsyncSession,
+    model: Type[T],
+    rows: Sequence[Mapping[str, Any]],
+    *,
+    commit: bool = True,
+) -> int:
+    """
+    Update many rows keyed by primary key; returns how many matched.
+
+    Each dict holds the primary key columns plus the columns to set, the
+    same keys in every dict.  Rows are sent as ``UPDATE ... FROM (VALUES
+    ...)`` statements, as many rows per statement as the bind parameter
+    limit allows, instead of one UPDATE per row.
+    """
+    if not rows:
+        return 0
+    table = model.__table__
+    names = _bulk_columns(table, rows)
+    pk = [c.name for c in table.primary_key.columns]
+    if not set(pk) <= set(names):
+        raise ValueError(f"bulk_update rows need the primary key {pk}")
+    assigned = [name for name in names if name not in pk]
+    if not assigned:
+        return 0
+    chunk = MAX_BIND_PARAMS // len(names)
+    matched = 0
+    try:
+        for start in range(0, len(rows), chunk):
+            batch = values_(
+                *[column(name, table.c[name].type) for name in names], name="batch"
+            ).data([tuple(row[name] for name in names) for row in rows[start:start + chunk]])
+            stmt = (
+                update(table)
+                .where(*[table.c[name] == batch.c[name] for name in pk])
+                .values({name: batch.c[name] for name in assigned})
+            )
+            result = await session.execute(stmt)
+            matched += result.rowcount
+        if commit:
+            await session.commit()
+        return matched
+    except exc.SQLAlchemyError:
+        await session.rollback()
+        logger.exception("Failed to bulk update %s", table.name)
+        raise
+
+
+async def delete_record(session: AsyncSession, instance: T) -> None:
+    try:
+        await session.delete(instance)
+        await session.commit()
+    except exc.SQLAlchemyError:
+        await session.rollback()
+        logger.exception("Failed to delete record")
+        raise
+
+
 async def get_by_id(
     session: AsyncSession,
     model_instance: T,
@@ -1,30 +1,115 @@
+import asyncio
+import time
 from app.configs.settings import settings
 from contextlib import asynccontextmanager
-from typing import AsyncIterator
+from typing import AsyncIterator, Optional
+from sqlalchemy import case, func, select
 from sqlalchemy.ext.asyncio import (
     AsyncConnection,
+    AsyncEngine,
     AsyncSession,
     async_sessionmaker,
     create_async_engine,
 )
 from app.core.logger import logger
+from app.core.ttl_cache import TTLCache
+from app.db.pg_pool import InstrumentedPool
+
+# Seconds the replica is behind the primary; 0 when it has replayed
+# everything it received, NULL when the server is not a replica.
+REPLICA_LAG = select(
+    case(
+        (func.pg_last_wal_receive_lsn() == func.pg_last_wal_replay_lsn(), 0.0),
+        else_=func.extract("epoch", func.now() - func.pg_last_xact_replay_timestamp()),
+    )
+)
+
+
+def _create_engine(host: str, port: int) -> AsyncEngine:
+    conn_str = (f"postgresql+asyncpg://{settings.postgres_user}:{settings.postgres_password}@{host}:"
+                f"{port}/{settings.postgres_dbname}")
+    return create_async_engine(
+        conn_str,
+        poolclass=InstrumentedPool,
+        pool_size=settings.postgres_pool_size,
+        max_overflow=settings.postgres_max_overflow,
+        pool_timeout=settings.postgres_pool_timeout,
+        pool_recycle=settings.postgres_pool_recycle,
+        pool_pre_ping=settings.postgres_pool_pre_ping,
+        connect_args={
+            "timeout": settings.postgres_timeout,
+            "statement_cache_size": settings.postgres_statement_cache_size,
+        },
+    )
 
 
 class PgEngine:
-    def __init__(self):
-        conn_str = (f"postgresql+asyncpg://{settings.postgres_user}:{settings.postgres_password}@{settings.postgres_host}:"
-                    f"{settings.postgres_port}/{settings.postgres_dbname}")
-        self._engine = create_async_engine(conn_str)
+    def __init__(
+        self,
+        replica_host: Optional[str] = settings.postgres_replica_host,
+        replica_port: Optional[int] = settings.postgres_replica_port,
+        max_lag: float = settings.postgres_replica_max_lag_seconds,
+        lag_check_interval: float = settings.postgres_replica_lag_check_seconds,
+        read_your_writes: float = settings.postgres_read_your_writes_seconds,
+    ):
+        self._engine = _create_engine(settings.postgres_host, settings.postgres_port)
         self._sessionmaker = async_sessionmaker(bind=self._engine, expire_on_commit=False)
+        # Same pool; transactions open with ``BEGIN READ ONLY``.
+        self._read_sessionmaker = async_sessionmaker(
+            bind=self._engine.execution_options(postgresql_readonly=True), expire_on_commit=False
+        )
+
+        self._replica_engine: Optional[AsyncEngine] = None
+        self._replica_read_engine: Optional[AsyncEngine] = None
+        self._replica_sessionmaker: Optional[async_sessionmaker] = None
+        if replica_host:
+            self._replica_engine = _create_engine(replica_host, replica_port or settings.postgres_port)
+            self._replica_read_engine = self._replica_engine.execution_options(postgresql_readonly=True)
+            self._replica_sessionmaker = async_sessionmaker(
+                bind=self._replica_read_engine, expire_on_commit=False
+            )
+        self.max_lag = max_lag
+        self.lag_check_interval = lag_check_interval
+        self.replica_lag: Optional[float] = None
+        self._lag_checked_at = float("-inf")
+        self._lag_lock = asyncio.Lock()
+        # Users who wrote recently read from the primary until this expires.
+        # Per process: another worker may still serve them from the replica,
+        # but never one more than ``max_lag`` behind.
+        self._recent_writers: TTLCache[int, bool] = TTLCache(maxsize=100_000, ttl=read_your_writes)
+
+
+    def pools(self) -> dict[str, InstrumentedPool]:
+        """The live connection pools by role, ``primary`` and ``replica``."""
+        pools = {}
+        if self._engine is not None:
+            pools["primary"] = self._engine.pool
+        if self._replica_engine is not None:
+            pools["replica"] = self._replica_engine.pool
+        return pools
 
+    def pool_stats(self) -> dict:
+        """Occupancy and checkout wait times of the connection pool(s)."""
+        if self._engine is None:
+            raise Exception("Postgres Engine is not initialized")
+        stats = self._engine.pool.stats()
+        if self._replica_engine is not None:
+            stats["replica"] = {**self._replica_engine.pool.stats(), "lag_seconds": self.replica_lag}
+        return stats
 
     async def close(self):
         if self._engine is None:
             raise Exception("Postgres Engine is not initialized")
         await self._engine.dispose()
+        if self._replica_engine is not None:
+            await self._replica_engine.dispose()
 
         self._engine = None
         self._sessionmaker = None
+        self._read_sessionmaker = None
+        self._replica_engine = None
+        self._replica_read_engine = None
+        self._replica_sessionmaker = None
 
     @asynccontextmanager
     async def connect(self) -> AsyncIterator[AsyncConnection]:
@@ -39,6 +124,18 @@ class PgEngine:
                 logger.exception("Database connection context failed")
                 raise
 
+    @asynccontextmanager
+    async def connection(self) -> AsyncIterator[AsyncConnection]:
+        """
+        A pooled connection with no transaction opened for the caller, for
+        session-level state (advisory locks) that must outlive commits.
+        """
+        if self._engine is None:
+            raise Exception("DatabaseSessionManager is not initialized")
+
+        async with self._engine.connect() as connection:
+            yield connection
+
     @asynccontextmanager
     async def session(self) -> AsyncIterator[AsyncSession]:
         async with self._sessionmaker() as session:
@@ -52,6 +149,62 @@ class PgEngine:
             finally:
                 await session.close()
 
+    def mark_written(self, user_id: int) -> None:
+        """Route ``user_id``'s reads to the primary for a while."""
+        if self._replica_engine is not None:
+            self._recent_writers.set(user_id, True)
+
+    def wrote_recently(self, user_id: int) -> bool:
+        return self._recent_writers.get(user_id) is not None
+
+    def is_replica(self, session: AsyncSession) -> bool:
+        return self._replica_read_engine is not None and session.bind is self._replica_read_engine
+
+    async def _measure_lag(self) -> Optional[float]:
+        async with self._replica_engine.connect() as conn:
+            lag = (await conn.execute(REPLICA_LAG)).scalar()
+        return None if lag is None else float(lag)
+
+    async def _replica_usable(self) -> bool:
+        if time.monotonic() - self._lag_checked_at >= self.lag_check_interval:
+            async with self._lag_lock:
+                # One request re-measures; the others wait and reuse it.
+                if time.monotonic() - self._lag_checked_at >= self.lag_check_interval:
+                    try:
+                        self.replica_lag = await asyncio.wait_for(
+                            self._measure_lag(), timeout=settings.postgres_timeout
+                        )
+                    except Exception as e:
+                        logger.warning("Replica lag check failed (%s); reading from primary", e)
+                        self.replica_lag = None
+                    self._lag_checked_at = time.monotonic()
+        return self.replica_lag is not None and self.replica_lag <= self.max_lag
+
+    @asynccontextmanager
+    async def read_session(
+        self, user_id: Optional[int] = None, *, primary: bool = False
+    ) -> AsyncIterator[AsyncSession]:
+        """
+        A read-only session: its transaction opens with ``BEGIN READ ONLY``
+        and is rolled back on exit instead of committed.
+
+        Served from the replica when one is configured, caught up, and
+        ``user_id`` has not written recently; otherwise (or with
+        ``primary=True``) from the primary.
+        """
+        use_replica = (
+            not primary
+            and self._replica_sessionmaker is not None
+            and (user_id is None or not self.wrote_recently(user_id))
+            and await self._replica_usable()
+        )
+        maker = self._replica_sessionmaker if use_replica else self._read_sessionmaker
+        async with maker() as session:
+            try:
+                yield session
+            finally:
+                await session.close()
+
 
 sessionmanager = PgEngine()
 
@@ -64,3 +217,11 @@ async def get_db_session():
         logger.exception(f"Unable to create database session")
         raise
 
+
+async def get_read_db_session():
+    """
+    Read-only session; FastAPI caches it per request, so the auth check and
+    the route share one session (and one transaction).
+    """
+    async with sessionmanager.read_session() as session:
+        yield session
@@ -0,0 +1,24 @@
+from contextlib import asynccontextmanager
+from typing import AsyncIterator
+
+from sqlalchemy import func, select
+from sqlalchemy.ext.asyncio import AsyncConnection
+
+
+@asynccontextmanager
+async def try_advisory_lock(conn: AsyncConnection, key: int) -> AsyncIterator[bool]:
+    """
+    Try to take the session-level advisory lock ``key`` on ``conn``.
+
+    Yields whether the lock was acquired, without waiting for it; the lock
+    is released on exit.  The probe is committed straight away so the
+    connection does not sit idle in a transaction while the lock is held.
+    """
+    acquired = (await conn.execute(select(func.pg_try_advisory_lock(key)))).scalar()
+    await conn.commit()
+    try:
+        yield bool(acquired)
+    finally:
+        if acquired:
+            await conn.execute(select(func.pg_advisory_unlock(key)))
+            await conn.commit()
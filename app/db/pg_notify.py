@@ -0,0 +1,130 @@
+import asyncio
+from typing import Awaitable, Callable, Iterable, Optional
+
+import asyncpg
+from sqlalchemy import Text, column, func, select, values
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.configs.settings import settings
+from app.core.logger import logger
+
+
+async def notify(db: AsyncSession, channel: str, payload: str) -> None:
+    """
+    Queue a Postgres notification on ``db``'s transaction.
+
+    Like ``NOTIFY`` it is only delivered when the transaction commits, so
+    listeners never hear about changes that were rolled back.
+    """
+    await db.execute(select(func.pg_notify(channel, payload)))
+
+
+async def notify_many(db: AsyncSession, channel: str, payloads: Iterable[str]) -> None:
+    """:func:`notify` once per distinct payload, in a single statement."""
+    distinct = sorted(set(payloads))
+    if not distinct:
+        return
+    batch = values(column("payload", Text), name="batch").data([(p,) for p in distinct])
+    await db.execute(select(func.pg_notify(channel, batch.c.payload)).select_from(batch))
+
+
+def default_dsn() -> str:
+    return (
+        f"postgresql://{settings.postgres_user}:{settings.postgres_password}"
+        f"@{settings.postgres_host}:{settings.postgres_port}/{settings.postgres_dbname}"
+    )
+
+
+class PgNotifyListener:
+    """
+    Keeps one dedicated connection ``LISTEN``-ing on ``channel`` and calls
+    ``on_message(payload)`` for every notification.
+
+    The connection is outside the SQLAlchemy pool (a listening connection
+    must stay checked out forever) and is re-established with backoff when
+    lost.  Notifications sent while disconnected are gone, so
+    ``on_reconnect`` runs after every (re)connect to let callers drop state
+    that may have gone stale meanwhile.
+    """
+
+    def __init__(
+        self,
+        channel: str,
+        on_message: Callable[[str], None],
+        *,
+        on_reconnect: Optional[Callable[[], None]] = None,
+        dsn: Optional[str] = None,
+        connect: Callable[[str], Awaitable[asyncpg.Connection]] = asyncpg.connect,
+        retry_delay: float = 1.0,
+        max_retry_delay: float = 30.0,
+        health_check_interval: float = 30.0,
+    ):
+        self.channel = channel
+        self.on_message = on_message
+        self.on_reconnect = on_reconnect
+        self.dsn = dsn
+        self._connect = connect
+        self.retry_delay = retry_delay
+        self.max_retry_delay = max_retry_delay
+        self.health_check_interval = health_check_interval
+        self._task: Optional[asyncio.Task] = None
+        self.connected = asyncio.Event()
+
+    async def start(self) -> None:
+        """Start listening in the background; never blocks on the database."""
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        delay = self.retry_delay
+        while True:
+            try:
+                conn = await self._connect(self.dsn or default_dsn())
+            except Exception as e:
+                logger.warning("LISTEN %s: connect failed (%s); retrying in %.0fs", self.channel, e, delay)
+                await asyncio.sleep(delay)
+                delay = min(delay * 2, self.max_retry_delay)
+                continue
+            delay = self.retry_delay
+            try:
+                await self._listen(conn)
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("LISTEN %s: connection lost", self.channel)
+            finally:
+                self.connected.clear()
+                try:
+                    await conn.close(timeout=5)
+                except Exception:
+                    conn.terminate()
+
+    async def _listen(self, conn: asyncpg.Connection) -> None:
+        lost = asyncio.Event()
+        conn.add_termination_listener(lambda _conn: lost.set())
+        await conn.add_listener(self.channel, self._dispatch)
+        if self.on_reconnect is not None:
+            self.on_reconnect()
+        self.connected.set()
+        while not lost.is_set():
+            try:
+                await asyncio.wait_for(lost.wait(), timeout=self.health_check_interval)
+            except TimeoutError:
+                # A half-open TCP connection would otherwise look healthy
+                # while silently dropping notifications.
+                await conn.execute("SELECT 1", timeout=self.health_check_interval)
+
+    def _dispatch(self, _conn, _pid: int, _channel: str, payload: str) -> None:
+        try:
+            self.on_message(payload)
+        except Exception:
+            logger.exception("LISTEN %s: handler failed for %r", self.channel, payload)
@@ -0,0 +1,49 @@
+import time
+from typing import Optional
+
+from sqlalchemy import exc
+from sqlalchemy.pool import AsyncAdaptedQueuePool, PoolProxiedConnection
+
+from app.core.metrics import Histogram
+
+
+class InstrumentedPool(AsyncAdaptedQueuePool):
+    """
+    ``AsyncAdaptedQueuePool`` that records how long each checkout took
+    (queueing for a free slot, plus connecting or pre-pinging) and how many
+    gave up after ``pool_timeout``.
+    """
+
+    def __init__(self, *args, wait_histogram: Optional[Histogram] = None, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.wait_histogram = wait_histogram or Histogram()
+        self.timeouts = 0
+
+    def connect(self) -> PoolProxiedConnection:
+        started = time.perf_counter()
+        try:
+            return super().connect()
+        except exc.TimeoutError:
+            self.timeouts += 1
+            raise
+        finally:
+            self.wait_histogram.observe(time.perf_counter() - started)
+
+    def recreate(self) -> "InstrumentedPool":
+        # Keep the history across engine.dispose().
+        pool = super().recreate()
+        pool.wait_histogram = self.wait_histogram
+        pool.timeouts = self.timeouts
+        return pool
+
+    def stats(self) -> dict:
+        return {
+            "size": self.size(),
+            "checked_in": self.checkedin(),
+            "checked_out": self.checkedout(),
+            "overflow": max(self.overflow(), 0),
+            "max_overflow": self._max_overflow,
+            "timeout": self.timeout(),
+            "timeouts": self.timeouts,
+            "wait_seconds": self.wait_histogram.snapshot(),
+        }
@@ -1,12 +1,54 @@
+from contextlib import asynccontextmanager
+
 from fastapi import FastAPI
+from app.api import metrics
 from app.api.v1.routes import router
 from app.configs.settings import settings
+from app.core.http_metrics import MetricsMiddleware
+from app.core.jwt_helper import password_executor
+from app.services.auth.session_cache import revocation_listener
+from app.services.auth.session_purge import session_purger
+from app.services.email.outbox import outbox_sender
+from app.services.image_uploads.listing_cache import uploads_listener
+from app.services.image_uploads.status_events import upload_status_hub, upload_status_listener
+from app.services.image_uploads.uploads import image_processor
+from app.services.storage.backends import close_storage
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    if settings.auth_session_cache_enabled:
+        await revocation_listener.start()
+    if settings.uploads_listing_cache_enabled:
+        await uploads_listener.start()
+    if settings.uploads_events_enabled:
+        await upload_status_listener.start()
+    if settings.auth_session_purge_enabled:
+        await session_purger.start()
+    if settings.email_outbox_enabled:
+        await outbox_sender.start()
+    yield
+    await outbox_sender.stop()
+    await session_purger.stop()
+    upload_status_hub.close()
+    await upload_status_listener.stop()
+    await uploads_listener.stop()
+    await revocation_listener.stop()
+    password_executor.shutdown()
+    if image_processor is not None:
+        image_processor.shutdown()
+    await close_storage()
+
 
 app = FastAPI(
     title="Image Uploads Backend",
     description="API for image uploads",
     version="0.0.1",
-    debug=settings.debug
+    debug=settings.debug,
+    lifespan=lifespan,
 )
 
 app.include_router(router, prefix="/api")
+if settings.metrics_enabled:
+    app.add_middleware(MetricsMiddleware)
+    app.include_router(metrics.router)
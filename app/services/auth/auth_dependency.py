@@ -5,16 +5,14 @@ import uuid
 from typing import Any
 
 from app.core.jwt_helper import jwt_helper
-from app.db.pg_engine import get_db_session
+from app.db.pg_engine import get_db_session, get_read_db_session, sessionmanager
 from app.db.crud.auth_sessions import AuthSessionCRUD
+from app.services.auth.session_cache import session_cache
 
 bearer_scheme = HTTPBearer()
 
-async def auth_dependency(
-    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
-    db=Depends(get_db_session),
-) -> dict[str, Any]:
-    """Validate access token and return user and session identifiers."""
+
+def _decode_access_token(credentials: HTTPAuthorizationCredentials) -> tuple[int, uuid.UUID]:
     token = credentials.credentials
     try:
         payload = jwt.decode(
@@ -22,12 +20,80 @@ async def auth_dependency(
         )
         sub_raw = payload.get("sub") or ""
         user_id_str, session_id_str = sub_raw.split(":", 1)
-        user_id = int(user_id_str)
-        session_id = uuid.UUID(session_id_str)
+        return int(user_id_str), uuid.UUID(session_id_str)
     except (JWTError, ValueError, AttributeError):
         raise HTTPException(status_code=401, detail="Invalid token")
 
-    session = await AuthSessionCRUD().get_active_by_id(db, session_id=session_id)
+
+def _remember(session, session_id: uuid.UUID) -> None:
     if session is None:
         raise HTTPException(status_code=401, detail="Invalid token")
+    session_cache.add(session_id, session.expires_at)
+
+
+async def auth_dependency(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    db=Depends(get_db_session),
+) -> dict[str, Any]:
+    """
+    Validate access token and return user and session identifiers.
+
+    A cache miss is checked on the route's own primary session, so a write
+    route holds a single connection for the whole request.
+    """
+    user_id, session_id = _decode_access_token(credentials)
+    # Hot sessions are validated from memory; the database is only asked
+    # about sessions this worker has not seen recently.
+    if not session_cache.is_active(session_id):
+        session = await AuthSessionCRUD().get_active_by_id(db, session_id=session_id)
+        _remember(session, session_id)
+    return {"user_id": user_id, "session_id": session_id}
+
+
+async def read_auth_dependency(
+    credentials: HTTPAuthorizationCredentials = Depends(bearer_scheme),
+    read_db=Depends(get_read_db_session),
+) -> dict[str, Any]:
+    """Like ``auth_dependency``, for read routes: checks on the route's read-only session."""
+    user_id, session_id = _decode_access_token(credentials)
+    if not session_cache.is_active(session_id):
+        crud = AuthSessionCRUD()
+        session = await crud.get_active_by_id(read_db, session_id=session_id)
+        if session is None and sessionmanager.is_replica(read_db):
+            # Not replicated yet (a login moments ago), or really revoked.
+            # Ask the primary on a session of its own, closed straight away.
+            async with sessionmanager.read_session(primary=True) as primary:
+                session = await crud.get_active_by_id(primary, session_id=session_id)
+        _remember(session, session_id)
     return {"user_id": user_id, "session_id": session_id}
+
+
+async def get_user_db_session(
+    auth: dict[str, Any] = Depends(auth_dependency),
+    db=Depends(get_db_session),
+):
+    """
+    Primary session for a user's writes, the same one ``auth_dependency``
+    checked the token on; their reads stick to the primary for a while.
+    """
+    sessionmanager.mark_written(auth["user_id"])
+    yield db
+    # Again on the way out, so the window runs from the end of the request.
+    sessionmanager.mark_written(auth["user_id"])
+
+
+async def get_user_read_db_session(
+    auth: dict[str, Any] = Depends(read_auth_dependency),
+    read_db=Depends(get_read_db_session),
+):
+    """
+    Read-only session for the authenticated user: the one the auth check
+    used, unless that is on the replica and the user wrote recently.
+    """
+    if sessionmanager.is_replica(read_db) and sessionmanager.wrote_recently(auth["user_id"]):
+        # Hand the replica connection back before taking one on the primary.
+        await read_db.close()
+        async with sessionmanager.read_session(primary=True) as session:
+            yield session
+    else:
+        yield read_db
@@ -1,32 +1,40 @@
 from fastapi import HTTPException
-from fastapi_mail import FastMail, MessageSchema, MessageType
 from sqlalchemy.exc import SQLAlchemyError
 from sqlalchemy.ext.asyncio import AsyncSession
 from app.core.logger import logger
 
-from app.db.pg_dml import insert_record, upsert_record
+from app.db.pg_dml import insert_returning, update_returning
 from app.db.models.app_users import AppUser
-from app.configs.email_configs import email_conf
 from app.core.jwt_helper import jwt_helper
 from app.configs.settings import settings
 from app.db.crud.app_users import AppUserCrud
+from app.db.crud.email_outbox import EmailOutboxCRUD
+from app.services.email.outbox import outbox_sender
 
 from .schemas import EmailRegistrationInput, EmailRegistrationResponse
 
 
 class EmailRegistration:
     def __init__(self):
-        # Mail client
-        self.mailer = FastMail(email_conf.smtp_conf)
+        self.outbox = EmailOutboxCRUD()
 
-    async def _create_user_record(self, db: AsyncSession, user_data, hashed_password) -> AppUser:
+    async def _create_user_record(
+        self, db: AsyncSession, user_data, hashed_password, *, is_active: bool = False
+    ) -> AppUser:
+        # Not committed yet: the confirmation email is queued in the same
+        # transaction.
         try:
-            user = AppUser(
-                name=user_data.name,
-                email=user_data.email,
-                password=hashed_password,
+            return await insert_returning(
+                db,
+                AppUser,
+                dict(
+                    name=user_data.name,
+                    email=user_data.email,
+                    password=hashed_password,
+                    is_active=is_active,
+                ),
+                commit=False,
             )
-            return await insert_record(db, user)
         except SQLAlchemyError as e:
             logger.exception("Failed to insert user record")
             raise HTTPException(
@@ -34,19 +42,19 @@ class EmailRegistration:
                 detail=f"Failed to insert record: {str(e)}"
             )
 
-    async def _send_confirmation_email(self, user, token: str) -> None:
-        message = MessageSchema(
+    async def _queue_confirmation_email(self, db: AsyncSession, user, token: str) -> None:
+        await self.outbox.enqueue(
+            db,
+            recipient=user.email,
             subject="Confirm your email",
-            recipients=[user.email],
             body=(
                 f"Hello {user.name},\n\n"
                 f"Please confirm your registration by clicking the link below:\n"
                 f"{settings.mail_verify_base_url}/verify-email?token={token}\n\n"
                 "Thank you!"
             ),
-            subtype=MessageType.html
+            subtype="html",
         )
-        await self.mailer.send_message(message)
 
     async def register(
         self, db: AsyncSession, user_data: EmailRegistrationInput
@@ -57,21 +65,23 @@ class EmailRegistration:
             raise HTTPException(status_code=400, detail="Email already registered")
 
         # Hash the password and create the user record
-        hashed_password = jwt_helper.pwd_context.hash(user_data.password)
-        user = await self._create_user_record(db, user_data, hashed_password)
-
-        # Generate email confirmation token
-        token = jwt_helper.create_email_token({"sub": user.email})
+        hashed_password = await jwt_helper.hash_password_async(user_data.password)
+        user = await self._create_user_record(
+            db, user_data, hashed_password, is_active=settings.skip_email_verify
+        )
         if settings.skip_email_verify:
-            user.is_active = True
-            await upsert_record(db, user)
+            await db.commit()
             return EmailRegistrationResponse(
                 name=user.name,
                 email=user.email,
                 message="User registered successfully. Skipped verify email.",
             )
         else:
-            await self._send_confirmation_email(user, token)
+            # Delivered by the outbox sender; SMTP is never on this path.
+            token = jwt_helper.create_email_token({"sub": user.email})
+            await self._queue_confirmation_email(db, user, token)
+            await db.commit()
+            outbox_sender.wake()
             return EmailRegistrationResponse(
                 name=user.name,
                 email=user.email,
@@ -94,8 +104,7 @@ class EmailRegistration:
             if user.is_active:
                 return "Email already verified."
 
-            user.is_active = True
-            await upsert_record(db, user)
+            await update_returning(db, AppUser, [AppUser.id == user.id], {"is_active": True})
             return "Email verified successfully."
         except SQLAlchemyError:
             await db.rollback()
@@ -31,7 +31,9 @@ class LoginUserPass:
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         if not user.is_active:
             raise HTTPException(status_code=status.HTTP_403_FORBIDDEN, detail="Account is inactive")
-        if user.password is None or not jwt_helper.verify_password(self.password, user.password):
+        if user.password is None or not await jwt_helper.verify_password_async(
+            self.password, user.password
+        ):
             raise HTTPException(status_code=status.HTTP_401_UNAUTHORIZED, detail="Invalid credentials")
         return user
 
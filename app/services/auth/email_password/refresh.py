@@ -0,0 +1,66 @@
+from fastapi import HTTPException, Request
+from starlette import status
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.configs.settings import settings
+from app.core.jwt_helper import jwt_helper
+from app.core.logger import logger
+from app.db.crud.auth_sessions import AuthSessionCRUD
+from app.services.auth.email_password.schemas import RefreshResponse
+
+
+class RefreshSession:
+    """
+    Exchange a refresh token for a new access token and a new refresh token.
+
+    The presented refresh token is single-use.  Presenting one that was
+    already rotated means it leaked (or a client kept a stale copy), so
+    every session of that user is revoked and they must log in again.
+    Within ``refresh_reuse_grace_seconds`` of the rotation the replay is
+    only refused: that is usually the same client refreshing twice at once.
+    """
+
+    def __init__(self, db: AsyncSession, refresh_token: str):
+        self.db = db
+        self.refresh_token = refresh_token
+        self.session_crud = AuthSessionCRUD()
+
+    async def refresh(self, request: Request) -> RefreshResponse:
+        new_refresh = jwt_helper.make_refresh_token()
+        rotated = await self.session_crud.rotate(
+            self.db,
+            refresh_token_raw=self.refresh_token,
+            new_refresh_token_raw=new_refresh,
+            ip=request.client.host if request.client else None,
+            user_agent=request.headers.get("user-agent"),
+        )
+        if rotated is None:
+            replayed = await self.session_crud.was_rotated(
+                self.db,
+                refresh_token_raw=self.refresh_token,
+                grace_seconds=settings.refresh_reuse_grace_seconds,
+            )
+            if replayed is not None and replayed.recent:
+                logger.info("Refresh token of user %s replayed within the grace window", replayed.user_id)
+            elif replayed is not None:
+                count = await self.session_crud.revoke_all_for_user(
+                    self.db, user_id=replayed.user_id, reason="refresh_token_reuse"
+                )
+                logger.warning(
+                    "Refresh token reuse for user %s; revoked %s sessions", replayed.user_id, count
+                )
+            raise HTTPException(
+                status_code=status.HTTP_401_UNAUTHORIZED,
+                detail="Invalid session",
+            )
+        await self.db.commit()
+
+        access_token = jwt_helper.create_access_token(
+            sub=f"{rotated.user_id}:{rotated.id}",
+            expires_minutes=settings.session_ttl_minutes,
+        )
+        return RefreshResponse(
+            access_token=access_token,
+            refresh_token=new_refresh,
+            message="Token refreshed",
+        )
@@ -39,3 +39,14 @@ class LogoutInput(BaseModel):
 
 class LogoutResponse(BaseModel):
     message: str
+
+
+class RefreshInput(BaseModel):
+    refresh_token: str
+
+
+class RefreshResponse(BaseModel):
+    access_token: str
+    token_type: str = "Bearer"
+    refresh_token: str
+    message: str
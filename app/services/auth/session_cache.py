@@ -0,0 +1,65 @@
+import uuid
+from datetime import datetime, timezone
+from typing import Optional
+
+from app.configs.constants import SESSION_REVOKED_CHANNEL
+from app.configs.settings import settings
+from app.core.logger import logger
+from app.core.ttl_cache import TTLCache
+from app.db.pg_notify import PgNotifyListener
+
+
+class SessionCache:
+    """
+    Auth sessions known to be active, keyed by session id.
+
+    Only positive results are cached, and never past the session's own
+    ``expires_at``.  Entries are dropped when a revocation notification
+    arrives, and the whole cache is cleared whenever the notification
+    channel reconnects, since revocations may have been missed meanwhile.
+    """
+
+    def __init__(self, maxsize: int, ttl: float, enabled: bool = True):
+        self.enabled = enabled
+        self._cache: TTLCache[uuid.UUID, datetime] = TTLCache(maxsize=maxsize, ttl=ttl)
+
+    def is_active(self, session_id: uuid.UUID) -> bool:
+        if not self.enabled:
+            return False
+        expires_at = self._cache.get(session_id)
+        if expires_at is None:
+            return False
+        if expires_at <= datetime.now(timezone.utc):
+            self._cache.pop(session_id)
+            return False
+        return True
+
+    def add(self, session_id: uuid.UUID, expires_at: datetime) -> None:
+        if self.enabled:
+            self._cache.set(session_id, expires_at)
+
+    def invalidate(self, session_id: uuid.UUID) -> None:
+        self._cache.pop(session_id)
+
+    def clear(self) -> None:
+        self._cache.clear()
+
+    def on_revoked(self, payload: str) -> None:
+        try:
+            self.invalidate(uuid.UUID(payload))
+        except ValueError:
+            # Unknown payload: be safe and forget everything.
+            logger.warning("Unexpected %s payload %r", SESSION_REVOKED_CHANNEL, payload)
+            self.clear()
+
+
+session_cache = SessionCache(
+    maxsize=settings.auth_session_cache_size,
+    ttl=settings.auth_session_cache_ttl_seconds,
+    enabled=settings.auth_session_cache_enabled,
+)
+revocation_listener = PgNotifyListener(
+    SESSION_REVOKED_CHANNEL,
+    session_cache.on_revoked,
+    on_reconnect=session_cache.clear,
+)
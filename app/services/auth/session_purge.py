@@ -0,0 +1,117 @@
+import asyncio
+import time
+from contextlib import AbstractAsyncContextManager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncConnection, AsyncSession
+
+from app.configs.constants import SESSION_PURGE_LOCK_KEY
+from app.configs.settings import settings
+from app.core.logger import logger
+from app.db.crud.auth_sessions import AuthSessionCRUD
+from app.db.pg_engine import sessionmanager
+from app.db.pg_lock import try_advisory_lock
+
+SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+ConnectionFactory = Callable[[], AbstractAsyncContextManager[AsyncConnection]]
+
+
+@dataclass(frozen=True)
+class PurgeReport:
+    deleted: int
+    batches: int
+    seconds: float
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.deleted / self.seconds if self.seconds > 0 else 0.0
+
+
+class SessionPurger:
+    """
+    Periodically deletes expired and revoked auth sessions.
+
+    Each batch is a single set-based DELETE in its own transaction, so
+    purging never holds long locks or loads rows into Python.  A run only
+    starts on the worker holding ``SESSION_PURGE_LOCK_KEY``; the others
+    skip that round.
+    """
+
+    def __init__(
+        self,
+        *,
+        sessions: Optional[SessionFactory] = None,
+        connections: Optional[ConnectionFactory] = None,
+        batch_size: int = settings.auth_session_purge_batch_size,
+        retention: timedelta = timedelta(days=settings.auth_session_purge_retention_days),
+        interval: float = settings.auth_session_purge_interval_seconds,
+        lock_key: int = SESSION_PURGE_LOCK_KEY,
+    ):
+        self.sessions = sessions or sessionmanager.session
+        self.connections = connections or sessionmanager.connection
+        self.crud = AuthSessionCRUD()
+        self.batch_size = batch_size
+        self.retention = retention
+        self.interval = interval
+        self.lock_key = lock_key
+        self.last_report: Optional[PurgeReport] = None
+        self._task: Optional[asyncio.Task] = None
+
+    async def purge(self) -> PurgeReport:
+        """Delete batches until one comes back short."""
+        before = datetime.now(timezone.utc) - self.retention
+        deleted = batches = 0
+        started = time.perf_counter()
+        while True:
+            async with self.sessions() as db:
+                count = await self.crud.purge_batch(db, before=before, limit=self.batch_size)
+            deleted += count
+            batches += 1
+            if count < self.batch_size:
+                break
+            # Let request handlers in between batches.
+            await asyncio.sleep(0)
+        report = PurgeReport(deleted, batches, time.perf_counter() - started)
+        self.last_report = report
+        return report
+
+    async def run_once(self) -> Optional[PurgeReport]:
+        """Purge if no other worker is; returns ``None`` when skipped."""
+        async with self.connections() as conn:
+            async with try_advisory_lock(conn, self.lock_key) as acquired:
+                if not acquired:
+                    return None
+                report = await self.purge()
+        logger.info(
+            "Purged %d auth sessions in %d batches (%.2fs, %.0f rows/s)",
+            report.deleted, report.batches, report.seconds, report.rows_per_second,
+        )
+        return report
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+
+    async def _run(self) -> None:
+        while True:
+            try:
+                await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Auth session purge failed")
+            await asyncio.sleep(self.interval)
+
+
+session_purger = SessionPurger()
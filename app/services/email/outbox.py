@@ -0,0 +1,163 @@
+import asyncio
+import math
+import time
+from contextlib import AbstractAsyncContextManager
+from datetime import datetime, timedelta, timezone
+from email.message import EmailMessage
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.configs.settings import settings
+from app.core.logger import logger
+from app.db.crud.email_outbox import EmailOutboxCRUD
+from app.db.models.email_outbox import EmailOutbox
+from app.db.pg_engine import sessionmanager
+from app.services.email.smtp import SmtpTransport, is_permanent
+
+SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+def build_message(row: EmailOutbox, sender: str) -> EmailMessage:
+    message = EmailMessage()
+    message["From"] = sender
+    message["To"] = row.recipient
+    message["Subject"] = row.subject
+    message.set_content(row.body, subtype=row.subtype)
+    return message
+
+
+class OutboxSender:
+    """
+    Delivers queued ``email_outbox`` messages in the background.
+
+    Each round claims a batch in a short transaction, sends it over one
+    reused SMTP connection, and records the outcomes in another.  Failed
+    messages are retried with exponential backoff, unless the server
+    rejected them permanently.  Every API worker may run one; claims never
+    overlap.
+
+    Each send is cut off after ``send_timeout``, and a batch is never
+    larger than fits in the claim's lease at that rate, so a slow server
+    cannot let the lease run out (and another sender re-send the rest of
+    the batch) while this one is still working through it.
+    """
+
+    def __init__(
+        self,
+        transport: SmtpTransport,
+        *,
+        sessions: Optional[SessionFactory] = None,
+        sender: str = settings.mail_from,
+        batch_size: int = settings.email_outbox_batch_size,
+        poll_interval: float = settings.email_outbox_poll_interval_seconds,
+        lease_seconds: int = settings.email_outbox_lease_seconds,
+        max_attempts: int = settings.email_outbox_max_attempts,
+        backoff: float = settings.email_outbox_backoff_seconds,
+        backoff_max: float = settings.email_outbox_backoff_max_seconds,
+        idle_seconds: float = settings.email_outbox_idle_seconds,
+        send_timeout: float = settings.mail_timeout,
+    ):
+        self.transport = transport
+        self.sessions = sessions or sessionmanager.session
+        self.crud = EmailOutboxCRUD()
+        self.sender = sender
+        self.send_timeout = send_timeout
+        # One send's worth of the lease is kept for connecting and for
+        # recording the outcomes.
+        self.batch_size = max(1, min(batch_size, int(lease_seconds // send_timeout) - 1))
+        self.lease_seconds = max(lease_seconds, math.ceil(send_timeout * (self.batch_size + 1)))
+        self.poll_interval = poll_interval
+        self.max_attempts = max_attempts
+        self.backoff = backoff
+        self.backoff_max = backoff_max
+        self.idle_seconds = idle_seconds
+        self._wakeup = asyncio.Event()
+        self._task: Optional[asyncio.Task] = None
+
+    def wake(self) -> None:
+        """Check for new mail now rather than at the next poll."""
+        self._wakeup.set()
+
+    def retry_at(self, attempts: int) -> datetime:
+        delay = min(self.backoff * 2 ** (attempts - 1), self.backoff_max)
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+    async def run_once(self) -> int:
+        """Claim and send one batch; returns how many messages were claimed."""
+        async with self.sessions() as db:
+            rows = await self.crud.claim_due(
+                db,
+                limit=self.batch_size,
+                lease_seconds=self.lease_seconds,
+                max_attempts=self.max_attempts,
+            )
+        if not rows:
+            return 0
+
+        sent: dict[int, int] = {}
+        failed: list[tuple[EmailOutbox, Exception]] = []
+        for row in rows:
+            try:
+                async with asyncio.timeout(self.send_timeout):
+                    await self.transport.send(build_message(row, self.sender))
+                sent[row.id] = row.attempts
+            except TimeoutError as e:
+                logger.warning("Sending mail %s timed out (attempt %s)", row.id, row.attempts)
+                # The connection is mid-command; start the next send afresh.
+                await self.transport.close()
+                failed.append((row, e))
+            except Exception as e:
+                logger.warning("Sending mail %s failed (attempt %s): %s", row.id, row.attempts, e)
+                failed.append((row, e))
+
+        async with self.sessions() as db:
+            await self.crud.mark_sent(db, claims=sent)
+            for row, error in failed:
+                give_up = is_permanent(error) or row.attempts >= self.max_attempts
+                await self.crud.mark_failed(
+                    db,
+                    message_id=row.id,
+                    attempts=row.attempts,
+                    error=repr(error),
+                    retry_at=None if give_up else self.retry_at(row.attempts),
+                )
+        return len(rows)
+
+    async def start(self) -> None:
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    async def stop(self) -> None:
+        if self._task is not None:
+            self._task.cancel()
+            try:
+                await self._task
+            except asyncio.CancelledError:
+                pass
+            self._task = None
+        await self.transport.close()
+
+    async def _run(self) -> None:
+        last_sent = time.monotonic()
+        while True:
+            try:
+                claimed = await self.run_once()
+            except asyncio.CancelledError:
+                raise
+            except Exception:
+                logger.exception("Email outbox round failed")
+                claimed = 0
+            if claimed:
+                last_sent = time.monotonic()
+            elif self.transport.connected and time.monotonic() - last_sent >= self.idle_seconds:
+                await self.transport.close()
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+                self._wakeup.clear()
+
+
+outbox_sender = OutboxSender(SmtpTransport.from_settings())
@@ -0,0 +1,96 @@
+from email.message import EmailMessage
+from typing import Optional
+
+import aiosmtplib
+
+from app.configs.settings import settings
+
+
+def is_permanent(error: Exception) -> bool:
+    """Whether retrying ``error`` is pointless (a 5xx reply, e.g. unknown mailbox)."""
+    if isinstance(error, aiosmtplib.SMTPRecipientsRefused):
+        return all(e.code >= 500 for e in error.recipients)
+    return isinstance(error, aiosmtplib.SMTPResponseException) and error.code >= 500
+
+
+class SmtpTransport:
+    """
+    A single SMTP connection reused across messages.
+
+    Connects (and does STARTTLS and login) on first use, and reconnects
+    once if the server dropped the connection in between.  Not safe for
+    concurrent use; one sender drives it.
+    """
+
+    def __init__(
+        self,
+        hostname: str,
+        port: int,
+        *,
+        username: Optional[str] = None,
+        password: Optional[str] = None,
+        use_tls: bool = False,
+        start_tls: bool = False,
+        validate_certs: bool = True,
+        timeout: float = 30.0,
+    ):
+        self.hostname = hostname
+        self.port = port
+        self.username = username
+        self.password = password
+        self.use_tls = use_tls
+        self.start_tls = start_tls
+        self.validate_certs = validate_certs
+        self.timeout = timeout
+        self._smtp: Optional[aiosmtplib.SMTP] = None
+
+    @classmethod
+    def from_settings(cls) -> "SmtpTransport":
+        return cls(
+            settings.mail_server,
+            settings.mail_port,
+            username=settings.mail_username if settings.use_credentials else None,
+            password=settings.mail_password.get_secret_value() if settings.use_credentials else None,
+            use_tls=settings.mail_ssl_tls,
+            start_tls=settings.mail_starttls,
+            validate_certs=settings.validate_certs,
+            timeout=settings.mail_timeout,
+        )
+
+    @property
+    def connected(self) -> bool:
+        return self._smtp is not None and self._smtp.is_connected
+
+    async def _connect(self) -> aiosmtplib.SMTP:
+        smtp = aiosmtplib.SMTP(
+            hostname=self.hostname,
+            port=self.port,
+            username=self.username,
+            password=self.password,
+            use_tls=self.use_tls,
+            start_tls=self.start_tls,
+            validate_certs=self.validate_certs,
+            timeout=self.timeout,
+        )
+        await smtp.connect()
+        self._smtp = smtp
+        return smtp
+
+    async def send(self, message: EmailMessage) -> None:
+        smtp = self._smtp if self.connected else await self._connect()
+        try:
+            await smtp.send_message(message)
+        except aiosmtplib.SMTPServerDisconnected:
+            # Idle connections get dropped by servers; one fresh try.
+            await self.close()
+            smtp = await self._connect()
+            await smtp.send_message(message)
+
+    async def close(self) -> None:
+        smtp, self._smtp = self._smtp, None
+        if smtp is None or not smtp.is_connected:
+            return
+        try:
+            await smtp.quit()
+        except aiosmtplib.SMTPException:
+            smtp.close()
@@ -0,0 +1,133 @@
+import hashlib
+import itertools
+import time
+from dataclasses import dataclass
+from typing import Callable, Hashable, Optional
+
+from app.configs.constants import UPLOADS_CHANGED_CHANNEL
+from app.configs.settings import settings
+from app.core.logger import logger
+from app.core.ttl_cache import TTLCache
+from app.db.pg_notify import PgNotifyListener
+
+
+@dataclass(frozen=True)
+class CachedListing:
+    """One serialized page of a user's uploads listing."""
+
+    body: bytes
+    etag: str
+    next_cursor: Optional[str]
+
+    @classmethod
+    def build(cls, body: bytes, next_cursor: Optional[str]) -> "CachedListing":
+        digest = hashlib.blake2b(body, digest_size=16)
+        digest.update((next_cursor or "").encode())
+        return cls(body, f'"{digest.hexdigest()}"', next_cursor)
+
+    def matches(self, if_none_match: Optional[str]) -> bool:
+        """Whether an ``If-None-Match`` header already names this page."""
+        if not if_none_match:
+            return False
+        tags = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+        return "*" in tags or self.etag in tags
+
+
+class ListingCache:
+    """
+    Per-user cache of serialized uploads listings, one entry per query.
+
+    Entries are dropped whenever the user's uploads change: directly by the
+    writing request, and in every process through ``UPLOADS_CHANGED_CHANNEL``
+    (the OCR worker moves statuses from another process).  The TTL bounds
+    staleness if a notification is missed.
+
+    A page read while a change was being committed could be stale, so
+    :meth:`put` refuses pages whose read began before the user's latest
+    invalidation, and, for reads served by a replica, pages read within
+    ``settle_seconds`` of it.  Not thread-safe; one event loop uses it.
+    """
+
+    def __init__(
+        self,
+        maxsize: int,
+        ttl: float,
+        *,
+        settle_seconds: float = 0.0,
+        per_user: int = 16,
+        enabled: bool = True,
+        clock: Callable[[], float] = time.monotonic,
+    ):
+        self.enabled = enabled
+        self.settle_seconds = settle_seconds
+        self.per_user = per_user
+        self._clock = clock
+        self._pages: TTLCache[int, dict[Hashable, CachedListing]] = TTLCache(maxsize, ttl, clock)
+        # user id -> (sequence number, time) of the latest invalidation.
+        self._invalidated: TTLCache[int, tuple[int, float]] = TTLCache(
+            maxsize, max(ttl, settle_seconds), clock
+        )
+        self._sequence = itertools.count(1)
+
+    def token(self) -> int:
+        """Take before reading from the database; hand back to :meth:`put`."""
+        return next(self._sequence)
+
+    def get(self, user_id: int, key: Hashable) -> Optional[CachedListing]:
+        if not self.enabled:
+            return None
+        pages = self._pages.get(user_id)
+        return pages.get(key) if pages else None
+
+    def put(
+        self,
+        user_id: int,
+        key: Hashable,
+        page: CachedListing,
+        *,
+        token: int,
+        from_replica: bool = False,
+    ) -> None:
+        if not self.enabled:
+            return
+        invalidated = self._invalidated.get(user_id)
+        if invalidated is not None:
+            sequence, at = invalidated
+            if sequence > token:
+                return
+            if from_replica and self._clock() - at < self.settle_seconds:
+                return
+        pages = self._pages.get(user_id)
+        if pages is None:
+            pages = {}
+            self._pages.set(user_id, pages)
+        pages[key] = page
+        while len(pages) > self.per_user:
+            del pages[next(iter(pages))]
+
+    def invalidate(self, user_id: int) -> None:
+        self._invalidated.set(user_id, (next(self._sequence), self._clock()))
+        self._pages.pop(user_id)
+
+    def clear(self) -> None:
+        self._pages.clear()
+
+    def on_changed(self, payload: str) -> None:
+        try:
+            self.invalidate(int(payload))
+        except ValueError:
+            logger.warning("Unexpected %s payload %r", UPLOADS_CHANGED_CHANNEL, payload)
+            self.clear()
+
+
+listing_cache = ListingCache(
+    maxsize=settings.uploads_listing_cache_size,
+    ttl=settings.uploads_listing_cache_ttl_seconds,
+    settle_seconds=settings.postgres_replica_max_lag_seconds,
+    enabled=settings.uploads_listing_cache_enabled,
+)
+uploads_listener = PgNotifyListener(
+    UPLOADS_CHANGED_CHANNEL,
+    listing_cache.on_changed,
+    on_reconnect=listing_cache.clear,
+)
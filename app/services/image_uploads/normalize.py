@@ -0,0 +1,127 @@
+import asyncio
+import io
+import multiprocessing
+from concurrent.futures import Executor, ProcessPoolExecutor
+from dataclasses import dataclass
+from typing import Optional
+
+from PIL import Image, ImageOps
+
+CONTENT_TYPES = {"WEBP": "image/webp", "JPEG": "image/jpeg"}
+EXTENSIONS = {"WEBP": "webp", "JPEG": "jpg"}
+
+
+@dataclass(frozen=True)
+class NormalizedImage:
+    data: bytes
+    content_type: str
+    file_ext: str
+
+
+def _encode(img: Image.Image, fmt: str, quality: int) -> bytes:
+    out = io.BytesIO()
+    if fmt == "JPEG":
+        img.save(out, format="JPEG", quality=quality, optimize=True, progressive=True)
+    else:
+        img.save(out, format="WEBP", quality=quality, method=4)
+    return out.getvalue()
+
+
+def render_images(
+    source: bytes | str, edges: dict[str, int], fmt: str, quality: int
+) -> dict[str, bytes]:
+    """
+    Decode and auto-orient an image once, then encode one copy per entry of
+    ``edges`` (name -> longest edge in pixels).
+
+    ``source`` is the encoded image, or the path of a file holding it.
+    Runs inside a worker process.  EXIF and other metadata are not copied to
+    the output, which also drops GPS tags from phone photos.  Images are
+    never upscaled.
+    """
+    with Image.open(io.BytesIO(source) if isinstance(source, bytes) else source) as img:
+        img = ImageOps.exif_transpose(img)
+        if fmt == "JPEG" and img.mode != "RGB":
+            img = img.convert("RGB")
+        elif img.mode not in ("RGB", "RGBA", "L"):
+            img = img.convert("RGBA" if "A" in img.getbands() else "RGB")
+
+        rendered = {}
+        # Largest first, so each smaller size is resampled from the previous
+        # one rather than from the full-size original.
+        for name, edge in sorted(edges.items(), key=lambda item: -item[1]):
+            img = img.copy()
+            img.thumbnail((edge, edge), Image.Resampling.LANCZOS)
+            rendered[name] = _encode(img, fmt, quality)
+        return rendered
+
+
+def normalize_image(data: bytes, max_edge: int, fmt: str, quality: int) -> bytes:
+    """Decode, auto-orient, downsize to ``max_edge`` and re-encode an image."""
+    return render_images(data, {"normalized": max_edge}, fmt, quality)["normalized"]
+
+
+class ImageProcessor:
+    """
+    Runs Pillow work in a process pool so decoding and resizing neither hold
+    the GIL nor block the event loop.  The pool is created on first use.
+    """
+
+    def __init__(
+        self,
+        *,
+        workers: int,
+        max_edge: int,
+        fmt: str,
+        quality: int,
+        variants: Optional[dict[str, int]] = None,
+        executor: Optional[Executor] = None,
+    ):
+        self.workers = workers
+        self.max_edge = max_edge
+        self.fmt = fmt
+        self.quality = quality
+        # Smaller renditions (name -> longest edge) such as list thumbnails.
+        self.variants = variants or {}
+        self._executor = executor
+
+    def _pool(self) -> Executor:
+        if self._executor is None:
+            # "spawn" rather than fork: forking a process that already runs
+            # an event loop and threads is unsafe.
+            self._executor = ProcessPoolExecutor(
+                max_workers=self.workers,
+                mp_context=multiprocessing.get_context("spawn"),
+            )
+        return self._executor
+
+    @property
+    def file_ext(self) -> str:
+        return EXTENSIONS[self.fmt]
+
+    async def render(self, source: bytes | str, edges: dict[str, int]) -> dict[str, NormalizedImage]:
+        """Render ``edges`` from image bytes or, cheaper to hand over, a file path."""
+        loop = asyncio.get_running_loop()
+        rendered = await loop.run_in_executor(
+            self._pool(), render_images, source, edges, self.fmt, self.quality
+        )
+        return {
+            name: NormalizedImage(
+                data=out,
+                content_type=CONTENT_TYPES[self.fmt],
+                file_ext=self.file_ext,
+            )
+            for name, out in rendered.items()
+        }
+
+    async def normalize(self, source: bytes | str) -> NormalizedImage:
+        return (await self.render(source, {"normalized": self.max_edge}))["normalized"]
+
+    async def derive(self, source: bytes | str) -> dict[str, NormalizedImage]:
+        """The normalized copy plus every variant, from a single decode."""
+        return await self.render(source, {"normalized": self.max_edge, **self.variants})
+
+    def shutdown(self) -> None:
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
@@ -0,0 +1,19 @@
+import base64
+import json
+from datetime import datetime
+
+
+def encode_cursor(upload_timestamp: datetime, upload_id: int) -> str:
+    """Opaque cursor for the row a page ended on."""
+    raw = json.dumps([upload_timestamp.isoformat(), upload_id], separators=(",", ":"))
+    return base64.urlsafe_b64encode(raw.encode("utf-8")).decode("ascii").rstrip("=")
+
+
+def decode_cursor(cursor: str) -> tuple[datetime, int]:
+    """Inverse of :func:`encode_cursor`; raises ``ValueError`` on malformed input."""
+    try:
+        raw = base64.urlsafe_b64decode(cursor + "=" * (-len(cursor) % 4))
+        timestamp, upload_id = json.loads(raw)
+        return datetime.fromisoformat(timestamp), int(upload_id)
+    except (TypeError, ValueError) as e:
+        raise ValueError("Invalid cursor") from e
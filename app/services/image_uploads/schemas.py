@@ -1,4 +1,4 @@
-from pydantic import BaseModel, field_serializer
+from pydantic import BaseModel, Field, RootModel, field_serializer, field_validator
 from app.configs.constants import ProcessingStatus
 
 class ImageUploadInputRequest(BaseModel):
@@ -8,13 +8,57 @@ class ImageUploadInputRequest(BaseModel):
     script_id: int
 
 
+class BatchUploadMetadata(RootModel[list[ImageUploadInputRequest]]):
+    """Per-file metadata for a batch upload, in the same order as the files."""
+
+
+class PresignedUploadRequest(ImageUploadInputRequest):
+    filename: str
+    content_type: str
+
+
+class PresignedUploadResponse(BaseModel):
+    upload_id: str
+    upload_url: str
+    method: str
+    headers: dict[str, str]
+    expires_in: int
+
+
+class CompleteUploadRequest(BaseModel):
+    upload_id: str
+
+
 class ImageUploadResponse(BaseModel):
     file_path: str
     message: str
+    normalized_path: str | None = None
+
+
+class BatchUploadItem(BaseModel):
+    index: int
+    filename: str | None
+    id: int | None = None
+    file_path: str | None = None
+    normalized_path: str | None = None
+    error: str | None = None
+
+
+class BatchUploadResponse(BaseModel):
+    items: list[BatchUploadItem]
+
+
+class ImageUploadDeleteResponse(BaseModel):
+    message: str
 
 
 class ImageUploadRecord(BaseModel):
+    id: int
     file_path: str
+    normalized_path: str | None = None
+    # Variant name -> URL.  Either the stored rendition, or an API path that
+    # renders it on first request and redirects to it.
+    variants: dict[str, str] = {}
     status: ProcessingStatus
     chapter: int
     line_start: int
@@ -25,3 +69,33 @@ class ImageUploadRecord(BaseModel):
         self, status: ProcessingStatus, _info
     ) -> str:
         return status.name.lower()
+
+
+class UploadListQuery(BaseModel):
+    """Query parameters of ``GET /image/uploads/``."""
+
+    limit: int = Field(50, ge=1, le=200)
+    # ``X-Next-Cursor`` from the previous page.
+    cursor: str | None = None
+    chapter: int | None = None
+    script_id: int | None = None
+    status: ProcessingStatus | None = None
+    # Uploads whose line range overlaps ``[line_from, line_to]``.
+    line_from: int | None = None
+    line_to: int | None = None
+
+    @field_validator("status", mode="before")
+    @classmethod
+    def parse_status(cls, value):
+        # Accept the names records are serialized with, e.g. ``completed``.
+        if isinstance(value, str) and not value.isdigit():
+            try:
+                return ProcessingStatus[value.upper()]
+            except KeyError:
+                raise ValueError(f"Unknown status: {value}")
+        return value
+
+
+class UploadPage(BaseModel):
+    items: list[ImageUploadRecord]
+    next_cursor: str | None = None
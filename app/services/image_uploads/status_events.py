@@ -0,0 +1,268 @@
+import asyncio
+import json
+from collections import deque
+from contextlib import AbstractAsyncContextManager, contextmanager
+from dataclasses import dataclass
+from datetime import datetime, timedelta, timezone
+from functools import partial
+from typing import AsyncIterator, Callable, Iterator, Optional
+
+from fastapi import HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.configs.constants import UPLOAD_STATUS_CHANNEL, ProcessingStatus
+from app.configs.settings import settings
+from app.core.logger import logger
+from app.db.crud.image_uploads import ImageUploadCRUD
+from app.db.models.image_uploads import ImageUploads
+from app.db.pg_engine import sessionmanager
+from app.db.pg_notify import PgNotifyListener
+from app.services.image_uploads.pagination import decode_cursor, encode_cursor
+
+SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+# Milliseconds clients wait before reconnecting a dropped stream.
+RECONNECT_MS = 3000
+
+
+@dataclass(frozen=True)
+class StatusEvent:
+    user_id: int
+    upload_id: int
+    status: ProcessingStatus
+    updated_at: datetime
+
+    @classmethod
+    def from_payload(cls, payload: str) -> "StatusEvent":
+        """Parse an ``UPLOAD_STATUS_CHANNEL`` notification."""
+        data = json.loads(payload)
+        return cls(
+            int(data["user_id"]),
+            int(data["id"]),
+            ProcessingStatus(data["status"]),
+            datetime.fromisoformat(data["updated_at"]),
+        )
+
+    @classmethod
+    def from_row(cls, row: ImageUploads) -> "StatusEvent":
+        return cls(row.user_id, row.id, ProcessingStatus(row.status), row.updated_at)
+
+    @property
+    def key(self) -> tuple[datetime, int]:
+        return self.updated_at, self.upload_id
+
+    def to_sse(self) -> bytes:
+        data = json.dumps(
+            {
+                "id": self.upload_id,
+                "status": self.status.name.lower(),
+                "updated_at": self.updated_at.isoformat(),
+            },
+            separators=(",", ":"),
+        )
+        cursor = encode_cursor(*self.key)
+        return f"id: {cursor}\nevent: status\ndata: {data}\n\n".encode()
+
+
+class Subscription:
+    """
+    One open stream's inbox.
+
+    Publishing never blocks: once ``maxsize`` events are pending the inbox
+    drops them and flags ``resync``, and the stream re-reads what it missed
+    from the database.
+    """
+
+    def __init__(self, user_id: int, maxsize: int):
+        self.user_id = user_id
+        self.maxsize = maxsize
+        self.resync = False
+        self.closed = False
+        self._events: deque[StatusEvent] = deque()
+        self._ready = asyncio.Event()
+
+    def push(self, event: StatusEvent) -> None:
+        if len(self._events) >= self.maxsize:
+            self.request_resync()
+        else:
+            self._events.append(event)
+            self._ready.set()
+
+    def request_resync(self) -> None:
+        self._events.clear()
+        self.resync = True
+        self._ready.set()
+
+    def close(self) -> None:
+        self.closed = True
+        self._ready.set()
+
+    async def wait(self, timeout: float) -> bool:
+        """Wait for events, a resync or close; ``False`` on timeout."""
+        try:
+            await asyncio.wait_for(self._ready.wait(), timeout=timeout)
+        except TimeoutError:
+            return False
+        return True
+
+    def drain(self) -> list[StatusEvent]:
+        events = list(self._events)
+        self._events.clear()
+        self._ready.clear()
+        return events
+
+
+class UploadStatusHub:
+    """
+    Fans ``UPLOAD_STATUS_CHANNEL`` notifications out to the server-sent
+    event streams open in this process.
+
+    A worker listens on one connection however many streams it serves; an
+    idle stream is a few objects and a sleeping task, and holds no database
+    connection.  Streams only touch the database to catch up: when resumed
+    from a ``Last-Event-ID``, after falling behind, or after the listener
+    reconnected (notifications sent meanwhile are lost).
+
+    ``updated_at`` is stamped before its transaction commits, so a change
+    can become visible after a later-stamped one was already sent.  Catch-up
+    therefore re-reads ``overlap`` seconds before the cursor, and a stream
+    skips events it has already sent.  Delivery is at-least-once: a resumed
+    stream has no memory of what an earlier connection sent, so events from
+    the overlap may repeat; each carries the upload's current status, so
+    duplicates are harmless.
+    """
+
+    def __init__(
+        self,
+        *,
+        sessions: Optional[SessionFactory] = None,
+        queue_size: int = settings.uploads_events_queue_size,
+        heartbeat: float = settings.uploads_events_heartbeat_seconds,
+        catchup_limit: int = settings.uploads_events_catchup_limit,
+        overlap: float = settings.uploads_events_overlap_seconds,
+        enabled: bool = settings.uploads_events_enabled,
+    ):
+        # Catch-up reads the primary: status changes are written by the OCR
+        # worker, so read-your-writes stickiness would not cover them.
+        self.sessions = sessions or partial(sessionmanager.read_session, primary=True)
+        self.crud = ImageUploadCRUD()
+        self.queue_size = queue_size
+        self.heartbeat = heartbeat
+        self.catchup_limit = catchup_limit
+        self.overlap = timedelta(seconds=overlap)
+        self.enabled = enabled
+        self.closed = False
+        self._subscribers: dict[int, set[Subscription]] = {}
+
+    def __len__(self) -> int:
+        return sum(len(subs) for subs in self._subscribers.values())
+
+    @contextmanager
+    def subscribe(self, user_id: int) -> Iterator[Subscription]:
+        sub = Subscription(user_id, self.queue_size)
+        if self.closed:
+            sub.close()
+        self._subscribers.setdefault(user_id, set()).add(sub)
+        try:
+            yield sub
+        finally:
+            subs = self._subscribers.get(user_id)
+            if subs is not None:
+                subs.discard(sub)
+                if not subs:
+                    del self._subscribers[user_id]
+
+    def publish(self, event: StatusEvent) -> None:
+        for sub in self._subscribers.get(event.user_id, ()):
+            sub.push(event)
+
+    def on_message(self, payload: str) -> None:
+        if not self._subscribers:
+            return
+        try:
+            event = StatusEvent.from_payload(payload)
+        except (KeyError, TypeError, ValueError):
+            logger.warning("Unexpected %s payload %r", UPLOAD_STATUS_CHANNEL, payload)
+            return
+        self.publish(event)
+
+    def on_reconnect(self) -> None:
+        for subs in self._subscribers.values():
+            for sub in subs:
+                sub.request_resync()
+
+    def close(self) -> None:
+        """End every open stream (clients reconnect elsewhere) and refuse new ones."""
+        self.closed = True
+        for subs in self._subscribers.values():
+            for sub in subs:
+                sub.close()
+
+    def open_stream(self, user_id: int, last_event_id: Optional[str] = None) -> AsyncIterator[bytes]:
+        """
+        Server-sent events for ``user_id``'s status changes.  Resumes after
+        ``last_event_id`` when given, otherwise starts from now.
+        """
+        if not self.enabled:
+            raise HTTPException(status_code=404, detail="Status events are disabled")
+        if last_event_id:
+            try:
+                after = decode_cursor(last_event_id)
+            except ValueError:
+                raise HTTPException(status_code=400, detail="Invalid Last-Event-ID")
+        else:
+            after = None
+        return self._stream(user_id, after)
+
+    async def _catch_up(self, user_id: int, after: tuple[datetime, int]) -> list[StatusEvent]:
+        async with self.sessions() as db:
+            rows = await self.crud.changed_since(db, user_id, after=after, limit=self.catchup_limit)
+        return [StatusEvent.from_row(row) for row in rows]
+
+    async def _stream(
+        self, user_id: int, after: Optional[tuple[datetime, int]]
+    ) -> AsyncIterator[bytes]:
+        # Subscribe before reading so nothing committed in between is missed.
+        with self.subscribe(user_id) as sub:
+            if after is None:
+                after = (datetime.now(timezone.utc), 0)
+            else:
+                sub.request_resync()
+            # Events sent within ``overlap`` of the cursor, to skip repeats.
+            sent: set[StatusEvent] = set()
+            # Keyset position within the current catch-up, which starts
+            # ``overlap`` before the cursor.
+            scan: Optional[tuple[datetime, int]] = None
+            yield f"retry: {RECONNECT_MS}\n\n".encode()
+            while True:
+                if sub.resync:
+                    sub.resync = False
+                    events = await self._catch_up(user_id, scan or (after[0] - self.overlap, after[1]))
+                    # A full page means there may be more; read on.
+                    if len(events) >= self.catchup_limit:
+                        scan, sub.resync = events[-1].key, True
+                    else:
+                        scan = None
+                elif sub.closed:
+                    return
+                elif await sub.wait(self.heartbeat):
+                    events = sub.drain()
+                else:
+                    yield b": keep-alive\n\n"
+                    continue
+                for event in events:
+                    if event in sent:
+                        continue
+                    sent.add(event)
+                    after = max(after, event.key)
+                    yield event.to_sse()
+                horizon = after[0] - self.overlap
+                sent = {event for event in sent if event.updated_at >= horizon}
+
+
+upload_status_hub = UploadStatusHub()
+upload_status_listener = PgNotifyListener(
+    UPLOAD_STATUS_CHANNEL,
+    upload_status_hub.on_message,
+    on_reconnect=upload_status_hub.on_reconnect,
+)
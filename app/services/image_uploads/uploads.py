@@ -1,17 +1,116 @@
+import asyncio
+import hashlib
+import os
+import shutil
+import tempfile
+from collections import Counter
+from dataclasses import dataclass
 from pathlib import Path
+from typing import BinaryIO
 from fastapi import UploadFile, HTTPException
+from pydantic_core import to_json
 from app.core.logger import logger
 
 from sqlalchemy.ext.asyncio import AsyncSession
+from app.db.crud.image_blobs import ImageBlobCRUD
 from app.db.crud.image_uploads import ImageUploadCRUD
-from app.services.image_uploads.schemas import ImageUploadResponse, ImageUploadRecord
-from app.services.storage.do_space import do_space
+from app.configs.settings import settings
+from app.core.jwt_helper import jwt_helper
+from app.db.pg_engine import sessionmanager
+from app.services.image_uploads.listing_cache import CachedListing, ListingCache, listing_cache
+from app.services.image_uploads.normalize import ImageProcessor
+from app.services.image_uploads.pagination import decode_cursor, encode_cursor
+from app.services.image_uploads.schemas import (
+    BatchUploadItem,
+    BatchUploadResponse,
+    ImageUploadInputRequest,
+    ImageUploadDeleteResponse,
+    ImageUploadResponse,
+    ImageUploadRecord,
+    PresignedUploadRequest,
+    PresignedUploadResponse,
+    UploadListQuery,
+    UploadPage,
+)
+from app.services.storage.backends import get_storage
+from app.services.storage.base import (
+    BytesReader,
+    PresignNotSupported,
+    StorageBackend,
+    content_key,
+    generate_key,
+    key_from_url,
+    variant_key,
+)
 from app.configs.constants import ProcessingStatus
 
+HASH_CHUNK = 1024 * 1024
+# Lazily renders (and caches) a variant, then redirects to it.
+VARIANT_ROUTE = "/api/image/uploads/{upload_id}/variants/{name}"
+# ``ProcessingStatus`` value -> the name ``ImageUploadRecord`` serializes.
+_STATUS_NAMES = {status.value: status.name.lower() for status in ProcessingStatus}
+
+
+async def hash_upload(file: UploadFile) -> bytes:
+    """SHA-256 of an upload, read in chunks from its local spool, then rewound."""
+    digest = hashlib.sha256()
+    while chunk := await file.read(HASH_CHUNK):
+        digest.update(chunk)
+    await file.seek(0)
+    return digest.digest()
+
+
+def _spool_size(f: BinaryIO) -> int:
+    """Size of an upload's spool, for files whose size was not sent."""
+    size = f.seek(0, os.SEEK_END)
+    f.seek(0)
+    return size
+
+
+def _copy_to_temp(f: BinaryIO) -> str:
+    """Copy an upload's spool to a named temp file a pool worker can open; returns its path."""
+    f.seek(0)
+    with tempfile.NamedTemporaryFile(prefix="upload-", delete=False) as out:
+        shutil.copyfileobj(f, out, HASH_CHUNK)
+    f.seek(0)
+    return out.name
+
+
+@dataclass
+class _BatchEntry:
+    index: int
+    file: UploadFile
+    meta: ImageUploadInputRequest
+    content_hash: bytes = b""
+    key: str = ""
+    stored: bool = False
+    file_path: str | None = None
+    normalized_path: str | None = None
+    id: int | None = None
+    error: str | None = None
+
 
 class UploadService:
-    def __init__(self) -> None:
+    def __init__(
+        self,
+        storage: StorageBackend | None = None,
+        processor: ImageProcessor | None = None,
+        listing_cache: ListingCache | None = None,
+    ) -> None:
         self.crud = ImageUploadCRUD()
+        self.blobs = ImageBlobCRUD()
+        self._storage = storage
+        # ``None`` disables server-side normalization.
+        self.processor = processor
+        # In-flight lazy renders by target key, so concurrent requests for
+        # the same variant render it once.
+        self._rendering: dict[str, asyncio.Future] = {}
+        self.listing_cache = listing_cache or ListingCache(maxsize=1, ttl=0, enabled=False)
+
+    @property
+    def storage(self) -> StorageBackend:
+        # Resolved lazily so importing the service never builds a client.
+        return self._storage or get_storage()
 
     async def upload_image(
         self,
@@ -23,14 +122,430 @@ class UploadService:
         line_end: int,
         script_id: int,
     ) -> ImageUploadResponse:
-        """Upload an image and record its metadata."""
-        file_content = await file.read()
+        """Upload an image and record its metadata.
+
+        The file is hashed from FastAPI's local spool first.  If the user has
+        already uploaded the same bytes, the stored object is reused and the
+        storage PUT is skipped; otherwise the file is streamed straight to
+        storage while, if a processor is configured, a normalized copy is
+        produced in the process pool and stored alongside it.
+        """
         file_ext = Path(file.filename).suffix.lstrip(".")
+        content_hash = await hash_upload(file)
+
+        blob = await self.blobs.acquire(db, user_id=user_id, content_hash=content_hash)
+        if blob is None:
+            # Don't keep a pooled connection checked out during the upload.
+            await db.commit()
+            key = content_key(user_id, content_hash, file_ext)
+            normalized_url = await self._store(key, file)
+            blob = await self.blobs.register(
+                db,
+                user_id=user_id,
+                content_hash=content_hash,
+                file_path=self.storage.public_url(key),
+                normalized_path=normalized_url,
+            )
+            if blob.file_path != self.storage.public_url(key):
+                # A concurrent upload of the same bytes won the race; ours
+                # is a redundant copy.
+                await self._delete_blob(self.storage.public_url(key), normalized_url)
 
-        file_url = await do_space.upload_file(
-            file_content=file_content,
-            file_ext=file_ext,
+        return await self._record_upload(
+            db,
+            user_id=user_id,
+            file_url=blob.file_path,
+            chapter=chapter,
+            line_start=line_start,
+            line_end=line_end,
+            script_id=script_id,
+            content_hash=content_hash,
+            normalized_url=blob.normalized_path,
         )
+
+    async def upload_images(
+        self,
+        db: AsyncSession,
+        files: list[UploadFile],
+        metadata: list[ImageUploadInputRequest],
+        user_id: int,
+    ) -> BatchUploadResponse:
+        """Upload many images at once, reporting success or failure per file.
+
+        Same pipeline as :meth:`upload_image`, batched: existing blobs are
+        looked up in one query, new files are written to storage
+        concurrently (at most ``upload_batch_concurrency`` at a time), and
+        every reference and ``image_upload`` row is written in a single
+        transaction of multi-row statements.
+        """
+        if len(files) != len(metadata):
+            raise HTTPException(status_code=400, detail="Expected one metadata entry per file")
+        if len(files) > settings.upload_batch_max_files:
+            raise HTTPException(
+                status_code=400,
+                detail=f"At most {settings.upload_batch_max_files} files per batch",
+            )
+
+        entries = [
+            _BatchEntry(index=i, file=file, meta=meta)
+            for i, (file, meta) in enumerate(zip(files, metadata))
+        ]
+        for entry in entries:
+            entry.content_hash = await hash_upload(entry.file)
+        existing = await self.blobs.get_many(
+            db, user_id=user_id, content_hashes=list({e.content_hash for e in entries})
+        )
+        # Don't keep a pooled connection checked out during the uploads.
+        await db.commit()
+
+        # Store each new hash once, however many times it appears.
+        to_store: dict[bytes, _BatchEntry] = {}
+        for entry in entries:
+            if entry.content_hash not in existing:
+                to_store.setdefault(entry.content_hash, entry)
+        semaphore = asyncio.Semaphore(settings.upload_batch_concurrency)
+
+        async def store(entry: _BatchEntry) -> None:
+            entry.key = content_key(
+                user_id, entry.content_hash, Path(entry.file.filename or "").suffix.lstrip(".")
+            )
+            async with semaphore:
+                try:
+                    entry.normalized_path = await self._store(entry.key, entry.file)
+                    entry.stored = True
+                except Exception:
+                    logger.exception("Failed to store batch item %s", entry.index)
+
+        async with asyncio.TaskGroup() as tg:
+            for entry in to_store.values():
+                tg.create_task(store(entry))
+
+        stored = {h: e for h, e in to_store.items() if e.stored}
+        counts = Counter(e.content_hash for e in entries)
+        try:
+            acquired = await self.blobs.acquire_many(
+                db,
+                user_id=user_id,
+                counts={h: n for h, n in counts.items() if h in existing},
+            )
+            registered = await self.blobs.register_many(
+                db,
+                user_id=user_id,
+                blobs=[
+                    (h, self.storage.public_url(e.key), e.normalized_path, counts[h])
+                    for h, e in stored.items()
+                ],
+            )
+            blobs = {**acquired, **registered}
+            recorded = []
+            for entry in entries:
+                blob = blobs.get(entry.content_hash)
+                if blob is None:
+                    # Either the write failed, or the existing blob was
+                    # deleted between the lookup and now.
+                    entry.error = "Failed to store file"
+                    continue
+                entry.file_path = blob.file_path
+                entry.normalized_path = blob.normalized_path
+                recorded.append(entry)
+            ids = await self.crud.create_many(db, [
+                dict(
+                    user_id=user_id,
+                    file_path=entry.file_path,
+                    normalized_path=entry.normalized_path,
+                    content_hash=entry.content_hash,
+                    **entry.meta.model_dump(),
+                )
+                for entry in recorded
+            ])
+            self.listing_cache.invalidate(user_id)
+        except Exception as e:
+            logger.exception("Failed to record batch upload")
+            raise HTTPException(status_code=500, detail=f"Failed to upload images: {str(e)}")
+        for entry, upload_id in zip(recorded, ids):
+            entry.id = upload_id
+
+        for h, entry in stored.items():
+            if registered[h].file_path != self.storage.public_url(entry.key):
+                # Lost a race with a concurrent upload of the same bytes.
+                await self._delete_blob(self.storage.public_url(entry.key), entry.normalized_path)
+
+        return BatchUploadResponse(items=[
+            BatchUploadItem(
+                index=e.index,
+                filename=e.file.filename,
+                id=e.id,
+                file_path=e.file_path,
+                normalized_path=e.normalized_path,
+                error=e.error,
+            )
+            for e in entries
+        ])
+
+    async def _store(self, key: str, file: UploadFile) -> str | None:
+        """Store the original under ``key`` and, when enabled, derived copies.
+
+        Returns the normalized copy's URL, or ``None`` if there is none.  The
+        original is streamed as before; normalization needs the whole image,
+        so it is skipped for files over ``upload_max_bytes``.  The image is
+        never read into memory here: the process pool reads a temporary copy
+        of the spool from disk.
+        """
+        if self.processor is None:
+            await self.storage.put(key, file, content_type=file.content_type)
+            return None
+
+        size = file.size if file.size is not None else await asyncio.to_thread(_spool_size, file.file)
+        if size > settings.upload_max_bytes:
+            logger.warning("Not normalizing %s: larger than upload_max_bytes", key)
+            await self.storage.put(key, file, content_type=file.content_type)
+            return None
+
+        # Copied before the PUT starts, which reads the same file object.
+        path = await asyncio.to_thread(_copy_to_temp, file.file)
+        try:
+            async with asyncio.TaskGroup() as tg:
+                tg.create_task(self.storage.put(key, file, content_type=file.content_type))
+                normalized = tg.create_task(self._store_derived(key, path))
+        finally:
+            await asyncio.to_thread(os.remove, path)
+        return normalized.result()
+
+    async def _store_derived(self, key: str, path: str) -> str | None:
+        # The original is always kept, so a bad or unsupported image only
+        # means there are no derived copies; variants can still be requested
+        # lazily later.
+        try:
+            images = await self.processor.derive(path)
+            async with asyncio.TaskGroup() as tg:
+                for name, image in images.items():
+                    tg.create_task(self.storage.put(
+                        variant_key(key, name, image.file_ext),
+                        BytesReader(image.data),
+                        content_type=image.content_type,
+                    ))
+        except Exception:
+            logger.exception("Failed to normalize %s", key)
+            return None
+        return self.storage.public_url(variant_key(key, "normalized", self.processor.file_ext))
+
+    async def delete_upload(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        upload_id: int,
+    ) -> ImageUploadDeleteResponse:
+        """Delete an upload; the stored object goes once nothing references it."""
+        row = await self.crud.get_owned(db, user_id=user_id, upload_id=upload_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+
+        unreferenced_url = row.file_path
+        if row.content_hash is not None:
+            unreferenced_url = await self.blobs.release(
+                db, user_id=user_id, content_hash=row.content_hash
+            )
+        # Commits the row delete together with the reference release.
+        await self.crud.delete(db, row)
+        self.listing_cache.invalidate(user_id)
+
+        if unreferenced_url:
+            # Safe even if the same bytes are being uploaded again right
+            # now: every blob gets its own keys (see ``content_key``).
+            await self._delete_blob(unreferenced_url, row.normalized_path)
+        return ImageUploadDeleteResponse(message="Deleted successfully")
+
+    async def get_variant_url(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        upload_id: int,
+        name: str,
+    ) -> str:
+        """Return the storage URL of a variant, rendering and caching it first if needed."""
+        if self.processor is None or name not in self.processor.variants:
+            raise HTTPException(status_code=404, detail="Unknown image variant")
+        row = await self.crud.get_owned(db, user_id=user_id, upload_id=upload_id)
+        if row is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        # Rendering can take a while; don't hold a pooled connection meanwhile.
+        await db.commit()
+
+        key = self._storage_key(row.file_path)
+        if key is None:
+            raise HTTPException(status_code=404, detail="Upload not found")
+        target = variant_key(key, name, self.processor.file_ext)
+        if await self.storage.head(target) is None:
+            render = self._rendering.get(target)
+            if render is None:
+                render = asyncio.ensure_future(self._render_variant(key, target, name))
+                self._rendering[target] = render
+                render.add_done_callback(lambda _: self._rendering.pop(target, None))
+            # Shielded: one client disconnecting must not cancel the render
+            # others are waiting on.
+            await asyncio.shield(render)
+        return self.storage.public_url(target)
+
+    async def _render_variant(self, key: str, target: str, name: str) -> None:
+        info = await self.storage.head(key)
+        if info is None:
+            raise HTTPException(status_code=404, detail="Original image not found")
+        if info.size > settings.upload_max_bytes:
+            raise HTTPException(status_code=422, detail="Image is too large to process")
+        data = await self.storage.get(key)
+        try:
+            images = await self.processor.render(data, {name: self.processor.variants[name]})
+        except Exception:
+            logger.exception("Failed to render %s", target)
+            raise HTTPException(status_code=422, detail="Image could not be processed")
+        image = images[name]
+        await self.storage.put(target, BytesReader(image.data), content_type=image.content_type)
+
+    def _variant_urls(self, row) -> dict[str, str]:
+        return self._variant_urls_for(row.id, row.file_path, row.normalized_path)
+
+    def _variant_urls_for(
+        self, upload_id: int, file_path: str, normalized_path: str | None
+    ) -> dict[str, str]:
+        if self.processor is None or not self.processor.variants:
+            return {}
+        key = self._storage_key(file_path)
+        if key is not None and normalized_path:
+            # Rendered together with the normalized copy at upload.
+            return {
+                name: self.storage.public_url(variant_key(key, name, self.processor.file_ext))
+                for name in self.processor.variants
+            }
+        return {
+            name: VARIANT_ROUTE.format(upload_id=upload_id, name=name)
+            for name in self.processor.variants
+        }
+
+    def _storage_key(self, file_url: str) -> str | None:
+        return key_from_url(self.storage, file_url)
+
+    async def _delete_blob(self, file_url: str, normalized_url: str | None) -> None:
+        """Delete a stored original and every object derived from it."""
+        await self._delete_object(file_url)
+        if normalized_url:
+            await self._delete_object(normalized_url)
+        key = self._storage_key(file_url)
+        if key is not None and self.processor is not None:
+            for name in self.processor.variants:
+                await self._delete_key(variant_key(key, name, self.processor.file_ext))
+
+    async def _delete_object(self, file_url: str) -> None:
+        key = self._storage_key(file_url)
+        if key is None:
+            logger.warning("Not deleting object outside storage: %s", file_url)
+            return
+        await self._delete_key(key)
+
+    async def _delete_key(self, key: str) -> None:
+        try:
+            await self.storage.delete(key)
+        except Exception:
+            # The database is already consistent; an orphaned object only
+            # costs storage.
+            logger.exception("Failed to delete stored object %s", key)
+
+    async def create_presigned_upload(
+        self,
+        user_id: int,
+        request: PresignedUploadRequest,
+    ) -> PresignedUploadResponse:
+        """Reserve a storage key and return a signed URL to upload it directly.
+
+        Nothing is written to the database yet.  The metadata travels inside
+        the signed ``upload_id`` and is recorded by
+        :meth:`complete_presigned_upload` once the object exists.
+        """
+        if not request.content_type.startswith("image/"):
+            raise HTTPException(status_code=400, detail="Only image uploads are allowed")
+
+        file_ext = Path(request.filename).suffix.lstrip(".")
+        key = generate_key(file_ext)
+        expires_in = settings.upload_presign_expires_seconds
+        try:
+            presigned = self.storage.presign_upload(
+                key, content_type=request.content_type, expires_in=expires_in
+            )
+        except PresignNotSupported as e:
+            raise HTTPException(status_code=501, detail=str(e))
+        upload_id = jwt_helper.create_upload_token(
+            {
+                "sub": str(user_id),
+                "key": key,
+                "chapter": request.chapter,
+                "line_start": request.line_start,
+                "line_end": request.line_end,
+                "script_id": request.script_id,
+            },
+            # Outlive the URL so an upload started just before it expires
+            # can still be completed.
+            expires_seconds=expires_in * 2,
+        )
+        return PresignedUploadResponse(
+            upload_id=upload_id,
+            upload_url=presigned.url,
+            method=presigned.method,
+            headers=presigned.headers,
+            expires_in=expires_in,
+        )
+
+    async def complete_presigned_upload(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        upload_id: str,
+    ) -> ImageUploadResponse:
+        """Record a directly uploaded object once it is present in storage.
+
+        Completing the same upload twice, even concurrently, records it once
+        and returns the existing record.
+        """
+        claims = jwt_helper.verify_upload_token(upload_id)
+        if claims is None or claims.get("sub") != str(user_id):
+            raise HTTPException(status_code=400, detail="Invalid or expired upload id")
+
+        key = claims["key"]
+        info = await self.storage.head(key)
+        if info is None:
+            raise HTTPException(status_code=409, detail="Upload not found in storage")
+        if info.size > settings.upload_max_bytes:
+            await self.storage.delete(key)
+            raise HTTPException(status_code=413, detail="Uploaded file is too large")
+
+        file_url = self.storage.public_url(key)
+        try:
+            await self.crud.create_or_get(
+                db,
+                user_id=user_id,
+                file_path=file_url,
+                chapter=claims["chapter"],
+                line_start=claims["line_start"],
+                line_end=claims["line_end"],
+                script_id=claims["script_id"],
+            )
+        except Exception as e:
+            logger.exception("Failed to record presigned upload")
+            raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
+        self.listing_cache.invalidate(user_id)
+        return ImageUploadResponse(file_path=file_url, message="Uploaded successfully")
+
+    async def _record_upload(
+        self,
+        db: AsyncSession,
+        *,
+        user_id: int,
+        file_url: str,
+        chapter: int,
+        line_start: int,
+        line_end: int,
+        script_id: int,
+        content_hash: bytes | None = None,
+        normalized_url: str | None = None,
+    ) -> ImageUploadResponse:
         try:
             await self.crud.create(
                 db,
@@ -40,30 +555,42 @@ class UploadService:
                 line_start=line_start,
                 line_end=line_end,
                 script_id=script_id,
+                content_hash=content_hash,
+                normalized_path=normalized_url,
             )
+            self.listing_cache.invalidate(user_id)
             return ImageUploadResponse(
                 file_path=file_url,
                 message="Uploaded successfully",
+                normalized_path=normalized_url,
             )
         except Exception as e:
             logger.exception("Failed to upload image")
             raise HTTPException(status_code=500, detail=f"Failed to upload image: {str(e)}")
 
-    async def get_user_uploads(self, db: AsyncSession, user_id: int) -> list[ImageUploadRecord]:
-        """Return all uploads for a specific user.
+    async def get_user_uploads(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        query: UploadListQuery | None = None,
+    ) -> UploadPage:
+        """Return one page of a user's uploads, newest first, as an ``UploadPage``.
 
-        The mobile client expects a successful request to return JSON even when
-        no uploads exist.  Instead of raising ``HTTPException`` on an empty
-        result set, simply return an empty list so the response body is ``[]``.
+        An empty result is an empty page (``items == []``, no ``next_cursor``)
+        rather than an ``HTTPException``.  The route serves the same listing
+        through :meth:`get_user_uploads_json`; this model path is kept as the
+        reference that ``scripts/bench_uploads_listing.py`` and the tests
+        compare it against.
         """
-        rows = await self.crud.get_by_user(db, user_id)
-
-        if not rows:
-            return []
-
-        return [
+        query = query or UploadListQuery()
+        rows = await self.crud.get_by_user(db, user_id, **self._listing_filters(query))
+        rows, next_cursor = self._listing_page(rows, query.limit)
+        items = [
             ImageUploadRecord(
+                id=row.id,
                 file_path=row.file_path,
+                normalized_path=row.normalized_path,
+                variants=self._variant_urls(row),
                 status=ProcessingStatus(row.status),
                 chapter=row.chapter,
                 line_start=row.line_start,
@@ -71,7 +598,98 @@ class UploadService:
             )
             for row in rows
         ]
+        return UploadPage(items=items, next_cursor=next_cursor)
+
+    async def get_user_uploads_json(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        query: UploadListQuery | None = None,
+    ) -> tuple[bytes, str | None]:
+        """
+        :meth:`get_user_uploads`, already serialized as the JSON of a
+        ``list[ImageUploadRecord]``, and the next page's cursor.
+
+        Reads only the listed columns as plain rows and encodes them with
+        ``pydantic_core`` directly, without building or validating a model
+        per row.  ``scripts/bench_uploads_listing.py`` compares the two.
+        """
+        query = query or UploadListQuery()
+        rows = await self.crud.get_listing_by_user(db, user_id, **self._listing_filters(query))
+        rows, next_cursor = self._listing_page(rows, query.limit)
+        variants = self._variant_urls_for
+        status_names = _STATUS_NAMES
+        body = to_json([
+            {
+                "id": upload_id,
+                "file_path": file_path,
+                "normalized_path": normalized_path,
+                "variants": variants(upload_id, file_path, normalized_path),
+                "status": status_names[status],
+                "chapter": chapter,
+                "line_start": line_start,
+                "line_end": line_end,
+            }
+            for upload_id, file_path, normalized_path, status, chapter, line_start, line_end, _ in rows
+        ])
+        return body, next_cursor
+
+    @staticmethod
+    def _listing_filters(query: UploadListQuery) -> dict:
+        try:
+            after = decode_cursor(query.cursor) if query.cursor else None
+        except ValueError:
+            raise HTTPException(status_code=400, detail="Invalid cursor")
+        # One extra row tells whether there is a next page.
+        return dict(
+            limit=query.limit + 1,
+            after=after,
+            chapter=query.chapter,
+            script_id=query.script_id,
+            status=query.status,
+            line_from=query.line_from,
+            line_to=query.line_to,
+        )
+
+    @staticmethod
+    def _listing_page(rows: list, limit: int) -> tuple[list, str | None]:
+        if len(rows) <= limit:
+            return rows, None
+        rows = rows[:limit]
+        return rows, encode_cursor(rows[-1].upload_timestamp, rows[-1].id)
+
+    async def get_user_uploads_cached(
+        self,
+        db: AsyncSession,
+        user_id: int,
+        query: UploadListQuery | None = None,
+    ) -> CachedListing:
+        """:meth:`get_user_uploads_json`, cached until the user's uploads change."""
+        query = query or UploadListQuery()
+        key = query.model_dump_json()
+        cached = self.listing_cache.get(user_id, key)
+        if cached is not None:
+            return cached
+
+        token = self.listing_cache.token()
+        body, next_cursor = await self.get_user_uploads_json(db, user_id, query)
+        listing = CachedListing.build(body, next_cursor)
+        self.listing_cache.put(
+            user_id, key, listing, token=token, from_replica=sessionmanager.is_replica(db)
+        )
+        return listing
 
 
-# Create a singleton instance
-upload_service = UploadService()
+# Create singleton instances
+image_processor = (
+    ImageProcessor(
+        workers=settings.image_process_workers,
+        max_edge=settings.image_max_edge,
+        fmt=settings.image_normalize_format,
+        quality=settings.image_normalize_quality,
+        variants=settings.image_variants,
+    )
+    if settings.image_normalize_enabled
+    else None
+)
+upload_service = UploadService(processor=image_processor, listing_cache=listing_cache)
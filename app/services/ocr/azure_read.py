@@ -0,0 +1,38 @@
+import asyncio
+
+from azure.ai.vision.imageanalysis import ImageAnalysisClient
+from azure.ai.vision.imageanalysis.models import VisualFeatures
+from azure.core.credentials import AzureKeyCredential
+
+from app.configs.settings import settings
+from app.services.ocr.base import ExtractedText
+
+
+class AzureTextExtractor:
+    """
+    ``TextExtractor`` backed by the Azure AI Vision Read model.
+
+    The SDK's async client needs aiohttp, which is not a dependency here, so
+    the synchronous client runs in a thread; the worker already bounds how
+    many calls are in flight.
+    """
+
+    def __init__(self, endpoint: str | None = None, key: str | None = None):
+        self.client = ImageAnalysisClient(
+            endpoint=endpoint or settings.azure_vision_endpoint,
+            credential=AzureKeyCredential(key or settings.azure_vision_key),
+        )
+
+    async def extract(self, image: bytes) -> ExtractedText:
+        result = await asyncio.to_thread(
+            self.client.analyze, image_data=image, visual_features=[VisualFeatures.READ]
+        )
+        lines = [
+            line.text
+            for block in (result.read.blocks if result.read else [])
+            for line in block.lines
+        ]
+        return ExtractedText(text="\n".join(lines), lines=lines)
+
+    async def close(self) -> None:
+        await asyncio.to_thread(self.client.close)
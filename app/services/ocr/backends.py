@@ -0,0 +1,12 @@
+from app.services.ocr.base import TextExtractor
+
+
+def build_extractor(backend: str) -> TextExtractor:
+    """Construct the OCR engine named by ``settings.ocr_backend``."""
+    if backend == "azure":
+        from app.services.ocr.azure_read import AzureTextExtractor
+        return AzureTextExtractor()
+    if backend == "fake":
+        from app.services.ocr.fake import FakeTextExtractor
+        return FakeTextExtractor()
+    raise ValueError(f"Unknown OCR backend: {backend!r}")
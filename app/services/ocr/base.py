@@ -0,0 +1,26 @@
+from dataclasses import dataclass, field
+from typing import Protocol
+
+
+@dataclass(frozen=True)
+class ExtractedText:
+    text: str
+    # Recognised lines in reading order.
+    lines: list[str] = field(default_factory=list)
+
+
+class TextExtractor(Protocol):
+    """
+    OCR engine used by the worker.
+
+    Implementations: ``AzureTextExtractor`` (Azure AI Vision Read) and
+    ``FakeTextExtractor``; pick one with ``settings.ocr_backend``.
+    """
+
+    async def extract(self, image: bytes) -> ExtractedText:
+        """Return the text in ``image``; raises on unreadable input or service errors."""
+        ...
+
+    async def close(self) -> None:
+        """Release any pooled resources."""
+        ...
@@ -0,0 +1,30 @@
+from typing import Callable, Optional
+
+from app.services.ocr.base import ExtractedText
+
+
+class FakeTextExtractor:
+    """
+    ``TextExtractor`` that never leaves the process, for tests and local runs.
+
+    Returns ``text`` for every image, or whatever ``respond(image)`` returns;
+    ``respond`` may raise to simulate failures.
+    """
+
+    def __init__(
+        self,
+        text: str = "",
+        respond: Optional[Callable[[bytes], ExtractedText]] = None,
+    ):
+        self.text = text
+        self.respond = respond
+        self.calls: list[bytes] = []
+
+    async def extract(self, image: bytes) -> ExtractedText:
+        self.calls.append(image)
+        if self.respond is not None:
+            return self.respond(image)
+        return ExtractedText(text=self.text, lines=self.text.splitlines())
+
+    async def close(self) -> None:
+        return None
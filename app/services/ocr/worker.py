@@ -0,0 +1,170 @@
+import asyncio
+import signal
+from datetime import datetime, timedelta, timezone
+from contextlib import AbstractAsyncContextManager
+from typing import Callable, Optional
+
+from sqlalchemy.ext.asyncio import AsyncSession
+
+from app.configs.constants import ProcessingStatus
+from app.configs.settings import settings
+from app.core.logger import logger
+from app.db.crud.image_ocr_results import ImageOcrResultCRUD
+from app.db.crud.image_uploads import ImageUploadCRUD
+from app.db.models.image_uploads import ImageUploads
+from app.db.pg_engine import sessionmanager
+from app.services.ocr.backends import build_extractor
+from app.services.ocr.base import TextExtractor
+from app.services.storage.backends import close_storage, get_storage
+from app.services.storage.base import StorageBackend, key_from_url
+
+SessionFactory = Callable[[], AbstractAsyncContextManager[AsyncSession]]
+
+
+class OcrWorker:
+    """
+    Moves uploads from UPLOADED through PROCESSING to COMPLETED (or FAILED).
+
+    Each poll claims a batch in its own short transaction, so no row lock
+    or pooled connection is held while images are downloaded and read.
+    Extraction runs with at most ``concurrency`` images in flight.  Start
+    more worker processes to scale out; claims never overlap.
+    """
+
+    def __init__(
+        self,
+        extractor: TextExtractor,
+        *,
+        storage: Optional[StorageBackend] = None,
+        sessions: Optional[SessionFactory] = None,
+        batch_size: int = settings.ocr_batch_size,
+        concurrency: int = settings.ocr_concurrency,
+        poll_interval: float = settings.ocr_poll_interval_seconds,
+        lease_seconds: int = settings.ocr_lease_seconds,
+        max_attempts: int = settings.ocr_max_attempts,
+        retry_backoff: float = settings.ocr_retry_backoff_seconds,
+    ):
+        self.extractor = extractor
+        self._storage = storage
+        self.sessions = sessions or sessionmanager.session
+        self.uploads = ImageUploadCRUD()
+        self.results = ImageOcrResultCRUD()
+        self.batch_size = batch_size
+        self.poll_interval = poll_interval
+        self.lease_seconds = lease_seconds
+        self.max_attempts = max_attempts
+        self.retry_backoff = retry_backoff
+        self._semaphore = asyncio.Semaphore(concurrency)
+
+    @property
+    def storage(self) -> StorageBackend:
+        return self._storage or get_storage()
+
+    async def run_once(self) -> int:
+        """Claim and process one batch; returns how many uploads were claimed."""
+        async with self.sessions() as db:
+            rows = await self.uploads.claim_pending(
+                db,
+                limit=self.batch_size,
+                lease_seconds=self.lease_seconds,
+                max_attempts=self.max_attempts,
+            )
+        if rows:
+            async with asyncio.TaskGroup() as tg:
+                for row in rows:
+                    tg.create_task(self._process(row))
+        return len(rows)
+
+    async def run(self, stop: asyncio.Event) -> None:
+        """Poll until ``stop`` is set, sleeping only when there was nothing to do."""
+        while not stop.is_set():
+            try:
+                claimed = await self.run_once()
+            except Exception:
+                logger.exception("OCR poll failed")
+                claimed = 0
+            if claimed < self.batch_size:
+                try:
+                    await asyncio.wait_for(stop.wait(), timeout=self.poll_interval)
+                except TimeoutError:
+                    pass
+
+    async def _process(self, row: ImageUploads) -> None:
+        # Rows share a TaskGroup: an escaping error would cancel the rest of
+        # the batch mid-OCR and cost each of them an attempt.
+        try:
+            await self._process_row(row)
+        except Exception:
+            logger.exception(
+                "Could not record OCR outcome for upload %s; retried once its lease expires",
+                row.id,
+            )
+
+    async def _process_row(self, row: ImageUploads) -> None:
+        async with self._semaphore:
+            try:
+                image = await self._load(row)
+                extracted = await self.extractor.extract(image)
+            except Exception:
+                logger.exception("OCR failed for upload %s (attempt %s)", row.id, row.attempts)
+                # Give up after max_attempts; otherwise queue it again, later.
+                if row.attempts >= self.max_attempts:
+                    status, retry_at = ProcessingStatus.FAILED, None
+                else:
+                    status, retry_at = ProcessingStatus.UPLOADED, self._retry_at(row.attempts)
+                async with self.sessions() as db:
+                    await self.uploads.finish_processing(
+                        db,
+                        upload_id=row.id,
+                        attempts=row.attempts,
+                        status=status,
+                        next_attempt_at=retry_at,
+                    )
+                return
+
+        async with self.sessions() as db:
+            owned = await self.uploads.finish_processing(
+                db, upload_id=row.id, attempts=row.attempts, status=ProcessingStatus.COMPLETED
+            )
+            if not owned:
+                logger.warning("Lost claim on upload %s; discarding OCR result", row.id)
+                return
+            await self.results.save(
+                db, upload_id=row.id, text=extracted.text, lines=extracted.lines
+            )
+
+    def _retry_at(self, attempts: int) -> datetime:
+        delay = self.retry_backoff * 2 ** (attempts - 1)
+        return datetime.now(timezone.utc) + timedelta(seconds=delay)
+
+    async def _load(self, row: ImageUploads) -> bytes:
+        # The normalized copy is smaller and already upright.
+        for url in (row.normalized_path, row.file_path):
+            key = key_from_url(self.storage, url.strip()) if url else None
+            if key is None:
+                continue
+            data = await self.storage.get(key)
+            if data is not None:
+                return data
+        raise FileNotFoundError(f"No stored image for upload {row.id}")
+
+
+async def main() -> None:
+    extractor = build_extractor(settings.ocr_backend)
+    worker = OcrWorker(extractor)
+    stop = asyncio.Event()
+    loop = asyncio.get_running_loop()
+    for sig in (signal.SIGINT, signal.SIGTERM):
+        loop.add_signal_handler(sig, stop.set)
+
+    logger.info("OCR worker started (backend=%s)", settings.ocr_backend)
+    try:
+        await worker.run(stop)
+    finally:
+        await extractor.close()
+        await close_storage()
+        await sessionmanager.close()
+
+
+if __name__ == "__main__":
+    asyncio.run(main())
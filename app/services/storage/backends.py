@@ -0,0 +1,39 @@
+from typing import Optional
+
+from app.configs.settings import settings
+from app.services.storage.base import StorageBackend
+
+_storage: Optional[StorageBackend] = None
+
+
+def build_storage(backend: str) -> StorageBackend:
+    """Construct the storage backend named by ``settings.storage_backend``."""
+    if backend == "do_spaces":
+        from app.services.storage.do_space import DOSpace
+        return DOSpace()
+    if backend == "local":
+        from app.services.storage.local_disk import LocalDiskStorage
+        return LocalDiskStorage(
+            root=settings.storage_local_root,
+            base_url=settings.storage_local_base_url,
+            signing_key=settings.storage_local_signing_key,
+        )
+    if backend == "memory":
+        from app.services.storage.in_memory import InMemoryStorage
+        return InMemoryStorage()
+    raise ValueError(f"Unknown storage backend: {backend!r}")
+
+
+def get_storage() -> StorageBackend:
+    """Return the process-wide storage backend, creating it on first use."""
+    global _storage
+    if _storage is None:
+        _storage = build_storage(settings.storage_backend)
+    return _storage
+
+
+async def close_storage() -> None:
+    global _storage
+    if _storage is not None:
+        await _storage.close()
+        _storage = None
@@ -0,0 +1,126 @@
+import io
+from dataclasses import dataclass
+from typing import AsyncIterator, Optional, Protocol
+from uuid import uuid4
+
+
+class AsyncReader(Protocol):
+    """Anything with an async ``read(size)``, e.g. FastAPI's ``UploadFile``."""
+
+    async def read(self, size: int = -1) -> bytes: ...
+
+
+class BytesReader:
+    """``AsyncReader`` over bytes already in memory."""
+
+    def __init__(self, data: bytes):
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buf.read(size)
+
+
+@dataclass(frozen=True)
+class ObjectInfo:
+    key: str
+    size: int
+    content_type: Optional[str] = None
+
+
+class PresignNotSupported(Exception):
+    """The backend cannot accept uploads sent straight to it by clients."""
+
+
+@dataclass(frozen=True)
+class PresignedUpload:
+    """A signed request a client can use to upload an object directly."""
+
+    url: str
+    method: str
+    headers: dict[str, str]
+
+
+class StorageBackend(Protocol):
+    """
+    Object storage used by the upload path.
+
+    Implementations: ``DOSpace`` (DigitalOcean Spaces / S3), ``LocalDiskStorage``
+    and ``InMemoryStorage``; pick one with ``settings.storage_backend``.
+    """
+
+    async def put(
+        self, key: str, source: AsyncReader, content_type: Optional[str] = None
+    ) -> None:
+        """Stream ``source`` to ``key``, overwriting any existing object."""
+        ...
+
+    async def get(self, key: str) -> Optional[bytes]:
+        """Return the object's bytes, or ``None`` if it does not exist."""
+        ...
+
+    def stream(self, key: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """Yield the object in chunks; raises ``FileNotFoundError`` if missing."""
+        ...
+
+    async def delete(self, key: str) -> bool:
+        """Delete the object; returns ``False`` if it did not exist."""
+        ...
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        """Return object metadata, or ``None`` if it does not exist."""
+        ...
+
+    def presign(
+        self,
+        key: str,
+        *,
+        method: str = "GET",
+        expires_in: int = 3600,
+        headers: Optional[dict[str, str]] = None,
+    ) -> str:
+        """Return a time-limited URL allowing ``method`` on ``key``."""
+        ...
+
+    def presign_upload(
+        self, key: str, *, content_type: str, expires_in: int = 900
+    ) -> PresignedUpload:
+        """
+        Return a signed PUT the client sends, with exactly these headers.
+        Raises :class:`PresignNotSupported` if nothing would accept it.
+        """
+        ...
+
+    def public_url(self, key: str) -> str:
+        """Return the public URL clients use to fetch ``key``."""
+        ...
+
+    async def close(self) -> None:
+        """Release any pooled resources."""
+        ...
+
+
+def generate_key(file_ext: str) -> str:
+    return f"uploads/{uuid4()}.{file_ext}"
+
+
+def content_key(user_id: int, content_hash: bytes, file_ext: str) -> str:
+    """
+    Key for a new deduplicated blob: the user and content hash, plus a
+    suffix unique to this copy.  A re-upload of bytes whose blob is being
+    deleted therefore never writes to the key the delete is about to remove.
+    """
+    return f"uploads/{user_id}/{content_hash.hex()}-{uuid4().hex}.{file_ext}"
+
+
+def variant_key(key: str, variant: str, file_ext: str) -> str:
+    """Key of a derived object stored next to ``key``, e.g. ``<stem>.normalized.webp``."""
+    stem = key.rsplit(".", 1)[0] if "." in key.rsplit("/", 1)[-1] else key
+    return f"{stem}.{variant}.{file_ext}"
+
+
+def key_from_url(storage: StorageBackend, url: str) -> Optional[str]:
+    """Inverse of ``storage.public_url``; ``None`` for URLs outside ``storage``."""
+    prefix = storage.public_url("")
+    if not url.startswith(prefix):
+        return None
+    return url[len(prefix):]
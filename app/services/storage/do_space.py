@@ -1,132 +1,217 @@
-import os
 import asyncio
-from uuid import uuid4
-from typing import Optional
-import boto3
-from botocore.client import Config
-from botocore.exceptions import ClientError
+from typing import AsyncIterator, Optional
+
+import httpx
+
 from app.configs.settings import settings
 from app.core.logger import logger
+from app.core.metrics import timed
+from app.services.storage.base import AsyncReader, ObjectInfo, PresignedUpload, generate_key
+from app.services.storage.s3_client import AsyncS3Client, S3Error
 
 
 class DOSpace:
-    def __init__(self):
-        self.session = boto3.session.Session()
-        self.client = self.session.client(
-            's3',
-            region_name=settings.do_spaces_region,
+    """``StorageBackend`` for DigitalOcean Spaces (or any S3 compatible store)."""
+
+    def __init__(self, transport: Optional[httpx.AsyncBaseTransport] = None):
+        self.client = AsyncS3Client(
             endpoint_url=settings.do_spaces_endpoint,
-            aws_access_key_id=settings.do_spaces_key,
-            aws_secret_access_key=settings.do_spaces_secret,
-            config=Config(s3={'addressing_style': 'virtual'})
+            region=settings.do_spaces_region,
+            bucket=settings.do_spaces_bucket,
+            access_key=settings.do_spaces_key,
+            secret_key=settings.do_spaces_secret,
+            addressing_style='virtual',
+            max_connections=settings.do_spaces_max_connections,
+            max_keepalive_connections=settings.do_spaces_max_keepalive_connections,
+            keepalive_expiry=settings.do_spaces_keepalive_expiry,
+            timeout=settings.do_spaces_timeout,
+            max_retries=settings.do_spaces_max_retries,
+            transport=transport,
         )
         self.bucket = settings.do_spaces_bucket
-
-    async def upload_file(self, file_content: bytes, file_ext: str) -> str:
+        self.part_size = settings.do_spaces_part_size_mb * 1024 * 1024
+        self.max_concurrency = settings.do_spaces_max_concurrency
+
+    async def close(self) -> None:
+        """Release the pooled HTTP connections."""
+        await self.client.aclose()
+
+    async def upload_file(
+        self,
+        file: AsyncReader,
+        file_ext: str,
+        content_type: Optional[str] = None,
+    ) -> str:
         """
-        Async upload a file to Digital Ocean Spaces and return its public URL.
+        Stream a file to a freshly generated key and return its public URL.
         """
-        temp_file = f"/tmp/{uuid4()}.{file_ext}"
-        try:
-            # 1) write file off the event loop
-            await asyncio.to_thread(self._write_temp, temp_file, file_content)
+        key = generate_key(file_ext)
+        await self.put(key, file, content_type)
+        return self.public_url(key)
 
-            # 2) generate storage key
-            key = self._generate_key(file_ext)
+    async def put(
+        self, key: str, source: AsyncReader, content_type: Optional[str] = None
+    ) -> None:
+        """
+        Stream ``source`` to Digital Ocean Spaces.
 
-            # 3) upload off the event loop
-            await asyncio.to_thread(
-                self.client.upload_file,
-                temp_file,
-                self.bucket,
-                key,
-                ExtraArgs={'ACL': 'public-read'}
-            )
+        The source is read ``part_size`` bytes at a time.  Anything that fits
+        in a single part goes up with one ``PutObject``; larger files use a
+        multipart upload with up to ``max_concurrency`` parts in flight, so
+        memory use is bounded by ``part_size * (max_concurrency + 1)``
+        regardless of the file size.
+        """
+        headers = {'x-amz-acl': 'public-read'}
+        if content_type:
+            headers['Content-Type'] = content_type
 
-            return self._get_public_url(key)
+        try:
+            with timed("storage_upload"):
+                first_chunk = await source.read(self.part_size)
+                if len(first_chunk) < self.part_size:
+                    await self.client.put_object(key, first_chunk, headers=headers)
+                else:
+                    await self._multipart_upload(key, first_chunk, source, headers)
 
         except Exception as e:
             logger.exception("Failed to upload file to DO Spaces")
             raise Exception("Failed to upload file") from e
 
-        finally:
-            if os.path.exists(temp_file):
-                # cleanup off the event loop
-                await asyncio.to_thread(os.remove, temp_file)
-
-    def _write_temp(self, path: str, content: bytes):
-        with open(path, "wb") as f:
-            f.write(content)
-
-    def _generate_key(self, file_ext: str) -> str:
-        return f"uploads/{uuid4()}.{file_ext}"
-
-    def _get_public_url(self, key: str) -> str:
+    async def _multipart_upload(
+        self,
+        key: str,
+        first_chunk: bytes,
+        file: AsyncReader,
+        headers: dict[str, str],
+    ) -> None:
+        upload_id = await self.client.create_multipart_upload(key, headers=headers)
+        try:
+            parts = await self._upload_parts(key, upload_id, first_chunk, file)
+            await self.client.complete_multipart_upload(key, upload_id, parts)
+        except BaseException:
+            # Never leave orphaned parts behind: they are billed until aborted.
+            try:
+                await self.client.abort_multipart_upload(key, upload_id)
+            except Exception:
+                logger.exception("Failed to abort multipart upload %s", upload_id)
+            raise
+
+    async def _upload_parts(
+        self,
+        key: str,
+        upload_id: str,
+        first_chunk: bytes,
+        file: AsyncReader,
+    ) -> list[tuple[int, str]]:
+        parts: list[tuple[int, str]] = []
+        # Acquired before reading the next chunk, so only ``max_concurrency``
+        # unsent parts can ever be buffered.
+        slots = asyncio.Semaphore(self.max_concurrency)
+
+        async def send(part_number: int, chunk: bytes) -> None:
+            try:
+                etag = await self.client.upload_part(key, upload_id, part_number, chunk)
+                parts.append((part_number, etag))
+            finally:
+                slots.release()
+
+        # A failing part cancels the reader loop and every sibling upload.
+        async with asyncio.TaskGroup() as tg:
+            chunk = first_chunk
+            part_number = 1
+            while chunk:
+                await slots.acquire()
+                tg.create_task(send(part_number, chunk))
+                part_number += 1
+                chunk = await file.read(self.part_size)
+
+        return sorted(parts)
+
+    def public_url(self, key: str) -> str:
         return f"{settings.do_spaces_endpoint}/{self.bucket}/{key}"
 
-    def get_file(self, key: str) -> Optional[bytes]:
+    async def get(self, key: str) -> Optional[bytes]:
         """
         Get a file from Digital Ocean Spaces.
-        
+
         Args:
             key (str): The key of the file to get
-            
+
         Returns:
             Optional[bytes]: The file content if found, None otherwise
-            
+
         Raises:
             Exception: If the retrieval fails
         """
         try:
-            response = self.client.get_object(
-                Bucket=self.bucket,
-                Key=key
-            )
-            return response['Body'].read()
-        except ClientError as e:
-            if e.response['Error']['Code'] == 'NoSuchKey':
-                return None
+            return await self.client.get_object(key)
+        except Exception as e:
             logger.exception("Failed to get file")
             raise Exception("Failed to get file") from e
 
-    def delete_file(self, key: str) -> bool:
+    async def stream(self, key: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        """
+        Yield a file from Digital Ocean Spaces in chunks.
+
+        Raises:
+            FileNotFoundError: If the key does not exist
+        """
+        try:
+            async for chunk in self.client.iter_object(key, chunk_size=chunk_size):
+                yield chunk
+        except S3Error as e:
+            if e.status_code == 404:
+                raise FileNotFoundError(key) from e
+            raise
+
+    async def delete(self, key: str) -> bool:
         """
         Delete a file from Digital Ocean Spaces.
-        
-        Args:
-            key (str): The key of the file to delete
-            
-        Returns:
-            bool: True if deletion was successful
-            
+
+        S3 deletes are idempotent and do not report whether the key existed,
+        so this returns ``True`` whenever the request succeeds.
+
         Raises:
             Exception: If the deletion fails
         """
         try:
-            self.client.delete_object(
-                Bucket=self.bucket,
-                Key=key
-            )
+            await self.client.delete_object(key)
             return True
         except Exception as e:
             logger.exception("Failed to delete file")
             raise Exception("Failed to delete file") from e
 
-    def get_file_url(self, key: str) -> Optional[str]:
+    async def head(self, key: str) -> Optional[ObjectInfo]:
         """
-        Get the public URL of an existing file.
-        
-        Args:
-            key (str): The key of the file
-            
+        Get the size and content type of an existing file.
+
         Returns:
-            Optional[str]: The public URL if the file exists, None otherwise
+            Optional[ObjectInfo]: The metadata if the file exists, None otherwise
         """
-        try:
-            self.client.head_object(Bucket=self.bucket, Key=key)
-            return self._get_public_url(key)
-        except:
+        headers = await self.client.head_object(key)
+        if headers is None:
             return None
+        return ObjectInfo(
+            key=key,
+            size=int(headers.get('content-length', 0)),
+            content_type=headers.get('content-type'),
+        )
 
-
-do_space = DOSpace()
\ No newline at end of file
+    def presign(
+        self,
+        key: str,
+        *,
+        method: str = "GET",
+        expires_in: int = 3600,
+        headers: Optional[dict[str, str]] = None,
+    ) -> str:
+        return self.client.presign(method, key, expires_in=expires_in, headers=headers)
+
+    def presign_upload(
+        self, key: str, *, content_type: str, expires_in: int = 900
+    ) -> PresignedUpload:
+        # The ACL header is signed too, so objects uploaded directly end up
+        # public-read exactly like the ones streamed through the API.
+        headers = {'Content-Type': content_type, 'x-amz-acl': 'public-read'}
+        url = self.presign(key, method="PUT", expires_in=expires_in, headers=headers)
+        return PresignedUpload(url=url, method="PUT", headers=headers)
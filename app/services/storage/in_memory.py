@@ -0,0 +1,75 @@
+import time
+from typing import AsyncIterator, Optional
+from urllib.parse import urlencode
+
+from app.services.storage.base import AsyncReader, ObjectInfo, PresignedUpload, PresignNotSupported
+
+READ_CHUNK = 1024 * 1024
+
+
+class InMemoryStorage:
+    """
+    ``StorageBackend`` that keeps objects in a dict.
+
+    Objects live only as long as the process; use it for tests and for
+    benchmarking the upload path with storage cost taken out of the picture.
+    """
+
+    def __init__(self, base_url: str = "memory://storage"):
+        self.base_url = base_url.rstrip("/")
+        self.objects: dict[str, tuple[bytes, Optional[str]]] = {}
+
+    async def put(
+        self, key: str, source: AsyncReader, content_type: Optional[str] = None
+    ) -> None:
+        chunks = []
+        while chunk := await source.read(READ_CHUNK):
+            chunks.append(chunk)
+        self.objects[key] = (b"".join(chunks), content_type)
+
+    async def get(self, key: str) -> Optional[bytes]:
+        obj = self.objects.get(key)
+        return obj[0] if obj else None
+
+    async def stream(self, key: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        if key not in self.objects:
+            raise FileNotFoundError(key)
+        data = self.objects[key][0]
+        for start in range(0, len(data), chunk_size):
+            yield data[start:start + chunk_size]
+
+    async def delete(self, key: str) -> bool:
+        return self.objects.pop(key, None) is not None
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        obj = self.objects.get(key)
+        if obj is None:
+            return None
+        return ObjectInfo(key=key, size=len(obj[0]), content_type=obj[1])
+
+    def presign(
+        self,
+        key: str,
+        *,
+        method: str = "GET",
+        expires_in: int = 3600,
+        headers: Optional[dict[str, str]] = None,
+    ) -> str:
+        query = urlencode({"method": method, "expires": int(time.time()) + expires_in})
+        return f"{self.public_url(key)}?{query}"
+
+    def presign_upload(
+        self, key: str, *, content_type: str, expires_in: int = 900
+    ) -> PresignedUpload:
+        # Nothing outside the process can reach the dict, so a client would
+        # have nowhere to PUT to.
+        raise PresignNotSupported(
+            "Direct uploads are not supported with in-memory storage; "
+            "upload through POST /api/image/upload/ instead"
+        )
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def close(self) -> None:
+        return None
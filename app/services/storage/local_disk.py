@@ -0,0 +1,180 @@
+import asyncio
+import hashlib
+import hmac
+import io
+import mimetypes
+import os
+import tempfile
+import time
+from pathlib import Path
+from typing import AsyncIterator, BinaryIO, Optional
+from urllib.parse import urlencode
+
+from app.services.storage.base import AsyncReader, ObjectInfo, PresignedUpload, PresignNotSupported
+
+COPY_CHUNK = 1024 * 1024
+
+
+def _source_file(source: AsyncReader) -> Optional[BinaryIO]:
+    """
+    Return the OS-level file behind ``source`` if it is worth handing to
+    ``os.sendfile``.
+
+    ``UploadFile`` wraps a ``SpooledTemporaryFile``.  Anything under one copy
+    chunk is left to the regular copy, which moves it in a single read; a
+    larger spool is rolled over to disk (a no-op if it already is) so its
+    descriptor can be used.
+    """
+    f = getattr(source, "file", None)
+    if f is None:
+        return None
+    try:
+        position = f.tell()
+        remaining = f.seek(0, os.SEEK_END) - position
+        f.seek(position)
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    if remaining < COPY_CHUNK:
+        return None
+    if isinstance(f, tempfile.SpooledTemporaryFile):
+        f.rollover()
+    try:
+        f.fileno()
+    except (AttributeError, OSError, io.UnsupportedOperation):
+        return None
+    return f
+
+
+def _sendfile(src: BinaryIO, out_fd: int) -> None:
+    """Copy the rest of ``src`` into ``out_fd`` inside the kernel."""
+    # ``tell()`` rather than the descriptor offset: the file object may have
+    # read ahead into its own buffer.
+    offset = src.tell()
+    in_fd = src.fileno()
+    remaining = os.fstat(in_fd).st_size - offset
+    while remaining > 0:
+        sent = os.sendfile(out_fd, in_fd, offset, remaining)
+        if sent == 0:
+            break
+        offset += sent
+        remaining -= sent
+    src.seek(offset)
+
+
+class LocalDiskStorage:
+    """
+    ``StorageBackend`` that keeps objects under a directory on local disk.
+
+    Meant for development, benchmarks and load tests of the full upload path
+    without a network.  When the upload has already been spooled to disk,
+    ``put`` copies it with ``os.sendfile`` so the bytes never enter Python.
+    """
+
+    def __init__(self, root: str, base_url: str, signing_key: str):
+        self.root = Path(root).resolve()
+        self.base_url = base_url.rstrip("/")
+        self._signing_key = signing_key.encode("utf-8")
+        self.root.mkdir(parents=True, exist_ok=True)
+
+    def _path(self, key: str) -> Path:
+        path = (self.root / key).resolve()
+        if not path.is_relative_to(self.root) or path == self.root:
+            raise ValueError(f"Invalid storage key: {key!r}")
+        return path
+
+    async def put(
+        self, key: str, source: AsyncReader, content_type: Optional[str] = None
+    ) -> None:
+        path = self._path(key)
+        await asyncio.to_thread(path.parent.mkdir, parents=True, exist_ok=True)
+        # Write to a sibling temp file and rename, so readers never observe a
+        # partially written object.
+        fd, tmp_path = await asyncio.to_thread(tempfile.mkstemp, dir=path.parent)
+        try:
+            src = _source_file(source)
+            copied = False
+            if src is not None:
+                try:
+                    await asyncio.to_thread(_sendfile, src, fd)
+                    copied = True
+                except OSError:
+                    # sendfile between regular files is Linux-only.
+                    await asyncio.to_thread(os.ftruncate, fd, 0)
+                    await asyncio.to_thread(os.lseek, fd, 0, os.SEEK_SET)
+            if not copied:
+                while chunk := await source.read(COPY_CHUNK):
+                    await asyncio.to_thread(os.write, fd, chunk)
+            await asyncio.to_thread(os.close, fd)
+            fd = -1
+            await asyncio.to_thread(os.replace, tmp_path, path)
+        except BaseException:
+            if fd != -1:
+                os.close(fd)
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    async def get(self, key: str) -> Optional[bytes]:
+        try:
+            return await asyncio.to_thread(self._path(key).read_bytes)
+        except FileNotFoundError:
+            return None
+
+    async def stream(self, key: str, chunk_size: int = 64 * 1024) -> AsyncIterator[bytes]:
+        f = await asyncio.to_thread(open, self._path(key), "rb")
+        try:
+            while chunk := await asyncio.to_thread(f.read, chunk_size):
+                yield chunk
+        finally:
+            f.close()
+
+    async def delete(self, key: str) -> bool:
+        try:
+            await asyncio.to_thread(os.remove, self._path(key))
+            return True
+        except FileNotFoundError:
+            return False
+
+    async def head(self, key: str) -> Optional[ObjectInfo]:
+        try:
+            st = await asyncio.to_thread(os.stat, self._path(key))
+        except FileNotFoundError:
+            return None
+        return ObjectInfo(key=key, size=st.st_size, content_type=mimetypes.guess_type(key)[0])
+
+    def presign(
+        self,
+        key: str,
+        *,
+        method: str = "GET",
+        expires_in: int = 3600,
+        headers: Optional[dict[str, str]] = None,
+    ) -> str:
+        expires = int(time.time()) + expires_in
+        query = urlencode({
+            "method": method,
+            "expires": expires,
+            "signature": self.signature(key, method, expires),
+        })
+        return f"{self.public_url(key)}?{query}"
+
+    def signature(self, key: str, method: str, expires: int) -> str:
+        """HMAC over the presigned parameters, for whatever serves ``base_url``."""
+        message = f"{method}\n{key}\n{expires}".encode("utf-8")
+        return hmac.new(self._signing_key, message, hashlib.sha256).hexdigest()
+
+    def presign_upload(
+        self, key: str, *, content_type: str, expires_in: int = 900
+    ) -> PresignedUpload:
+        # The app does not serve ``base_url``, so a signed PUT would have
+        # nowhere to go; fail up front instead of handing out a dead URL.
+        raise PresignNotSupported(
+            "Direct uploads are not supported with local disk storage; "
+            "upload through POST /api/image/upload/ instead"
+        )
+
+    def public_url(self, key: str) -> str:
+        return f"{self.base_url}/{key}"
+
+    async def close(self) -> None:
+        return None
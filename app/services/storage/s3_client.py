@@ -0,0 +1,312 @@
+import asyncio
+import random
+from typing import AsyncIterator, Optional
+from urllib.parse import quote, urlencode, urlsplit
+from xml.etree import ElementTree
+from xml.sax.saxutils import escape
+
+import httpx
+from botocore.auth import S3SigV4Auth, S3SigV4QueryAuth
+from botocore.awsrequest import AWSRequest
+from botocore.config import Config
+from botocore.credentials import Credentials
+
+from app.core.logger import logger
+
+# Status codes S3 (and Spaces) return for throttling or transient failures.
+RETRYABLE_STATUS = {429, 500, 502, 503, 504}
+
+
+class S3Error(Exception):
+    """Error response returned by an S3 compatible endpoint."""
+
+    def __init__(self, status_code: int, code: str, message: str = ""):
+        super().__init__(f"{status_code} {code}: {message}")
+        self.status_code = status_code
+        self.code = code
+        self.message = message
+
+
+def _local_name(tag: str) -> str:
+    return tag.rsplit("}", 1)[-1]
+
+
+def _find_text(xml: bytes, name: str) -> Optional[str]:
+    """Return the text of the first element called ``name``, ignoring namespaces."""
+    root = ElementTree.fromstring(xml)
+    for el in root.iter():
+        if _local_name(el.tag) == name:
+            return el.text
+    return None
+
+
+class AsyncS3Client:
+    """
+    Minimal asyncio S3 client on top of ``httpx``.
+
+    Requests are SigV4 signed with botocore's signer and sent over a shared
+    keep-alive connection pool, so concurrency is bounded by the pool limits
+    rather than by a thread pool.  Transient failures (connection errors,
+    timeouts, 5xx and throttling responses) are retried with exponential
+    backoff and jitter.  Pass ``transport`` to run against an in-process
+    stand-in instead of the network.
+    """
+
+    def __init__(
+        self,
+        *,
+        endpoint_url: str,
+        region: str,
+        bucket: str,
+        access_key: str,
+        secret_key: str,
+        addressing_style: str = "virtual",
+        max_connections: int = 64,
+        max_keepalive_connections: int = 32,
+        keepalive_expiry: float = 30.0,
+        timeout: float = 30.0,
+        max_retries: int = 3,
+        retry_backoff: float = 0.2,
+        transport: Optional[httpx.AsyncBaseTransport] = None,
+    ):
+        self.bucket = bucket
+        self.max_retries = max_retries
+        self.retry_backoff = retry_backoff
+
+        endpoint = urlsplit(endpoint_url)
+        if addressing_style == "virtual":
+            self._base_url = f"{endpoint.scheme}://{bucket}.{endpoint.netloc}"
+            self._base_path = ""
+        else:
+            self._base_url = f"{endpoint.scheme}://{endpoint.netloc}"
+            self._base_path = f"/{bucket}"
+
+        self._region = region
+        self._credentials = Credentials(access_key, secret_key)
+        self._signer = S3SigV4Auth(self._credentials, "s3", region)
+        # Bodies are not hashed for the signature; TLS already protects them
+        # and hashing every part would cost a full extra pass over the data.
+        self._signing_config = Config(s3={"payload_signing_enabled": False})
+
+        self._http = httpx.AsyncClient(
+            limits=httpx.Limits(
+                max_connections=max_connections,
+                max_keepalive_connections=max_keepalive_connections,
+                keepalive_expiry=keepalive_expiry,
+            ),
+            timeout=httpx.Timeout(timeout),
+            transport=transport,
+        )
+
+    async def aclose(self) -> None:
+        await self._http.aclose()
+
+    # -------------------------
+    # Object operations
+    # -------------------------
+    async def put_object(
+        self,
+        key: str,
+        body: bytes,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> None:
+        await self._request("PUT", key, headers=headers, body=body, timeout=timeout)
+
+    async def get_object(self, key: str, *, timeout: Optional[float] = None) -> Optional[bytes]:
+        try:
+            resp = await self._request("GET", key, timeout=timeout)
+        except S3Error as e:
+            if e.status_code == 404:
+                return None
+            raise
+        return resp.content
+
+    async def iter_object(
+        self,
+        key: str,
+        *,
+        chunk_size: int = 64 * 1024,
+        timeout: Optional[float] = None,
+    ) -> AsyncIterator[bytes]:
+        """
+        Yield an object's body in chunks without buffering it.
+
+        Unlike the other calls this one is not retried: a failure mid-stream
+        cannot be replayed transparently to the consumer.
+        """
+        url = self._url(key)
+        headers = self._sign("GET", url, {}, b"")
+        request_timeout = httpx.Timeout(timeout) if timeout is not None else httpx.USE_CLIENT_DEFAULT
+        async with self._http.stream("GET", url, headers=headers, timeout=request_timeout) as resp:
+            if resp.status_code >= 300:
+                await resp.aread()
+                raise self._error(resp)
+            async for chunk in resp.aiter_bytes(chunk_size):
+                yield chunk
+
+    async def head_object(
+        self, key: str, *, timeout: Optional[float] = None
+    ) -> Optional[dict[str, str]]:
+        try:
+            resp = await self._request("HEAD", key, timeout=timeout)
+        except S3Error as e:
+            if e.status_code == 404:
+                return None
+            raise
+        return dict(resp.headers)
+
+    async def delete_object(self, key: str, *, timeout: Optional[float] = None) -> None:
+        await self._request("DELETE", key, timeout=timeout)
+
+    def presign(
+        self,
+        method: str,
+        key: str,
+        *,
+        expires_in: int = 3600,
+        headers: Optional[dict[str, str]] = None,
+    ) -> str:
+        """
+        Return a query-string signed URL for ``method`` on ``key``.
+
+        Any ``headers`` are part of the signature, so the caller of the URL
+        must send them unchanged.  Signing is local; no request is made.
+        """
+        request = AWSRequest(method=method, url=self._url(key), headers=headers or {})
+        S3SigV4QueryAuth(self._credentials, "s3", self._region, expires=expires_in).add_auth(request)
+        return request.url
+
+    # -------------------------
+    # Multipart uploads
+    # -------------------------
+    async def create_multipart_upload(
+        self,
+        key: str,
+        *,
+        headers: Optional[dict[str, str]] = None,
+        timeout: Optional[float] = None,
+    ) -> str:
+        resp = await self._request(
+            "POST", key, params={"uploads": ""}, headers=headers, timeout=timeout
+        )
+        upload_id = _find_text(resp.content, "UploadId")
+        if not upload_id:
+            raise S3Error(resp.status_code, "MissingUploadId", "No UploadId in response")
+        return upload_id
+
+    async def upload_part(
+        self,
+        key: str,
+        upload_id: str,
+        part_number: int,
+        body: bytes,
+        *,
+        timeout: Optional[float] = None,
+    ) -> str:
+        resp = await self._request(
+            "PUT",
+            key,
+            params={"partNumber": str(part_number), "uploadId": upload_id},
+            body=body,
+            timeout=timeout,
+        )
+        return resp.headers["etag"]
+
+    async def complete_multipart_upload(
+        self,
+        key: str,
+        upload_id: str,
+        parts: list[tuple[int, str]],
+        *,
+        timeout: Optional[float] = None,
+    ) -> None:
+        body = "".join(
+            f"<Part><PartNumber>{number}</PartNumber><ETag>{escape(etag)}</ETag></Part>"
+            for number, etag in parts
+        )
+        resp = await self._request(
+            "POST",
+            key,
+            params={"uploadId": upload_id},
+            body=f"<CompleteMultipartUpload>{body}</CompleteMultipartUpload>".encode(),
+            timeout=timeout,
+        )
+        # S3 may report a failed completion inside a 200 response.
+        if resp.content and _local_name(ElementTree.fromstring(resp.content).tag) == "Error":
+            raise S3Error(
+                resp.status_code,
+                _find_text(resp.content, "Code") or "InternalError",
+                _find_text(resp.content, "Message") or "",
+            )
+
+    async def abort_multipart_upload(
+        self, key: str, upload_id: str, *, timeout: Optional[float] = None
+    ) -> None:
+        await self._request("DELETE", key, params={"uploadId": upload_id}, timeout=timeout)
+
+    # -------------------------
+    # Transport
+    # -------------------------
+    def _url(self, key: str, params: Optional[dict[str, str]] = None) -> str:
+        url = f"{self._base_url}{self._base_path}/{quote(key, safe='/~')}"
+        if params:
+            url = f"{url}?{urlencode(sorted(params.items()))}"
+        return url
+
+    def _sign(self, method: str, url: str, headers: dict[str, str], body: bytes) -> dict[str, str]:
+        request = AWSRequest(method=method, url=url, headers=headers, data=body)
+        request.context["client_config"] = self._signing_config
+        self._signer.add_auth(request)
+        return dict(request.headers.items())
+
+    async def _request(
+        self,
+        method: str,
+        key: str,
+        *,
+        params: Optional[dict[str, str]] = None,
+        headers: Optional[dict[str, str]] = None,
+        body: bytes = b"",
+        timeout: Optional[float] = None,
+    ) -> httpx.Response:
+        url = self._url(key, params)
+        request_timeout = httpx.Timeout(timeout) if timeout is not None else httpx.USE_CLIENT_DEFAULT
+
+        attempt = 0
+        while True:
+            # Re-sign on every attempt: the signature embeds a timestamp.
+            signed_headers = self._sign(method, url, dict(headers or {}), body)
+            try:
+                resp = await self._http.request(
+                    method,
+                    url,
+                    headers=signed_headers,
+                    content=body or None,
+                    timeout=request_timeout,
+                )
+            except httpx.TransportError as e:
+                if attempt >= self.max_retries:
+                    raise
+                logger.warning("S3 %s %s failed (%s), retrying", method, key, e)
+            else:
+                if resp.status_code < 300:
+                    return resp
+                if resp.status_code not in RETRYABLE_STATUS or attempt >= self.max_retries:
+                    raise self._error(resp)
+                logger.warning("S3 %s %s returned %s, retrying", method, key, resp.status_code)
+
+            await asyncio.sleep(random.uniform(0, self.retry_backoff * 2 ** attempt))
+            attempt += 1
+
+    @staticmethod
+    def _error(resp: httpx.Response) -> S3Error:
+        code, message = str(resp.status_code), ""
+        if resp.content:
+            try:
+                code = _find_text(resp.content, "Code") or code
+                message = _find_text(resp.content, "Message") or ""
+            except ElementTree.ParseError:
+                message = resp.text[:200]
+        return S3Error(resp.status_code, code, message)
@@ -1,3 +1,7 @@
+import re
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import httpx
 import pytest
 from fastapi import FastAPI
 from app.api.v1.routes import router
@@ -6,4 +10,81 @@ from app.api.v1.routes import router
 def app() -> FastAPI:
     app = FastAPI()
     app.include_router(router, prefix="/api")
-    return app
\ No newline at end of file
+    return app
+
+
+class FakeS3:
+    """In-process S3 stand-in served through ``httpx.MockTransport``."""
+
+    def __init__(self):
+        self.objects: dict[str, bytes] = {}
+        self.headers: dict[str, dict[str, str]] = {}
+        self.uploads: dict[str, dict[int, bytes]] = {}
+        self.requests: list[tuple[str, str]] = []
+        # Fault injection: fail this many requests with 503 first, and/or
+        # always fail the given part number with 500.
+        self.transient_failures = 0
+        self.fail_part: int | None = None
+
+    @property
+    def transport(self) -> httpx.MockTransport:
+        return httpx.MockTransport(self.handle)
+
+    def handle(self, request: httpx.Request) -> httpx.Response:
+        assert request.headers["authorization"].startswith("AWS4-HMAC-SHA256")
+        url = urlsplit(str(request.url))
+        key = unquote(url.path.lstrip("/"))
+        params = {k: v[0] for k, v in parse_qs(url.query, keep_blank_values=True).items()}
+        self.requests.append((request.method, key))
+
+        if self.transient_failures:
+            self.transient_failures -= 1
+            return httpx.Response(503, content=b"<Error><Code>SlowDown</Code></Error>")
+
+        if request.method == "POST" and "uploads" in params:
+            upload_id = f"upload-{len(self.uploads) + 1}"
+            self.uploads[upload_id] = {}
+            self.headers[key] = dict(request.headers)
+            return httpx.Response(
+                200,
+                content=(
+                    b'<InitiateMultipartUploadResult xmlns="http://s3.amazonaws.com/doc/2006-03-01/">'
+                    b"<UploadId>" + upload_id.encode() + b"</UploadId></InitiateMultipartUploadResult>"
+                ),
+            )
+        if request.method == "PUT" and "uploadId" in params:
+            number = int(params["partNumber"])
+            if number == self.fail_part:
+                return httpx.Response(500, content=b"<Error><Code>InternalError</Code></Error>")
+            self.uploads[params["uploadId"]][number] = request.content
+            return httpx.Response(200, headers={"ETag": f'"etag-{number}"'})
+        if request.method == "POST" and "uploadId" in params:
+            parts = self.uploads.pop(params["uploadId"])
+            numbers = [int(n) for n in re.findall(rb"<PartNumber>(\d+)</PartNumber>", request.content)]
+            self.objects[key] = b"".join(parts[n] for n in numbers)
+            return httpx.Response(200, content=b"<CompleteMultipartUploadResult/>")
+        if request.method == "DELETE" and "uploadId" in params:
+            self.uploads.pop(params["uploadId"], None)
+            return httpx.Response(204)
+        if request.method == "PUT":
+            self.objects[key] = request.content
+            self.headers[key] = dict(request.headers)
+            return httpx.Response(200, headers={"ETag": '"etag"'})
+        if request.method in ("GET", "HEAD"):
+            if key not in self.objects:
+                return httpx.Response(404, content=b"<Error><Code>NoSuchKey</Code></Error>")
+            body = self.objects[key]
+            return httpx.Response(
+                200,
+                headers={"Content-Length": str(len(body))},
+                content=body if request.method == "GET" else b"",
+            )
+        if request.method == "DELETE":
+            self.objects.pop(key, None)
+            return httpx.Response(204)
+        return httpx.Response(400)
+
+
+@pytest.fixture
+def fake_s3() -> FakeS3:
+    return FakeS3()
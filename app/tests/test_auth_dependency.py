@@ -1,4 +1,6 @@
 import uuid
+from datetime import datetime, timedelta, timezone
+
 import pytest
 from fastapi import HTTPException
 from fastapi.security import HTTPAuthorizationCredentials
@@ -6,6 +8,7 @@ from fastapi.security import HTTPAuthorizationCredentials
 from app.services.auth.auth_dependency import auth_dependency
 from app.core.jwt_helper import jwt_helper
 from app.db.crud.auth_sessions import AuthSessionCRUD
+from app.services.auth.session_cache import session_cache
 
 
 @pytest.mark.asyncio
@@ -35,6 +38,7 @@ async def test_auth_dependency_valid_session(monkeypatch):
 
     class Dummy:
         id = session_uuid
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
 
     async def fake_get_active_by_id(self, db, session_id):
         assert session_id == session_uuid
@@ -46,3 +50,33 @@ async def test_auth_dependency_valid_session(monkeypatch):
     assert auth["user_id"] == 1
     assert auth["session_id"] == session_uuid
 
+
+@pytest.mark.asyncio
+async def test_auth_dependency_caches_active_sessions(monkeypatch):
+    session_uuid = uuid.uuid4()
+    token = jwt_helper.create_access_token(sub=f"1:{session_uuid}")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    lookups = []
+
+    class Dummy:
+        id = session_uuid
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+
+    async def fake_get_active_by_id(self, db, session_id):
+        lookups.append(session_id)
+        return None if revoked else Dummy()
+
+    monkeypatch.setattr(AuthSessionCRUD, "get_active_by_id", fake_get_active_by_id)
+
+    revoked = False
+    await auth_dependency(credentials, db=None)
+    await auth_dependency(credentials, db=None)
+    assert lookups == [session_uuid]
+
+    # A revocation notification from any worker evicts the session.
+    revoked = True
+    session_cache.on_revoked(str(session_uuid))
+    with pytest.raises(HTTPException) as exc:
+        await auth_dependency(credentials, db=None)
+    assert exc.value.status_code == 401
+    assert lookups == [session_uuid, session_uuid]
@@ -0,0 +1,101 @@
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db.crud.auth_sessions import AuthSessionCRUD
+
+
+class RecordingDb:
+    def __init__(self, rows=()):
+        self.statements = []
+        self.rows = list(rows)
+
+    async def execute(self, stmt):
+        self.statements.append(stmt)
+        return SimpleNamespace(scalars=lambda: SimpleNamespace(first=lambda: next(iter(self.rows), None)))
+
+
+@pytest.mark.asyncio
+async def test_find_valid_by_token_is_a_single_indexed_probe():
+    crud = AuthSessionCRUD()
+    session = SimpleNamespace(id="s1")
+    db = RecordingDb([session])
+
+    assert await crud.find_valid_by_token(db, user_id=7, refresh_token_raw="raw") is session
+
+    stmt = db.statements[0]
+    sql = str(stmt.compile(dialect=postgresql.dialect()))
+    assert "auth_sessions.refresh_hash = " in sql
+    assert "auth_sessions.expires_at > now()" in sql
+    assert "auth_sessions.is_revoked IS false" in sql
+    assert "LIMIT" in sql
+    params = stmt.compile().params
+    assert crud.token_utils.hash_refresh("raw") in params.values()
+
+
+@pytest.mark.asyncio
+async def test_rotate_is_a_single_statement():
+    crud = AuthSessionCRUD()
+    captured = []
+
+    class CapturingDb:
+        async def execute(self, stmt):
+            captured.append(stmt)
+            return SimpleNamespace(first=lambda: None)
+
+    result = await crud.rotate(
+        CapturingDb(),
+        refresh_token_raw="old",
+        new_refresh_token_raw="new",
+        ip="127.0.0.1",
+        user_agent="pytest",
+    )
+
+    assert result is None
+    assert len(captured) == 1
+    sql = str(captured[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith('WITH "old" AS')
+    assert "UPDATE auth_sessions SET" in sql
+    assert "replaced_by=" in sql
+    assert "INSERT INTO auth_sessions" in sql
+    assert "pg_notify" in sql
+
+
+@pytest.mark.asyncio
+async def test_revoke_all_for_user_notifies_in_one_statement():
+    crud = AuthSessionCRUD()
+    statements = []
+
+    class CapturingDb:
+        async def execute(self, stmt):
+            statements.append(stmt)
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: ["a", "b", "c"]))
+
+        async def commit(self):
+            pass
+
+    assert await crud.revoke_all_for_user(CapturingDb(), user_id=7, reason="test") == 3
+
+    assert len(statements) == 2
+    notify = statements[1].compile(dialect=postgresql.dialect())
+    assert "pg_notify" in str(notify)
+    assert {"a", "b", "c"} <= set(notify.params.values())
+
+
+@pytest.mark.asyncio
+async def test_was_rotated_reports_recent_rotations():
+    crud = AuthSessionCRUD()
+    statements = []
+
+    class CapturingDb:
+        async def execute(self, stmt):
+            statements.append(stmt)
+            return SimpleNamespace(first=lambda: (7, True))
+
+    replayed = await crud.was_rotated(CapturingDb(), refresh_token_raw="old", grace_seconds=10)
+
+    assert (replayed.user_id, replayed.recent) == (7, True)
+    sql = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "auth_sessions.revoked_at > now() -" in sql
+    assert "auth_sessions.replaced_by IS NOT NULL" in sql
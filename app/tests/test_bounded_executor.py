@@ -0,0 +1,106 @@
+import asyncio
+import threading
+
+import pytest
+
+from app.core.bounded_executor import BoundedExecutor, ExecutorSaturated
+from app.core.jwt_helper import jwt_helper
+
+
+@pytest.mark.asyncio
+async def test_sheds_load_beyond_workers_plus_queue():
+    executor = BoundedExecutor(name="test", max_workers=1, max_queue=1)
+    release = threading.Event()
+
+    running = asyncio.create_task(executor.run(release.wait))
+    queued = asyncio.create_task(executor.run(release.wait))
+    await asyncio.sleep(0)
+    assert executor.stats()["running"] == 1
+    assert executor.stats()["queued"] == 1
+
+    with pytest.raises(ExecutorSaturated) as exc:
+        await executor.run(release.wait)
+    assert exc.value.status_code == 503
+    assert exc.value.headers["Retry-After"] == "1"
+
+    release.set()
+    assert await running is True
+    assert await queued is True
+    assert executor.stats() == {
+        "workers": 1, "running": 0, "queued": 0,
+        "completed": 2, "failed": 0, "cancelled": 0, "rejected": 1,
+    }
+    executor.shutdown()
+
+
+async def wait_until(predicate) -> None:
+    for _ in range(500):
+        if predicate():
+            return
+        await asyncio.sleep(0.001)
+    raise AssertionError("condition not met")
+
+
+@pytest.mark.asyncio
+async def test_cancelled_waiter_keeps_slot_until_thread_finishes():
+    executor = BoundedExecutor(name="test", max_workers=1, max_queue=1)
+    started, release = threading.Event(), threading.Event()
+
+    def work():
+        started.set()
+        release.wait()
+
+    running = asyncio.create_task(executor.run(work))
+    queued = asyncio.create_task(executor.run(release.wait))
+    await asyncio.to_thread(started.wait)
+
+    running.cancel()
+    queued.cancel()
+    for task in (running, queued):
+        with pytest.raises(asyncio.CancelledError):
+            await task
+
+    # The queued call never started and is gone; the running one still
+    # occupies its thread, so its slot is still taken.
+    assert executor.stats()["running"] == 1
+    assert executor.stats()["cancelled"] == 1
+    assert executor._pending == 1
+
+    release.set()
+    await wait_until(lambda: executor._pending == 0)
+    assert executor.stats()["completed"] == 1
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_failures_are_counted_separately():
+    executor = BoundedExecutor(name="test", max_workers=1, max_queue=0)
+
+    def boom():
+        raise ValueError("boom")
+
+    with pytest.raises(ValueError):
+        await executor.run(boom)
+    await wait_until(lambda: executor._pending == 0)
+    assert executor.stats()["failed"] == 1
+    assert executor.stats()["completed"] == 0
+    executor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_event_loop_keeps_running_during_hashing():
+    ticks = 0
+
+    async def tick():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.001)
+
+    ticker = asyncio.create_task(tick())
+    hashed = await jwt_helper.hash_password_async("s3cret")
+    assert await jwt_helper.verify_password_async("s3cret", hashed)
+    assert not await jwt_helper.verify_password_async("wrong", hashed)
+    ticker.cancel()
+
+    assert ticks > 5
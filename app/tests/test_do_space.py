@@ -0,0 +1,116 @@
+import io
+import pytest
+
+from app.services.storage.do_space import DOSpace
+from app.services.storage.s3_client import S3Error
+
+
+class FakeReader:
+    def __init__(self, data: bytes):
+        self._buf = io.BytesIO(data)
+
+    async def read(self, size: int = -1) -> bytes:
+        return self._buf.read(size)
+
+
+def make_space(fake_s3, part_size: int = 4) -> DOSpace:
+    space = DOSpace(transport=fake_s3.transport)
+    space.client.retry_backoff = 0
+    space.part_size = part_size
+    space.max_concurrency = 2
+    return space
+
+
+def key_of(url: str) -> str:
+    return url.split("/", 4)[-1]
+
+
+@pytest.mark.asyncio
+async def test_upload_small_file_uses_single_put(fake_s3):
+    space = make_space(fake_s3)
+
+    url = await space.upload_file(FakeReader(b"abc"), file_ext="jpg", content_type="image/jpeg")
+
+    key = key_of(url)
+    assert [m for m, _ in fake_s3.requests] == ["PUT"]
+    assert fake_s3.objects[key] == b"abc"
+    assert fake_s3.headers[key]["x-amz-acl"] == "public-read"
+    assert fake_s3.headers[key]["content-type"] == "image/jpeg"
+
+
+@pytest.mark.asyncio
+async def test_upload_large_file_streams_parts_in_order(fake_s3):
+    space = make_space(fake_s3)
+    data = b"0123456789abcdefghij"
+
+    url = await space.upload_file(FakeReader(data), file_ext="png")
+
+    assert fake_s3.objects[key_of(url)] == data
+    assert fake_s3.uploads == {}
+
+
+@pytest.mark.asyncio
+async def test_upload_aborts_multipart_on_part_failure(fake_s3):
+    fake_s3.fail_part = 2
+    space = make_space(fake_s3)
+
+    with pytest.raises(Exception, match="Failed to upload file"):
+        await space.upload_file(FakeReader(b"x" * 20), file_ext="png")
+
+    assert ("DELETE", fake_s3.requests[0][1]) in fake_s3.requests
+    assert fake_s3.uploads == {}
+    assert fake_s3.objects == {}
+
+
+@pytest.mark.asyncio
+async def test_transient_errors_are_retried(fake_s3):
+    fake_s3.transient_failures = 2
+    space = make_space(fake_s3)
+
+    url = await space.upload_file(FakeReader(b"abc"), file_ext="jpg")
+
+    assert fake_s3.objects[key_of(url)] == b"abc"
+    assert len(fake_s3.requests) == 3
+
+
+@pytest.mark.asyncio
+async def test_retries_are_bounded(fake_s3):
+    fake_s3.transient_failures = 10
+    space = make_space(fake_s3)
+    space.client.max_retries = 1
+
+    with pytest.raises(S3Error) as exc:
+        await space.client.put_object("k", b"abc")
+    assert exc.value.code == "SlowDown"
+    assert len(fake_s3.requests) == 2
+
+
+@pytest.mark.asyncio
+async def test_get_stream_head_delete(fake_s3):
+    space = make_space(fake_s3)
+    fake_s3.objects["uploads/a.jpg"] = b"data"
+
+    assert await space.get("uploads/a.jpg") == b"data"
+    assert await space.get("uploads/missing.jpg") is None
+    assert b"".join([c async for c in space.stream("uploads/a.jpg", chunk_size=2)]) == b"data"
+    with pytest.raises(FileNotFoundError):
+        [c async for c in space.stream("uploads/missing.jpg")]
+    assert (await space.head("uploads/a.jpg")).size == 4
+    assert await space.head("uploads/missing.jpg") is None
+    assert await space.delete("uploads/a.jpg") is True
+    assert "uploads/a.jpg" not in fake_s3.objects
+
+
+def test_presign_signs_required_headers(fake_s3):
+    space = make_space(fake_s3)
+
+    url = space.presign(
+        "uploads/a.jpg",
+        method="PUT",
+        expires_in=300,
+        headers={"Content-Type": "image/jpeg"},
+    )
+
+    assert "X-Amz-Signature=" in url
+    assert "X-Amz-Expires=300" in url
+    assert "content-type" in url.split("X-Amz-SignedHeaders=")[1].split("&")[0]
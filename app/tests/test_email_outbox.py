@@ -0,0 +1,259 @@
+import asyncio
+from contextlib import asynccontextmanager
+from datetime import datetime, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.configs.settings import settings
+from app.core.jwt_helper import jwt_helper
+from app.db.crud.app_users import AppUserCrud
+from app.db.crud.email_outbox import EmailOutboxCRUD
+from app.services.auth.email_password.email_registration import EmailRegistration
+from app.services.auth.email_password.schemas import EmailRegistrationInput
+from app.services.email.outbox import OutboxSender, outbox_sender
+from app.services.email.smtp import SmtpTransport
+
+
+class SmtpStub:
+    """Minimal local SMTP server: accepts mail, can refuse given recipients."""
+
+    def __init__(self, refuse: dict[str, int] | None = None):
+        self.refuse = refuse or {}
+        self.messages: list[tuple[list[str], bytes]] = []
+        self.connections = 0
+        self.drop_after_message = False
+
+    async def __aenter__(self) -> "SmtpStub":
+        self.server = await asyncio.start_server(self._handle, "127.0.0.1", 0)
+        self.port = self.server.sockets[0].getsockname()[1]
+        return self
+
+    async def __aexit__(self, *exc):
+        self.server.close()
+
+    async def _handle(self, reader, writer):
+        self.connections += 1
+        writer.write(b"220 stub ESMTP\r\n")
+        recipients: list[str] = []
+        while line := await reader.readline():
+            command = line.decode().strip()
+            verb = command[:4].upper()
+            if verb in ("EHLO", "HELO"):
+                writer.write(b"250-stub\r\n250 8BITMIME\r\n")
+            elif verb == "RCPT":
+                address = command.split(":", 1)[1].strip(" <>")
+                code = self.refuse.get(address)
+                if code:
+                    writer.write(f"{code} no thanks\r\n".encode())
+                else:
+                    recipients.append(address)
+                    writer.write(b"250 OK\r\n")
+            elif verb == "DATA":
+                writer.write(b"354 go ahead\r\n")
+                await writer.drain()
+                data = b""
+                while (chunk := await reader.readline()) != b".\r\n":
+                    data += chunk
+                self.messages.append((recipients, data))
+                recipients = []
+                writer.write(b"250 queued\r\n")
+                if self.drop_after_message:
+                    await writer.drain()
+                    writer.close()
+                    return
+            elif verb == "QUIT":
+                writer.write(b"221 bye\r\n")
+                await writer.drain()
+                writer.close()
+                return
+            else:  # MAIL, RSET, NOOP
+                writer.write(b"250 OK\r\n")
+            await writer.drain()
+
+
+def make_row(id: int, recipient: str, attempts: int = 1):
+    return SimpleNamespace(
+        id=id, recipient=recipient, subject=f"Subject {id}", body=f"<p>Body {id}</p>",
+        subtype="html", attempts=attempts,
+    )
+
+
+def make_sender(monkeypatch, stub: SmtpStub, rows: list, **kwargs) -> tuple[OutboxSender, dict]:
+    outcome = {"sent": {}, "failed": []}
+
+    async def fake_claim_due(self, db, *, limit, lease_seconds, max_attempts):
+        claimed, rows[:] = rows[:limit], rows[limit:]
+        return claimed
+
+    async def fake_mark_sent(self, db, *, claims):
+        outcome["sent"].update(claims)
+
+    async def fake_mark_failed(self, db, **kwargs):
+        outcome["failed"].append(kwargs)
+
+    monkeypatch.setattr(EmailOutboxCRUD, "claim_due", fake_claim_due)
+    monkeypatch.setattr(EmailOutboxCRUD, "mark_sent", fake_mark_sent)
+    monkeypatch.setattr(EmailOutboxCRUD, "mark_failed", fake_mark_failed)
+
+    @asynccontextmanager
+    async def sessions():
+        yield None
+
+    transport = SmtpTransport("127.0.0.1", stub.port, timeout=5)
+    sender = OutboxSender(transport, sessions=sessions, sender="noreply@example.com", **kwargs)
+    return sender, outcome
+
+
+@pytest.mark.asyncio
+async def test_batches_share_one_smtp_connection(monkeypatch):
+    async with SmtpStub() as stub:
+        rows = [make_row(i, f"user{i}@example.com") for i in range(1, 4)]
+        sender, outcome = make_sender(monkeypatch, stub, rows, batch_size=2)
+
+        assert await sender.run_once() == 2
+        assert await sender.run_once() == 1
+        assert await sender.run_once() == 0
+        await sender.transport.close()
+
+    assert stub.connections == 1
+    assert outcome["sent"] == {1: 1, 2: 1, 3: 1}
+    assert [r for r, _ in stub.messages] == [["user1@example.com"], ["user2@example.com"], ["user3@example.com"]]
+    assert b"Subject: Subject 1" in stub.messages[0][1]
+
+
+@pytest.mark.asyncio
+async def test_reconnects_after_the_server_drops_the_connection(monkeypatch):
+    async with SmtpStub() as stub:
+        stub.drop_after_message = True
+        rows = [make_row(1, "a@example.com"), make_row(2, "b@example.com")]
+        sender, outcome = make_sender(monkeypatch, stub, rows, batch_size=1)
+
+        await sender.run_once()
+        await asyncio.sleep(0.01)
+        await sender.run_once()
+        await sender.transport.close()
+
+    assert outcome["sent"] == {1: 1, 2: 1}
+    assert stub.connections == 2
+
+
+@pytest.mark.asyncio
+async def test_failures_back_off_or_give_up(monkeypatch):
+    async with SmtpStub(refuse={"gone@example.com": 550, "busy@example.com": 451}) as stub:
+        rows = [
+            make_row(1, "gone@example.com"),
+            make_row(2, "busy@example.com", attempts=2),
+            make_row(3, "busy@example.com", attempts=5),
+        ]
+        sender, outcome = make_sender(
+            monkeypatch, stub, rows, max_attempts=5, backoff=10, backoff_max=3600
+        )
+
+        before = datetime.now(timezone.utc)
+        await sender.run_once()
+        await sender.transport.close()
+
+    failed = {f["message_id"]: f for f in outcome["failed"]}
+    assert outcome["sent"] == {}
+    assert failed[1]["retry_at"] is None  # permanent 5xx
+    assert 19 <= (failed[2]["retry_at"] - before).total_seconds() <= 21
+    assert failed[3]["retry_at"] is None  # out of attempts
+    assert "550" in failed[1]["error"]
+
+
+@pytest.mark.asyncio
+async def test_claim_due_skips_locked_rows():
+    captured = []
+
+    class CapturingDb:
+        async def execute(self, stmt):
+            captured.append(stmt)
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    await EmailOutboxCRUD().claim_due(CapturingDb(), limit=10, lease_seconds=60, max_attempts=8)
+
+    expire, claim = (str(stmt.compile(dialect=postgresql.dialect())) for stmt in captured)
+    assert expire.startswith("UPDATE email_outbox SET status=")
+    assert "email_outbox.attempts >= " in expire
+    assert claim.startswith("UPDATE email_outbox SET attempts=(email_outbox.attempts +")
+    assert "email_outbox.attempts < " in claim
+    for sql in (expire, claim):
+        assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+def test_batch_fits_in_the_lease():
+    transport = SmtpTransport("127.0.0.1", 25)
+    sender = OutboxSender(transport, batch_size=50, lease_seconds=300, send_timeout=30)
+    assert sender.batch_size == 9
+    assert sender.lease_seconds == 300
+
+    sender = OutboxSender(transport, batch_size=50, lease_seconds=20, send_timeout=30)
+    assert sender.batch_size == 1
+    assert sender.lease_seconds == 60
+
+
+@pytest.mark.asyncio
+async def test_hung_send_is_cut_off(monkeypatch):
+    async with SmtpStub() as stub:
+        rows = [make_row(1, "slow@example.com"), make_row(2, "b@example.com")]
+        sender, outcome = make_sender(
+            monkeypatch, stub, rows, batch_size=2, lease_seconds=60, send_timeout=0.05
+        )
+        real_send = sender.transport.send
+
+        async def send(message):
+            if message["To"] == "slow@example.com":
+                await asyncio.sleep(10)
+            await real_send(message)
+
+        monkeypatch.setattr(sender.transport, "send", send)
+        assert await sender.run_once() == 2
+        await sender.transport.close()
+
+    assert outcome["sent"] == {2: 1}
+    [failed] = outcome["failed"]
+    assert failed["message_id"] == 1
+    assert failed["retry_at"] is not None
+
+
+@pytest.mark.asyncio
+async def test_registration_queues_mail_instead_of_sending(monkeypatch):
+    queued = []
+
+    class FakeDb:
+        commits = 0
+
+        async def commit(self):
+            self.commits += 1
+
+    async def no_user(self, email):
+        return None
+
+    async def fake_hash(plain):
+        return "hashed"
+
+    async def fake_create(self, db, user_data, hashed_password, *, is_active=False):
+        return SimpleNamespace(id=1, name=user_data.name, email=user_data.email)
+
+    async def fake_enqueue(self, db, **kwargs):
+        queued.append(kwargs)
+
+    monkeypatch.setattr(settings, "skip_email_verify", False)
+    monkeypatch.setattr(AppUserCrud, "get_active_user_by_email", no_user)
+    monkeypatch.setattr(jwt_helper, "hash_password_async", fake_hash)
+    monkeypatch.setattr(EmailRegistration, "_create_user_record", fake_create)
+    monkeypatch.setattr(EmailOutboxCRUD, "enqueue", fake_enqueue)
+    db = FakeDb()
+
+    resp = await EmailRegistration().register(
+        db, EmailRegistrationInput(name="Test", email="user@example.com", password="secret")
+    )
+
+    assert resp.email == "user@example.com"
+    assert [q["recipient"] for q in queued] == ["user@example.com"]
+    assert "verify-email?token=" in queued[0]["body"]
+    assert db.commits == 1
+    assert outbox_sender._wakeup.is_set()
+    outbox_sender._wakeup.clear()
@@ -0,0 +1,206 @@
+import asyncio
+import io
+import os
+from concurrent.futures import ThreadPoolExecutor
+from types import SimpleNamespace
+
+import pytest
+from fastapi import HTTPException
+from PIL import Image
+from starlette.datastructures import UploadFile
+
+from app.configs.settings import settings
+from app.services.image_uploads.normalize import ImageProcessor, normalize_image, render_images
+from app.services.storage.in_memory import InMemoryStorage
+from app.tests.test_upload_service import FakeDb, make_dedup_service, upload
+
+ORIENTATION = 0x0112
+
+
+def make_jpeg(width: int, height: int, orientation: int | None = None) -> bytes:
+    img = Image.new("RGB", (width, height), "red")
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    if orientation is not None:
+        exif[ORIENTATION] = orientation
+    out = io.BytesIO()
+    img.save(out, format="JPEG", exif=exif)
+    return out.getvalue()
+
+
+def make_processor(**overrides) -> ImageProcessor:
+    fields = dict(
+        workers=1, max_edge=100, fmt="WEBP", quality=80,
+        variants={"thumb": 20}, executor=ThreadPoolExecutor(1),
+    )
+    fields.update(overrides)
+    return ImageProcessor(**fields)
+
+
+def test_normalize_downsizes_and_strips_metadata():
+    out = normalize_image(make_jpeg(400, 200), max_edge=100, fmt="WEBP", quality=80)
+
+    with Image.open(io.BytesIO(out)) as img:
+        assert img.format == "WEBP"
+        assert img.size == (100, 50)
+        assert not img.getexif()
+
+
+def test_normalize_applies_exif_orientation():
+    # Orientation 6: stored landscape, displayed rotated 90 degrees.
+    out = normalize_image(make_jpeg(400, 200, orientation=6), max_edge=100, fmt="JPEG", quality=80)
+
+    with Image.open(io.BytesIO(out)) as img:
+        assert img.format == "JPEG"
+        assert img.size == (50, 100)
+        assert ORIENTATION not in img.getexif()
+
+
+def test_render_images_produces_every_size():
+    out = render_images(make_jpeg(400, 200), {"small": 100, "thumb": 20}, fmt="WEBP", quality=80)
+
+    sizes = {name: Image.open(io.BytesIO(data)).size for name, data in out.items()}
+    assert sizes == {"small": (100, 50), "thumb": (20, 10)}
+
+
+def test_normalize_never_upscales():
+    out = normalize_image(make_jpeg(40, 20), max_edge=100, fmt="WEBP", quality=80)
+
+    with Image.open(io.BytesIO(out)) as img:
+        assert img.size == (40, 20)
+
+
+@pytest.mark.asyncio
+async def test_upload_stores_original_and_normalized_copy(monkeypatch):
+    storage = InMemoryStorage()
+    processor = make_processor()
+    service, rows = make_dedup_service(monkeypatch, storage, processor)
+    data = make_jpeg(400, 200)
+
+    resp = await upload(service, data)
+    again = await upload(service, data)
+
+    original_key = resp.file_path.removeprefix(storage.base_url + "/")
+    normalized_key = resp.normalized_path.removeprefix(storage.base_url + "/")
+    assert normalized_key == original_key.removesuffix(".jpg") + ".normalized.webp"
+    assert await storage.get(original_key) == data
+    with Image.open(io.BytesIO(await storage.get(normalized_key))) as img:
+        assert img.size == (100, 50)
+    thumb_key = original_key.removesuffix(".jpg") + ".thumb.webp"
+    with Image.open(io.BytesIO(await storage.get(thumb_key))) as img:
+        assert img.size == (20, 10)
+    # The duplicate reuses every object.
+    assert again.normalized_path == resp.normalized_path
+    assert rows[2].normalized_path == resp.normalized_path
+    assert service._variant_urls(rows[2]) == {"thumb": storage.public_url(thumb_key)}
+
+    await service.delete_upload(FakeDb(), 7, 1)
+    await service.delete_upload(FakeDb(), 7, 2)
+    assert await storage.get(normalized_key) is None
+    assert await storage.get(thumb_key) is None
+    processor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_normalization_reads_a_file_not_the_upload(monkeypatch, tmp_path):
+    storage = InMemoryStorage()
+    processor = make_processor()
+    service, _ = make_dedup_service(monkeypatch, storage, processor)
+    sources = []
+    real_render = processor.render
+
+    async def recording_render(source, edges):
+        sources.append(source)
+        return await real_render(source, edges)
+
+    monkeypatch.setattr(processor, "render", recording_render)
+    resp = await upload(service, make_jpeg(400, 200))
+
+    [source] = sources
+    assert isinstance(source, str)
+    assert resp.normalized_path is not None
+    # The temporary copy is gone once the upload is stored.
+    assert not os.path.exists(source)
+    processor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_oversize_upload_is_streamed_without_reading(monkeypatch):
+    storage = InMemoryStorage()
+    processor = make_processor()
+    service, _ = make_dedup_service(monkeypatch, storage, processor)
+    monkeypatch.setattr(settings, "upload_max_bytes", 10)
+    renders = []
+    monkeypatch.setattr(processor, "render", lambda *args: renders.append(args))
+    file = UploadFile(file=io.BytesIO(b"X" * 11), filename="big.jpg", size=11)
+    reads = []
+    real_read = file.read
+
+    async def counting_read(size=-1):
+        data = await real_read(size)
+        reads.append(len(data))
+        return data
+
+    monkeypatch.setattr(file, "read", counting_read)
+
+    assert await service._store("uploads/big.jpg", file) is None
+    assert renders == []
+    assert await storage.get("uploads/big.jpg") == b"X" * 11
+    # Read once, by the storage PUT.
+    assert sum(reads) == 11
+    processor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_upload_keeps_original_when_image_cannot_be_decoded(monkeypatch):
+    storage = InMemoryStorage()
+    processor = make_processor()
+    service, rows = make_dedup_service(monkeypatch, storage, processor)
+
+    resp = await upload(service, b"not an image")
+
+    assert resp.normalized_path is None
+    assert await storage.get(resp.file_path.removeprefix(storage.base_url + "/")) == b"not an image"
+    assert rows[1].normalized_path is None
+    processor.shutdown()
+
+
+@pytest.mark.asyncio
+async def test_variant_rendered_lazily_once_and_cached(monkeypatch):
+    storage = InMemoryStorage()
+    processor = make_processor()
+    service, rows = make_dedup_service(monkeypatch, storage, processor)
+    # An upload that was never normalized, e.g. a presigned direct upload.
+    data = make_jpeg(400, 200)
+    await storage.put("uploads/direct.jpg", UploadFile(file=io.BytesIO(data)), "image/jpeg")
+    rows[1] = SimpleNamespace(
+        id=1, user_id=7, file_path=storage.public_url("uploads/direct.jpg"), normalized_path=None
+    )
+    assert service._variant_urls(rows[1]) == {"thumb": "/api/image/uploads/1/variants/thumb"}
+
+    renders = []
+    real_render = processor.render
+
+    async def counting_render(data, edges):
+        renders.append(edges)
+        return await real_render(data, edges)
+
+    monkeypatch.setattr(processor, "render", counting_render)
+
+    urls = await asyncio.gather(*[
+        service.get_variant_url(FakeDb(), 7, 1, "thumb") for _ in range(3)
+    ])
+    again = await service.get_variant_url(FakeDb(), 7, 1, "thumb")
+
+    assert set(urls) == {again} == {storage.public_url("uploads/direct.thumb.webp")}
+    assert renders == [{"thumb": 20}]
+    with Image.open(io.BytesIO(await storage.get("uploads/direct.thumb.webp"))) as img:
+        assert img.size == (20, 10)
+
+    with pytest.raises(HTTPException) as exc:
+        await service.get_variant_url(FakeDb(), 7, 1, "huge")
+    assert exc.value.status_code == 404
+    with pytest.raises(HTTPException) as exc:
+        await service.get_variant_url(FakeDb(), 8, 1, "thumb")
+    assert exc.value.status_code == 404
+    processor.shutdown()
@@ -0,0 +1,177 @@
+import uuid
+
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy.dialects import postgresql
+
+from app.db.pg_notify import notify_many
+from app.services.auth.auth_dependency import get_user_read_db_session, read_auth_dependency
+from app.services.image_uploads.listing_cache import CachedListing, ListingCache
+from app.services.image_uploads.schemas import UploadListQuery
+from app.services.image_uploads.uploads import upload_service
+
+
+class Clock:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self) -> float:
+        return self.now
+
+
+def page(body: bytes = b"[]", next_cursor=None) -> CachedListing:
+    return CachedListing.build(body, next_cursor)
+
+
+def test_etag_depends_on_body_and_cursor():
+    assert page(b"[1]").etag == page(b"[1]").etag
+    assert page(b"[1]").etag != page(b"[2]").etag
+    assert page(b"[1]").etag != page(b"[1]", "abc").etag
+
+
+def test_matches_if_none_match():
+    listing = page(b"[1]")
+    assert listing.matches(listing.etag)
+    assert listing.matches(f'"other", W/{listing.etag}')
+    assert listing.matches("*")
+    assert not listing.matches('"other"')
+    assert not listing.matches(None)
+
+
+def test_hit_and_invalidate():
+    cache = ListingCache(maxsize=10, ttl=60)
+    token = cache.token()
+    cache.put(1, "q", page(), token=token)
+    assert cache.get(1, "q") == page()
+    assert cache.get(2, "q") is None
+
+    cache.invalidate(1)
+    assert cache.get(1, "q") is None
+
+
+def test_put_after_concurrent_invalidation_is_dropped():
+    cache = ListingCache(maxsize=10, ttl=60)
+    token = cache.token()
+    # A write commits while the page is being read.
+    cache.invalidate(1)
+    cache.put(1, "q", page(), token=token)
+    assert cache.get(1, "q") is None
+
+    cache.put(1, "q", page(), token=cache.token())
+    assert cache.get(1, "q") is not None
+
+
+def test_replica_reads_wait_for_settle():
+    clock = Clock()
+    cache = ListingCache(maxsize=10, ttl=60, settle_seconds=5, clock=clock)
+    cache.invalidate(1)
+    clock.now = 2
+    cache.put(1, "q", page(), token=cache.token(), from_replica=True)
+    assert cache.get(1, "q") is None
+
+    cache.put(1, "q", page(), token=cache.token())
+    assert cache.get(1, "q") is not None
+
+    cache.invalidate(1)
+    clock.now = 8
+    cache.put(1, "q", page(), token=cache.token(), from_replica=True)
+    assert cache.get(1, "q") is not None
+
+
+def test_per_user_limit_and_ttl():
+    clock = Clock()
+    cache = ListingCache(maxsize=10, ttl=30, per_user=2, clock=clock)
+    for key in ("a", "b", "c"):
+        cache.put(1, key, page(), token=cache.token())
+    assert cache.get(1, "a") is None
+    assert cache.get(1, "c") is not None
+
+    clock.now = 31
+    assert cache.get(1, "c") is None
+
+
+def test_on_changed():
+    cache = ListingCache(maxsize=10, ttl=60)
+    cache.put(1, "q", page(), token=cache.token())
+    cache.put(2, "q", page(), token=cache.token())
+    cache.on_changed("1")
+    assert cache.get(1, "q") is None
+    assert cache.get(2, "q") is not None
+
+    cache.on_changed("garbage")
+    assert cache.get(2, "q") is None
+
+
+def test_disabled_cache_stores_nothing():
+    cache = ListingCache(maxsize=10, ttl=60, enabled=False)
+    cache.put(1, "q", page(), token=cache.token())
+    assert cache.get(1, "q") is None
+
+
+@pytest.mark.asyncio
+async def test_notify_many_is_one_statement():
+    class Recorder:
+        statements = []
+
+        async def execute(self, stmt):
+            self.statements.append(stmt)
+
+    db = Recorder()
+    await notify_many(db, "chan", ["2", "1", "2"])
+    assert len(db.statements) == 1
+    compiled = db.statements[0].compile(dialect=postgresql.dialect())
+    assert "pg_notify" in str(compiled)
+    assert "VALUES" in str(compiled)
+    assert sorted(v for v in compiled.params.values() if isinstance(v, str) and v != "chan") == ["1", "2"]
+
+    await notify_many(db, "chan", [])
+    assert len(db.statements) == 1
+
+
+@pytest.mark.asyncio
+async def test_listing_endpoint_etag(monkeypatch, app: FastAPI):
+    cache = ListingCache(maxsize=10, ttl=60)
+    monkeypatch.setattr(upload_service, "listing_cache", cache)
+    calls = []
+
+    async def fake_get_user_uploads_json(db, user_id, query):
+        calls.append(query)
+        return b"[]", "next"
+
+    monkeypatch.setattr(upload_service, "get_user_uploads_json", fake_get_user_uploads_json)
+
+    async def override_read_db():
+        yield None
+
+    app.dependency_overrides[get_user_read_db_session] = override_read_db
+    app.dependency_overrides[read_auth_dependency] = lambda: {"user_id": 7, "session_id": uuid.uuid4()}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        first = await ac.get("/api/image/uploads/", params={"limit": 10})
+        assert first.status_code == 200
+        assert first.json() == []
+        assert first.headers["X-Next-Cursor"] == "next"
+        assert first.headers["Cache-Control"] == "private, no-cache"
+        etag = first.headers["ETag"]
+
+        again = await ac.get(
+            "/api/image/uploads/", params={"limit": 10}, headers={"If-None-Match": etag}
+        )
+        assert again.status_code == 304
+        assert again.content == b""
+        assert again.headers["ETag"] == etag
+        assert len(calls) == 1
+
+        cache.invalidate(7)
+        fresh = await ac.get(
+            "/api/image/uploads/", params={"limit": 10}, headers={"If-None-Match": etag}
+        )
+        assert fresh.status_code == 304
+        assert len(calls) == 2
+
+        other = await ac.get("/api/image/uploads/", params={"limit": 20})
+        assert other.status_code == 200
+        assert len(calls) == 3
+    assert calls[0] == UploadListQuery(limit=10)
+    app.dependency_overrides.clear()
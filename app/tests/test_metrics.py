@@ -0,0 +1,160 @@
+import io
+import json
+import uuid
+
+import pytest
+from fastapi import APIRouter, FastAPI
+from httpx import ASGITransport, AsyncClient
+
+from app.api import metrics as metrics_api
+from app.api.v1.routes import router
+from app.core.http_metrics import MetricsMiddleware, TimedRoute
+from app.core.metrics import Gauge, Histogram, Registry, SIZE_BUCKETS, stage_seconds, timed
+from app.db.pg_engine import get_db_session
+from app.services.auth.auth_dependency import auth_dependency
+from app.services.image_uploads.uploads import upload_service
+
+
+def sample(text: str, line_prefix: str) -> float:
+    [line] = [line for line in text.splitlines() if line.startswith(line_prefix + " ")]
+    return float(line.rsplit(" ", 1)[1])
+
+
+def test_render_text_format():
+    registry = Registry()
+    requests = registry.counter("jobs_total", "Jobs run.", ("kind",))
+    requests.inc(kind='a"b')
+    requests.inc(2, kind='a"b')
+    registry.gauge("queue_depth", "Queued jobs.").set(4)
+    registry.histogram("job_seconds", "Job time.", buckets=(0.5, 1)).observe(0.7)
+
+    text = registry.render()
+    assert "# HELP jobs_total Jobs run.\n# TYPE jobs_total counter\n" in text
+    assert 'jobs_total{kind="a\\"b"} 3' in text
+    assert "queue_depth 4" in text
+    assert 'job_seconds_bucket{le="0.5"} 0' in text
+    assert 'job_seconds_bucket{le="1"} 1' in text
+    assert 'job_seconds_bucket{le="+Inf"} 1' in text
+    assert "job_seconds_sum 0.7" in text
+    assert "job_seconds_count 1" in text
+
+
+def test_registry_reuses_and_checks_metrics():
+    registry = Registry()
+    assert registry.counter("x", "X.", ("a",)) is registry.counter("x", "X.", ("a",))
+    with pytest.raises(ValueError):
+        registry.gauge("x", "X.")
+    with pytest.raises(ValueError):
+        registry.counter("x", "X.", ("a",)).inc(b="1")
+
+
+def test_collectors_run_at_render():
+    registry = Registry()
+    calls = []
+
+    def collect():
+        calls.append(1)
+        gauge = Gauge("renders", "Renders so far.")
+        gauge.set(len(calls))
+        return [gauge]
+
+    registry.add_collector(collect)
+    registry.render()
+    assert sample(registry.render(), "renders") == 2
+
+
+def test_large_bucket_bounds_are_exact():
+    histogram = Histogram(SIZE_BUCKETS)
+    histogram.observe(1_000_000)
+    assert "1048576" in histogram.snapshot()["buckets"]
+
+
+def test_timed_records_stage_even_on_error():
+    before = stage_seconds.labels(stage="test_stage").count
+    with pytest.raises(RuntimeError):
+        with timed("test_stage"):
+            raise RuntimeError
+    assert stage_seconds.labels(stage="test_stage").count == before + 1
+
+
+@pytest.mark.asyncio
+async def test_middleware_labels_by_route_template():
+    registry = Registry()
+    app = FastAPI()
+    app.include_router(router, prefix="/api")
+    app.add_middleware(MetricsMiddleware, registry=registry)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        assert (await ac.get("/api/health")).status_code == 200
+        assert (await ac.get("/api/health")).status_code == 200
+        assert (await ac.get("/no/such/path")).status_code == 404
+
+    text = registry.render()
+    assert sample(text, 'http_request_duration_seconds_count{method="GET",route="/api/health",status="200"}') == 2
+    assert sample(text, 'http_request_duration_seconds_count{method="GET",route="unmatched",status="404"}') == 1
+    assert sample(text, 'http_response_size_bytes_sum{method="GET",route="/api/health"}') > 0
+    assert sample(text, 'http_requests_in_flight{method="GET"}') == 0
+    assert "/no/such/path" not in text
+
+
+@pytest.mark.asyncio
+async def test_multipart_parse_is_timed(monkeypatch, app: FastAPI):
+    async def override_get_db_session():
+        yield None
+
+    app.dependency_overrides[get_db_session] = override_get_db_session
+    app.dependency_overrides[auth_dependency] = lambda: {"user_id": 1, "session_id": uuid.uuid4()}
+
+    async def fake_upload_image(db, file, user_id, chapter, line_start, line_end, script_id):
+        assert await file.read() == b"JPEGDATA"
+        return {"file_path": "https://example.com/a.jpg", "message": "Uploaded successfully"}
+
+    monkeypatch.setattr(upload_service, "upload_image", fake_upload_image)
+    before = stage_seconds.labels(stage="multipart_parse").count
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post(
+            "/api/image/upload/",
+            files={"file": ("a.jpg", io.BytesIO(b"JPEGDATA"), "image/jpeg")},
+            data={"metadata": json.dumps({"chapter": 1, "line_start": 1, "line_end": 2, "script_id": 1})},
+        )
+
+    assert resp.status_code == 200
+    assert stage_seconds.labels(stage="multipart_parse").count == before + 1
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_routes_without_form_params_leave_the_body_alone():
+    timed_router = APIRouter(route_class=TimedRoute)
+
+    @timed_router.post("/ping")
+    async def ping():
+        return {"ok": True}
+
+    app = FastAPI()
+    app.include_router(timed_router)
+    before = stage_seconds.labels(stage="multipart_parse").count
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.post("/ping", files={"file": ("a.jpg", io.BytesIO(b"JPEGDATA"), "image/jpeg")})
+
+    assert resp.status_code == 200
+    # Nothing parsed, so no spooled files are left unclosed.
+    assert stage_seconds.labels(stage="multipart_parse").count == before
+
+
+@pytest.mark.asyncio
+async def test_metrics_endpoint():
+    app = FastAPI()
+    app.include_router(metrics_api.router)
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get("/metrics")
+
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/plain; version=0.0.4")
+    assert 'executor_workers{executor="bcrypt"}' in resp.text
+    assert 'db_pool_size{pool="primary"}' in resp.text
+    assert 'db_pool_checkout_wait_seconds_bucket{pool="primary",le="+Inf"}' in resp.text
+    assert "# TYPE app_stage_duration_seconds histogram" in resp.text
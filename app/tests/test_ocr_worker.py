@@ -0,0 +1,225 @@
+import asyncio
+import re
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.configs.constants import ProcessingStatus
+from app.db.crud.image_uploads import ImageUploadCRUD
+from app.services.ocr.base import ExtractedText
+from app.services.ocr.fake import FakeTextExtractor
+from app.services.ocr.worker import OcrWorker
+from app.services.storage.base import BytesReader
+from app.services.storage.in_memory import InMemoryStorage
+
+
+class FakeUploads:
+    """In-memory stand-in for the claim/finish half of ImageUploadCRUD."""
+
+    def __init__(self, rows):
+        self.rows = {row.id: row for row in rows}
+        self.offset = timedelta()
+
+    def now(self) -> datetime:
+        return datetime.now(timezone.utc) + self.offset
+
+    async def claim_pending(self, db, *, limit, lease_seconds, max_attempts):
+        now = self.now()
+        claimed = []
+        for row in self.rows.values():
+            expired = (
+                row.status == ProcessingStatus.PROCESSING
+                and row.claimed_at < now - timedelta(seconds=lease_seconds)
+            )
+            due = (row.status == ProcessingStatus.UPLOADED or expired) and (
+                row.next_attempt_at is None or row.next_attempt_at <= now
+            )
+            if not due:
+                continue
+            if row.attempts >= max_attempts:
+                row.status, row.claimed_at = ProcessingStatus.FAILED, None
+            elif len(claimed) < limit:
+                row.status, row.claimed_at, row.next_attempt_at = ProcessingStatus.PROCESSING, now, None
+                row.attempts += 1
+                claimed.append(SimpleNamespace(**vars(row)))
+        return claimed
+
+    async def finish_processing(self, db, *, upload_id, attempts, status, next_attempt_at=None):
+        row = self.rows[upload_id]
+        if row.status != ProcessingStatus.PROCESSING or row.attempts != attempts:
+            return False
+        row.status, row.claimed_at, row.next_attempt_at = status, None, next_attempt_at
+        return True
+
+
+class FakeResults:
+    def __init__(self):
+        self.saved = {}
+
+    async def save(self, db, *, upload_id, text, lines):
+        self.saved[upload_id] = (text, lines)
+
+
+@asynccontextmanager
+async def fake_session():
+    yield None
+
+
+def make_worker(storage, extractor, rows, **kwargs):
+    worker = OcrWorker(extractor, storage=storage, sessions=fake_session, **kwargs)
+    worker.uploads = FakeUploads(rows)
+    worker.results = FakeResults()
+    return worker
+
+
+def upload_row(id, storage, key, normalized_key=None):
+    return SimpleNamespace(
+        id=id,
+        status=ProcessingStatus.UPLOADED,
+        attempts=0,
+        claimed_at=None,
+        next_attempt_at=None,
+        file_path=storage.public_url(key),
+        normalized_path=storage.public_url(normalized_key) if normalized_key else None,
+    )
+
+
+@pytest.mark.asyncio
+async def test_worker_extracts_text_and_completes_uploads():
+    storage = InMemoryStorage()
+    await storage.put("uploads/a.jpg", BytesReader(b"ORIGINAL-A"))
+    await storage.put("uploads/a.normalized.webp", BytesReader(b"NORMALIZED-A"))
+    await storage.put("uploads/b.jpg", BytesReader(b"ORIGINAL-B"))
+    extractor = FakeTextExtractor("بسم الله\nالرحمن الرحيم")
+    rows = [
+        upload_row(1, storage, "uploads/a.jpg", "uploads/a.normalized.webp"),
+        upload_row(2, storage, "uploads/b.jpg"),
+    ]
+    worker = make_worker(storage, extractor, rows, batch_size=10, concurrency=1)
+
+    assert await worker.run_once() == 2
+    assert await worker.run_once() == 0
+
+    assert sorted(extractor.calls) == [b"NORMALIZED-A", b"ORIGINAL-B"]
+    assert all(r.status == ProcessingStatus.COMPLETED for r in worker.uploads.rows.values())
+    assert worker.results.saved[1] == ("بسم الله\nالرحمن الرحيم", ["بسم الله", "الرحمن الرحيم"])
+
+
+@pytest.mark.asyncio
+async def test_worker_retries_then_marks_failed():
+    storage = InMemoryStorage()
+    await storage.put("uploads/a.jpg", BytesReader(b"BAD"))
+
+    def respond(image: bytes) -> ExtractedText:
+        raise RuntimeError("service unavailable")
+
+    rows = [upload_row(1, storage, "uploads/a.jpg"), upload_row(2, storage, "uploads/missing.jpg")]
+    worker = make_worker(
+        storage, FakeTextExtractor(respond=respond), rows, max_attempts=2
+    )
+
+    await worker.run_once()
+    assert {r.status for r in worker.uploads.rows.values()} == {ProcessingStatus.UPLOADED}
+    # Not retried until the backoff has passed.
+    assert await worker.run_once() == 0
+    worker.uploads.offset = timedelta(seconds=worker.retry_backoff + 1)
+    await worker.run_once()
+    assert {r.status for r in worker.uploads.rows.values()} == {ProcessingStatus.FAILED}
+    assert worker.results.saved == {}
+
+
+@pytest.mark.asyncio
+async def test_expired_leases_end_in_failed(monkeypatch):
+    storage = InMemoryStorage()
+    rows = [upload_row(1, storage, "uploads/a.jpg")]
+    worker = make_worker(storage, FakeTextExtractor("text"), rows, max_attempts=3, lease_seconds=60)
+
+    # The worker holding each claim dies before finishing it.
+    async def die(row):
+        pass
+
+    monkeypatch.setattr(worker, "_process", die)
+    for attempt in range(1, 4):
+        assert await worker.run_once() == 1
+        assert worker.uploads.rows[1].attempts == attempt
+        assert await worker.run_once() == 0
+        worker.uploads.offset += timedelta(seconds=61)
+
+    assert await worker.run_once() == 0
+    assert worker.uploads.rows[1].status == ProcessingStatus.FAILED
+
+
+@pytest.mark.asyncio
+async def test_result_discarded_when_claim_was_lost():
+    storage = InMemoryStorage()
+    await storage.put("uploads/a.jpg", BytesReader(b"IMG"))
+    rows = [upload_row(1, storage, "uploads/a.jpg")]
+    worker = make_worker(storage, FakeTextExtractor("text"), rows)
+
+    def respond(image: bytes) -> ExtractedText:
+        # Lease expired mid-extraction and another worker re-claimed the row.
+        worker.uploads.rows[1].attempts += 1
+        return ExtractedText(text="stale")
+
+    worker.extractor.respond = respond
+    await worker.run_once()
+
+    assert worker.results.saved == {}
+    assert worker.uploads.rows[1].status == ProcessingStatus.PROCESSING
+
+
+@pytest.mark.asyncio
+async def test_one_rows_database_error_does_not_cancel_the_batch():
+    storage = InMemoryStorage()
+    await storage.put("uploads/a.jpg", BytesReader(b"A"))
+    await storage.put("uploads/b.jpg", BytesReader(b"B"))
+    rows = [upload_row(1, storage, "uploads/a.jpg"), upload_row(2, storage, "uploads/b.jpg")]
+
+    class SlowForB:
+        async def extract(self, image: bytes) -> ExtractedText:
+            if image == b"B":
+                # Still reading B when A's result fails to save.
+                await asyncio.sleep(0.05)
+            return ExtractedText(text="text")
+
+    class FailingResults(FakeResults):
+        async def save(self, db, *, upload_id, text, lines):
+            if upload_id == 1:
+                raise ConnectionError("connection reset")
+            await super().save(db, upload_id=upload_id, text=text, lines=lines)
+
+    worker = make_worker(storage, SlowForB(), rows, concurrency=2)
+    worker.results = FailingResults()
+
+    assert await worker.run_once() == 2
+    assert worker.uploads.rows[2].status == ProcessingStatus.COMPLETED
+    assert list(worker.results.saved) == [2]
+
+
+@pytest.mark.asyncio
+async def test_claim_pending_skips_locked_rows():
+    statements = []
+
+    class RecordingDb:
+        async def execute(self, stmt):
+            statements.append(stmt)
+            return SimpleNamespace(all=lambda: [], scalars=lambda: SimpleNamespace(all=lambda: []))
+
+    assert await ImageUploadCRUD().claim_pending(
+        RecordingDb(), limit=5, lease_seconds=60, max_attempts=3
+    ) == []
+
+    expire, claim = (stmt.compile(dialect=postgresql.dialect()) for stmt in statements)
+    for compiled in (expire, claim):
+        sql = str(compiled)
+        assert sql.startswith("UPDATE image_upload SET")
+        assert "FOR UPDATE SKIP LOCKED" in sql
+        assert "next_attempt_at IS NULL OR image_upload.next_attempt_at <=" in sql
+        assert "RETURNING" in sql
+    assert re.search(r"image_upload\.attempts >= %\(\w+\)s", str(expire))
+    assert expire.params["status"] == ProcessingStatus.FAILED
+    assert re.search(r"image_upload\.attempts < %\(\w+\)s", str(claim))
+    assert claim.params["status"] == ProcessingStatus.PROCESSING
@@ -0,0 +1,145 @@
+import uuid
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy import func
+from sqlalchemy.dialects import postgresql
+
+from app.db.models.auth_sessions import AuthSessions
+from app.db.models.image_blobs import ImageBlobs
+from app.db.models.image_uploads import ImageUploads
+from app.db.pg_dml import (
+    MAX_BIND_PARAMS,
+    bulk_insert,
+    bulk_update,
+    insert_on_conflict,
+    insert_returning,
+    update_returning,
+)
+
+
+class RecordingSession:
+    def __init__(self, row=None):
+        self.row = row
+        self.statements = []
+        self.commits = 0
+
+    async def execute(self, stmt, params=None):
+        self.statements.append(stmt)
+        self.params = params
+        row = self.row
+        return SimpleNamespace(
+            rowcount=0,
+            scalars=lambda: SimpleNamespace(one=lambda: row, first=lambda: row),
+        )
+
+    async def connection(self):
+        async def get_raw_connection():
+            return SimpleNamespace(driver_connection=self)
+        return SimpleNamespace(get_raw_connection=get_raw_connection)
+
+    async def copy_records_to_table(self, table_name, *, schema_name, columns, records):
+        self.copied = (table_name, columns, records)
+
+    async def commit(self):
+        self.commits += 1
+
+    async def rollback(self):
+        pass
+
+    def sql(self) -> str:
+        (stmt,) = self.statements
+        return str(stmt.compile(dialect=postgresql.dialect()))
+
+
+@pytest.mark.asyncio
+async def test_insert_returning_is_one_statement():
+    row = object()
+    db = RecordingSession(row)
+
+    values = {"user_id": 1, "content_hash": b"h", "file_path": "a", "ref_count": 1}
+    assert await insert_returning(db, ImageBlobs, values) is row
+
+    assert db.sql().startswith("INSERT INTO image_blobs")
+    assert "RETURNING image_blobs.user_id, image_blobs.content_hash" in db.sql()
+    assert db.commits == 1
+
+
+@pytest.mark.asyncio
+async def test_update_returning_skips_the_select():
+    db = RecordingSession()
+    session_id = uuid.uuid4()
+
+    row = await update_returning(
+        db, AuthSessions, [AuthSessions.id == session_id],
+        {"last_seen_at": func.now()}, commit=False,
+    )
+
+    assert row is None
+    assert db.sql().startswith("UPDATE auth_sessions SET last_seen_at=now()")
+    assert "WHERE auth_sessions.id = " in db.sql()
+    assert "RETURNING" in db.sql()
+    assert db.commits == 0
+
+
+@pytest.mark.asyncio
+async def test_insert_on_conflict_update_and_do_nothing():
+    values = {"user_id": 1, "content_hash": b"h", "file_path": "a", "ref_count": 1}
+    keys = [ImageBlobs.user_id, ImageBlobs.content_hash]
+
+    db = RecordingSession()
+    await insert_on_conflict(db, ImageBlobs, values, index_elements=keys, set_=["file_path"])
+    assert "ON CONFLICT (user_id, content_hash) DO UPDATE SET file_path = excluded.file_path" in db.sql()
+
+    db = RecordingSession()
+    await insert_on_conflict(
+        db, ImageBlobs, values, index_elements=keys,
+        set_={"ref_count": ImageBlobs.ref_count + 1},
+    )
+    assert "DO UPDATE SET ref_count = (image_blobs.ref_count +" in db.sql()
+
+    db = RecordingSession()
+    await insert_on_conflict(db, ImageBlobs, values, index_elements=keys)
+    assert "ON CONFLICT (user_id, content_hash) DO NOTHING RETURNING" in db.sql()
+
+
+@pytest.mark.asyncio
+async def test_bulk_insert_uses_copy_for_large_batches():
+    rows = [{"user_id": 1, "refresh_hash": bytes([i]), "expires_at": None} for i in range(3)]
+
+    db = RecordingSession()
+    assert await bulk_insert(db, AuthSessions, rows, copy_threshold=10) == 3
+    assert db.sql().startswith("INSERT INTO auth_sessions")
+    assert db.params == rows
+    assert not hasattr(db, "copied")
+
+    db = RecordingSession()
+    assert await bulk_insert(db, AuthSessions, rows, copy_threshold=3) == 3
+    assert db.statements == []
+    table, columns, records = db.copied
+    assert table == "auth_sessions"
+    # Python-side defaults are filled in, since COPY skips them.
+    assert columns[:3] == ["user_id", "refresh_hash", "expires_at"]
+    assert {"id", "created_at", "is_revoked"} <= set(columns)
+    assert len({r[columns.index("id")] for r in records}) == 3
+    assert db.commits == 1
+
+    with pytest.raises(ValueError):
+        await bulk_insert(RecordingSession(), AuthSessions, [{"user_id": 1}, {"ip": None}])
+
+
+@pytest.mark.asyncio
+async def test_bulk_update_by_primary_key_in_chunks():
+    rows = [{"id": i, "status": 2} for i in range(MAX_BIND_PARAMS // 2 + 1)]
+    db = RecordingSession()
+
+    await bulk_update(db, ImageUploads, rows)
+
+    assert len(db.statements) == 2
+    sql = str(db.statements[0].compile(dialect=postgresql.dialect()))
+    assert sql.startswith("UPDATE image_upload SET status=batch.status FROM (VALUES")
+    assert "WHERE image_upload.id = batch.id" in sql
+    assert db.commits == 1
+
+    with pytest.raises(ValueError):
+        await bulk_update(RecordingSession(), ImageUploads, [{"status": 2}])
@@ -0,0 +1,70 @@
+import pytest
+from fastapi import FastAPI
+from httpx import ASGITransport, AsyncClient
+from sqlalchemy import exc
+from sqlalchemy.util import greenlet_spawn
+
+from app.core.metrics import Histogram
+from app.db.pg_engine import sessionmanager
+from app.db.pg_pool import InstrumentedPool
+
+
+class FakeDbapiConnection:
+    def rollback(self):
+        pass
+
+    def close(self):
+        pass
+
+
+def make_pool(**kwargs) -> InstrumentedPool:
+    return InstrumentedPool(FakeDbapiConnection, **kwargs)
+
+
+def test_histogram_snapshot_is_cumulative():
+    hist = Histogram(buckets=[0.1, 1.0])
+    for value in (0.05, 0.5, 0.7, 3.0):
+        hist.observe(value)
+
+    snap = hist.snapshot()
+
+    assert snap["count"] == hist.count == 4
+    assert snap["sum"] == pytest.approx(4.25)
+    assert snap["buckets"] == {"0.1": 1, "1": 3, "+Inf": 4}
+
+
+@pytest.mark.asyncio
+async def test_pool_records_checkouts_and_timeouts():
+    pool = make_pool(pool_size=1, max_overflow=0, timeout=0.01)
+
+    def exhaust():
+        # The async pool must be driven from a greenlet, as the engine does.
+        conn = pool.connect()
+        stats = pool.stats()
+        assert (stats["checked_out"], stats["checked_in"]) == (1, 0)
+        with pytest.raises(exc.TimeoutError):
+            pool.connect()
+        conn.close()
+
+    await greenlet_spawn(exhaust)
+
+    stats = pool.stats()
+    assert stats["checked_out"] == 0
+    assert stats["timeouts"] == 1
+    assert stats["wait_seconds"]["count"] == 2
+    assert stats["wait_seconds"]["sum"] >= 0.01
+
+    # History survives engine.dispose(), which recreates the pool.
+    assert pool.recreate().stats()["timeouts"] == 1
+
+
+@pytest.mark.asyncio
+async def test_db_pool_endpoint(app: FastAPI):
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.get("/api/health/db-pool")
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["size"] == sessionmanager.pool_stats()["size"]
+    assert "+Inf" in body["wait_seconds"]["buckets"]
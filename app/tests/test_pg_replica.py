@@ -0,0 +1,136 @@
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+
+import pytest
+from fastapi.security import HTTPAuthorizationCredentials
+
+from app.core.jwt_helper import jwt_helper
+from app.db.crud.auth_sessions import AuthSessionCRUD
+from app.db.pg_engine import PgEngine, sessionmanager
+from app.services.auth.auth_dependency import get_user_read_db_session, read_auth_dependency
+
+
+def make_engine(monkeypatch, lags: list, **kwargs) -> PgEngine:
+    engine = PgEngine(replica_host="replica", **kwargs)
+    measured = iter(lags)
+
+    async def fake_measure_lag():
+        lag = next(measured)
+        if isinstance(lag, Exception):
+            raise lag
+        return lag
+
+    monkeypatch.setattr(engine, "_measure_lag", fake_measure_lag)
+    return engine
+
+
+async def routed_to_replica(engine: PgEngine, user_id=None) -> bool:
+    async with engine.read_session(user_id=user_id) as session:
+        return engine.is_replica(session)
+
+
+@pytest.mark.asyncio
+async def test_reads_use_replica_only_while_it_keeps_up(monkeypatch):
+    engine = make_engine(monkeypatch, [0.2, 30.0, RuntimeError("down"), 0.0], lag_check_interval=0)
+
+    assert await routed_to_replica(engine)
+    assert not await routed_to_replica(engine)  # too far behind
+    assert not await routed_to_replica(engine)  # unreachable
+    assert await routed_to_replica(engine)
+    assert engine.pool_stats()["replica"]["lag_seconds"] == 0.0
+
+
+@pytest.mark.asyncio
+async def test_lag_is_measured_at_most_once_per_interval(monkeypatch):
+    engine = make_engine(monkeypatch, [0.1], lag_check_interval=60)
+
+    for _ in range(5):
+        assert await routed_to_replica(engine)
+
+
+@pytest.mark.asyncio
+async def test_user_reads_stick_to_primary_after_a_write(monkeypatch):
+    engine = make_engine(monkeypatch, [0.0], lag_check_interval=60, read_your_writes=60)
+
+    engine.mark_written(7)
+
+    assert not await routed_to_replica(engine, user_id=7)
+    assert await routed_to_replica(engine, user_id=8)
+
+
+@pytest.mark.asyncio
+async def test_without_replica_everything_reads_from_primary():
+    engine = PgEngine(replica_host=None)
+    engine.mark_written(7)
+
+    assert not await routed_to_replica(engine)
+    assert "replica" not in engine.pool_stats()
+
+
+@pytest.mark.asyncio
+async def test_auth_falls_back_to_primary_for_sessions_not_replicated_yet(monkeypatch):
+    session_uuid = uuid.uuid4()
+    token = jwt_helper.create_access_token(sub=f"1:{session_uuid}")
+    credentials = HTTPAuthorizationCredentials(scheme="Bearer", credentials=token)
+    replica, primary_session = object(), object()
+    lookups, released = [], []
+
+    class Dummy:
+        id = session_uuid
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+
+    async def fake_get_active_by_id(self, db, session_id):
+        lookups.append(db)
+        return Dummy() if db is primary_session else None
+
+    @asynccontextmanager
+    async def fake_read_session(user_id=None, *, primary=False):
+        assert primary
+        yield primary_session
+        released.append(primary_session)
+
+    monkeypatch.setattr(AuthSessionCRUD, "get_active_by_id", fake_get_active_by_id)
+    monkeypatch.setattr(sessionmanager, "is_replica", lambda session: session is replica)
+    monkeypatch.setattr(sessionmanager, "read_session", fake_read_session)
+
+    auth = await read_auth_dependency(credentials, read_db=replica)
+
+    assert auth["session_id"] == session_uuid
+    assert lookups == [replica, primary_session]
+    # The primary connection is only borrowed for the lookup.
+    assert released == [primary_session]
+
+
+@pytest.mark.asyncio
+async def test_read_sessions_are_read_only_on_both_servers(monkeypatch):
+    engine = make_engine(monkeypatch, [0.0], lag_check_interval=60)
+
+    for primary in (False, True):
+        async with engine.read_session(primary=primary) as session:
+            assert engine.is_replica(session) is not primary
+            assert session.bind.get_execution_options()["postgresql_readonly"] is True
+
+
+@pytest.mark.asyncio
+async def test_route_shares_the_auth_read_session(monkeypatch):
+    class Session:
+        closed = False
+
+        async def close(self):
+            self.closed = True
+
+    shared = Session()
+    monkeypatch.setattr(sessionmanager, "is_replica", lambda session: session is shared)
+    auth = {"user_id": 7, "session_id": uuid.uuid4()}
+
+    sessions = get_user_read_db_session(auth, read_db=shared)
+    assert await sessions.__anext__() is shared
+
+    # After their own write the user is served by the primary instead.
+    monkeypatch.setattr(sessionmanager, "wrote_recently", lambda user_id: user_id == 7)
+    sessions = get_user_read_db_session(auth, read_db=shared)
+    session = await sessions.__anext__()
+    assert session is not shared and not sessionmanager.is_replica(session)
+    assert shared.closed
+    await sessions.aclose()
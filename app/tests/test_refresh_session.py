@@ -0,0 +1,129 @@
+import uuid
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from jose import jwt
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.configs.settings import settings
+from app.core.jwt_helper import jwt_helper
+from app.db.crud.auth_sessions import AuthSessionCRUD, ReplayedToken, RotatedSession
+from app.db.pg_engine import get_db_session
+from app.services.auth.email_password.refresh import RefreshSession
+
+
+class FakeDb:
+    def __init__(self):
+        self.commits = 0
+
+    async def commit(self):
+        self.commits += 1
+
+
+def make_request():
+    return SimpleNamespace(client=SimpleNamespace(host="127.0.0.1"), headers={"user-agent": "pytest"})
+
+
+@pytest.mark.asyncio
+async def test_refresh_rotates_and_issues_tokens(monkeypatch):
+    session_id = uuid.uuid4()
+    calls = []
+
+    async def fake_rotate(self, db, **kwargs):
+        calls.append(kwargs)
+        return RotatedSession(
+            id=session_id, user_id=7, expires_at=datetime.now(timezone.utc) + timedelta(days=1)
+        )
+
+    monkeypatch.setattr(AuthSessionCRUD, "rotate", fake_rotate)
+    db = FakeDb()
+
+    resp = await RefreshSession(db, "old-token").refresh(make_request())
+
+    assert calls[0]["refresh_token_raw"] == "old-token"
+    assert calls[0]["new_refresh_token_raw"] == resp.refresh_token != "old-token"
+    assert calls[0]["ip"] == "127.0.0.1"
+    assert db.commits == 1
+    payload = jwt.decode(
+        resp.access_token, jwt_helper.access_secret_key, algorithms=[jwt_helper.algorithm]
+    )
+    assert payload["sub"] == f"7:{session_id}"
+
+
+@pytest.mark.asyncio
+async def test_refresh_reuse_revokes_every_session(monkeypatch):
+    revoked = []
+
+    async def fake_rotate(self, db, **kwargs):
+        return None
+
+    async def fake_was_rotated(self, db, *, refresh_token_raw, grace_seconds):
+        return ReplayedToken(7, recent=False) if refresh_token_raw == "stolen" else None
+
+    async def fake_revoke_all(self, db, *, user_id, reason):
+        revoked.append((user_id, reason))
+        return 2
+
+    monkeypatch.setattr(AuthSessionCRUD, "rotate", fake_rotate)
+    monkeypatch.setattr(AuthSessionCRUD, "was_rotated", fake_was_rotated)
+    monkeypatch.setattr(AuthSessionCRUD, "revoke_all_for_user", fake_revoke_all)
+
+    with pytest.raises(HTTPException) as exc:
+        await RefreshSession(FakeDb(), "unknown").refresh(make_request())
+    assert exc.value.status_code == 401
+    assert revoked == []
+
+    with pytest.raises(HTTPException) as exc:
+        await RefreshSession(FakeDb(), "stolen").refresh(make_request())
+    assert exc.value.status_code == 401
+    assert revoked == [(7, "refresh_token_reuse")]
+
+
+@pytest.mark.asyncio
+async def test_refresh_replay_within_grace_window_only_refuses(monkeypatch):
+    revoked = []
+
+    async def fake_rotate(self, db, **kwargs):
+        return None
+
+    async def fake_was_rotated(self, db, *, refresh_token_raw, grace_seconds):
+        assert grace_seconds == settings.refresh_reuse_grace_seconds
+        return ReplayedToken(7, recent=True)
+
+    async def fake_revoke_all(self, db, *, user_id, reason):
+        revoked.append(user_id)
+        return 1
+
+    monkeypatch.setattr(AuthSessionCRUD, "rotate", fake_rotate)
+    monkeypatch.setattr(AuthSessionCRUD, "was_rotated", fake_was_rotated)
+    monkeypatch.setattr(AuthSessionCRUD, "revoke_all_for_user", fake_revoke_all)
+
+    with pytest.raises(HTTPException) as exc:
+        await RefreshSession(FakeDb(), "raced").refresh(make_request())
+    assert exc.value.status_code == 401
+    assert revoked == []
+
+
+@pytest.mark.asyncio
+async def test_refresh_endpoint(monkeypatch, app: FastAPI):
+    async def override_get_db_session():
+        yield FakeDb()
+    app.dependency_overrides[get_db_session] = override_get_db_session
+
+    async def fake_rotate(self, db, **kwargs):
+        return RotatedSession(
+            id=uuid.uuid4(), user_id=7, expires_at=datetime.now(timezone.utc) + timedelta(days=1)
+        )
+
+    monkeypatch.setattr(AuthSessionCRUD, "rotate", fake_rotate)
+    transport = ASGITransport(app=app)
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        response = await ac.post("/api/auth/refresh", json={"refresh_token": "old-token"})
+
+    assert response.status_code == 200
+    body = response.json()
+    assert body["token_type"] == "Bearer"
+    assert body["refresh_token"] != "old-token"
+    app.dependency_overrides.clear()
@@ -0,0 +1,96 @@
+import asyncio
+import uuid
+from datetime import datetime, timedelta, timezone
+
+import pytest
+
+from app.core.ttl_cache import TTLCache
+from app.db.pg_notify import PgNotifyListener
+from app.services.auth.session_cache import SessionCache
+
+
+def test_ttl_cache_expires_and_evicts_least_recently_used():
+    now = [0.0]
+    cache = TTLCache(maxsize=2, ttl=10, clock=lambda: now[0])
+
+    cache.set("a", 1)
+    cache.set("b", 2)
+    assert cache.get("a") == 1  # "b" is now least recently used
+    cache.set("c", 3)
+    assert cache.get("b") is None
+    assert len(cache) == 2
+
+    now[0] = 10.0
+    assert cache.get("a") is None
+    assert cache.get("c") is None
+    assert len(cache) == 0
+
+
+def test_session_cache_respects_session_expiry():
+    cache = SessionCache(maxsize=10, ttl=60)
+    live, expired = uuid.uuid4(), uuid.uuid4()
+    cache.add(live, datetime.now(timezone.utc) + timedelta(hours=1))
+    cache.add(expired, datetime.now(timezone.utc) - timedelta(seconds=1))
+
+    assert cache.is_active(live)
+    assert not cache.is_active(expired)
+
+    cache.on_revoked("garbage")
+    assert not cache.is_active(live)
+
+
+class FakeConnection:
+    def __init__(self):
+        self.listeners = {}
+        self.on_terminate = None
+        self.closed = False
+
+    async def add_listener(self, channel, callback):
+        self.listeners[channel] = callback
+
+    def add_termination_listener(self, callback):
+        self.on_terminate = callback
+
+    async def execute(self, query, timeout=None):
+        return "SELECT 1"
+
+    async def close(self, timeout=None):
+        self.closed = True
+
+    def publish(self, channel, payload):
+        self.listeners[channel](self, 1, channel, payload)
+
+    def drop(self):
+        self.on_terminate(self)
+
+
+@pytest.mark.asyncio
+async def test_listener_dispatches_and_reconnects():
+    connections = []
+    attempts = []
+
+    async def connect(dsn):
+        attempts.append(dsn)
+        if len(attempts) == 1:
+            raise OSError("database starting up")
+        connections.append(FakeConnection())
+        return connections[-1]
+
+    received, reconnects = [], []
+    listener = PgNotifyListener(
+        "chan", received.append, on_reconnect=lambda: reconnects.append(1),
+        dsn="postgresql://test", connect=connect, retry_delay=0,
+    )
+    await listener.start()
+    await asyncio.wait_for(listener.connected.wait(), 1)
+
+    connections[0].publish("chan", "one")
+    connections[0].drop()
+    while len(connections) < 2 or not listener.connected.is_set():
+        await asyncio.sleep(0)
+    connections[1].publish("chan", "two")
+    await listener.stop()
+
+    assert received == ["one", "two"]
+    assert reconnects == [1, 1]
+    assert connections[0].closed
@@ -0,0 +1,105 @@
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from sqlalchemy.dialects import postgresql
+
+from app.db.crud.auth_sessions import AuthSessionCRUD
+from app.services.auth.session_purge import SessionPurger
+
+
+class FakeLocks:
+    """Advisory locks shared by every fake connection, like one Postgres."""
+
+    def __init__(self):
+        self.held: set[int] = set()
+
+    @asynccontextmanager
+    async def connection(self):
+        yield FakeConnection(self)
+
+
+class FakeConnection:
+    def __init__(self, locks: FakeLocks):
+        self.locks = locks
+
+    async def execute(self, stmt):
+        fn = stmt.selected_columns[0]
+        key = fn.clauses.clauses[0].value
+        if fn.name == "pg_try_advisory_lock":
+            acquired = key not in self.locks.held
+            self.locks.held.add(key)
+        else:
+            self.locks.held.discard(key)
+            acquired = True
+        return SimpleNamespace(scalar=lambda: acquired)
+
+    async def commit(self):
+        pass
+
+
+def make_purger(monkeypatch, remaining: int, locks: FakeLocks, **kwargs) -> tuple[SessionPurger, list]:
+    calls = []
+
+    async def fake_purge_batch(self, db, *, before, limit):
+        nonlocal remaining
+        calls.append((before, limit))
+        count = min(limit, remaining)
+        remaining -= count
+        return count
+
+    @asynccontextmanager
+    async def sessions():
+        yield None
+
+    monkeypatch.setattr(AuthSessionCRUD, "purge_batch", fake_purge_batch)
+    purger = SessionPurger(sessions=sessions, connections=locks.connection, lock_key=42, **kwargs)
+    return purger, calls
+
+
+@pytest.mark.asyncio
+async def test_purge_batch_is_one_set_based_delete():
+    class RecordingDb:
+        async def execute(self, stmt):
+            self.stmt = stmt
+            return SimpleNamespace(rowcount=3)
+
+    db = RecordingDb()
+    before = datetime.now(timezone.utc)
+
+    assert await AuthSessionCRUD().purge_batch(db, before=before, limit=500) == 3
+
+    sql = str(db.stmt.compile(dialect=postgresql.dialect()))
+    assert sql.startswith("DELETE FROM auth_sessions WHERE ctid IN (SELECT ctid")
+    assert "LIMIT" in sql
+    assert "FOR UPDATE SKIP LOCKED" in sql
+
+
+@pytest.mark.asyncio
+async def test_purge_runs_batches_until_short_and_reports(monkeypatch):
+    locks = FakeLocks()
+    purger, calls = make_purger(
+        monkeypatch, remaining=25, locks=locks, batch_size=10, retention=timedelta(days=7)
+    )
+
+    report = await purger.run_once()
+
+    assert (report.deleted, report.batches) == (25, 3)
+    assert report.rows_per_second > 0
+    assert purger.last_report is report
+    assert [limit for _, limit in calls] == [10, 10, 10]
+    cutoff = datetime.now(timezone.utc) - timedelta(days=7)
+    assert abs((calls[0][0] - cutoff).total_seconds()) < 5
+    assert locks.held == set()
+
+
+@pytest.mark.asyncio
+async def test_purge_skipped_while_another_worker_holds_the_lock(monkeypatch):
+    locks = FakeLocks()
+    locks.held.add(42)
+    purger, calls = make_purger(monkeypatch, remaining=5, locks=locks)
+
+    assert await purger.run_once() is None
+    assert calls == []
+    assert locks.held == {42}
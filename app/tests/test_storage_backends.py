@@ -0,0 +1,104 @@
+import io
+import os
+import tempfile
+
+import pytest
+from starlette.datastructures import UploadFile
+
+from app.services.storage import local_disk
+from app.services.storage.backends import build_storage
+from app.services.storage.do_space import DOSpace
+from app.services.storage.in_memory import InMemoryStorage
+from app.services.storage.local_disk import LocalDiskStorage
+
+
+def make_upload(data: bytes, max_size: int) -> UploadFile:
+    spool = tempfile.SpooledTemporaryFile(max_size=max_size)
+    spool.write(data)
+    spool.seek(0)
+    return UploadFile(file=spool, filename="page.jpg")
+
+
+@pytest.fixture
+def local_storage(tmp_path) -> LocalDiskStorage:
+    return LocalDiskStorage(str(tmp_path), "http://files.test", "secret")
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["memory", "local"])
+async def test_backend_roundtrip(backend, local_storage):
+    storage = InMemoryStorage() if backend == "memory" else local_storage
+    data = os.urandom(3000)
+
+    await storage.put("uploads/a.jpg", make_upload(data, max_size=10_000), "image/jpeg")
+
+    assert await storage.get("uploads/a.jpg") == data
+    assert b"".join([c async for c in storage.stream("uploads/a.jpg", chunk_size=1024)]) == data
+    info = await storage.head("uploads/a.jpg")
+    assert info.size == len(data)
+    assert info.content_type == "image/jpeg"
+    assert storage.public_url("uploads/a.jpg").endswith("/uploads/a.jpg")
+    assert await storage.delete("uploads/a.jpg") is True
+    assert await storage.delete("uploads/a.jpg") is False
+    assert await storage.get("uploads/a.jpg") is None
+    assert await storage.head("uploads/a.jpg") is None
+
+
+@pytest.mark.asyncio
+async def test_local_put_uses_sendfile_for_spooled_to_disk_uploads(local_storage, monkeypatch):
+    calls = []
+    real_sendfile = local_disk._sendfile
+
+    def spy(src, out_fd):
+        calls.append(src)
+        real_sendfile(src, out_fd)
+
+    monkeypatch.setattr(local_disk, "_sendfile", spy)
+    big = os.urandom(local_disk.COPY_CHUNK + 5000)
+    small = os.urandom(5000)
+
+    # Over one chunk: zero-copy path, whether or not the spool is on disk yet.
+    await local_storage.put("uploads/big.jpg", make_upload(big, max_size=100))
+    await local_storage.put("uploads/big2.jpg", make_upload(big, max_size=len(big) + 1))
+    # Small: regular chunked copy.
+    await local_storage.put("uploads/small.jpg", make_upload(small, max_size=10_000))
+
+    assert len(calls) == 2
+    assert await local_storage.get("uploads/big.jpg") == big
+    assert await local_storage.get("uploads/big2.jpg") == big
+    assert await local_storage.get("uploads/small.jpg") == small
+
+
+@pytest.mark.asyncio
+async def test_local_put_copies_from_current_position(local_storage):
+    payload = os.urandom(local_disk.COPY_CHUNK)
+    upload = make_upload(b"skipme" + payload, max_size=1)
+    await upload.read(6)
+
+    await local_storage.put("uploads/a.bin", upload)
+
+    assert await local_storage.get("uploads/a.bin") == payload
+
+
+@pytest.mark.asyncio
+async def test_local_rejects_keys_outside_root(local_storage):
+    with pytest.raises(ValueError):
+        await local_storage.put("../escape.jpg", io.BytesIO(b""))
+
+
+def test_local_presign_is_verifiable(local_storage):
+    url = local_storage.presign("uploads/a.jpg", method="PUT", expires_in=60)
+    query = dict(p.split("=") for p in url.split("?")[1].split("&"))
+
+    assert query["signature"] == local_storage.signature("uploads/a.jpg", "PUT", int(query["expires"]))
+
+
+def test_build_storage_selects_backend(tmp_path, monkeypatch):
+    from app.configs.settings import settings
+
+    monkeypatch.setattr(settings, "storage_local_root", str(tmp_path))
+    assert isinstance(build_storage("do_spaces"), DOSpace)
+    assert isinstance(build_storage("local"), LocalDiskStorage)
+    assert isinstance(build_storage("memory"), InMemoryStorage)
+    with pytest.raises(ValueError):
+        build_storage("ftp")
@@ -2,14 +2,18 @@ import json
 import io
 import pytest
 import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
 from fastapi import FastAPI, HTTPException
 from httpx import ASGITransport, AsyncClient
 
 from app.configs.constants import ProcessingStatus
+from app.services.image_uploads.schemas import UploadPage
 from app.services.image_uploads.uploads import upload_service
-from app.db.pg_engine import get_db_session
+from app.db.crud.auth_sessions import AuthSessionCRUD
+from app.db.pg_engine import get_db_session, get_read_db_session, sessionmanager
 from app.core.jwt_helper import jwt_helper
-from app.services.auth.auth_dependency import auth_dependency
+from app.services.auth.auth_dependency import auth_dependency, read_auth_dependency
 
 
 @pytest.mark.asyncio
@@ -128,6 +132,7 @@ async def test_get_user_uploads(monkeypatch, app: FastAPI):
     transport = ASGITransport(app=app)
     fake_req = [
         {
+            "id": 1,
             "file_path": "https://example.com/a.jpg",
             "status": ProcessingStatus.UPLOADED.value,
             "chapter": 1,
@@ -135,6 +140,7 @@ async def test_get_user_uploads(monkeypatch, app: FastAPI):
             "line_end": 2,
         },
         {
+            "id": 2,
             "file_path": "https://example.com/b.jpg",
             "status": ProcessingStatus.PROCESSING.value,
             "chapter": 2,
@@ -145,14 +151,20 @@ async def test_get_user_uploads(monkeypatch, app: FastAPI):
 
     fake_resp = [
         {
+            "id": 1,
             "file_path": "https://example.com/a.jpg",
+            "normalized_path": None,
+            "variants": {},
             "status": "uploaded",
             "chapter": 1,
             "line_start": 1,
             "line_end": 2,
         },
         {
+            "id": 2,
             "file_path": "https://example.com/b.jpg",
+            "normalized_path": None,
+            "variants": {},
             "status": "processing",
             "chapter": 2,
             "line_start": 3,
@@ -160,8 +172,8 @@ async def test_get_user_uploads(monkeypatch, app: FastAPI):
         },
     ]
 
-    async def fake_get_user_uploads(db, user_id):
-        return fake_req
+    async def fake_get_user_uploads(db, user_id, query):
+        return UploadPage(items=fake_req)
 
     monkeypatch.setattr(upload_service, "get_user_uploads", fake_get_user_uploads)
 
@@ -189,8 +201,8 @@ async def test_get_user_uploads_empty(monkeypatch, app: FastAPI):
     }
     transport = ASGITransport(app=app)
 
-    async def fake_get_user_uploads(db, user_id):
-        return []
+    async def fake_get_user_uploads(db, user_id, query):
+        return UploadPage(items=[])
 
     monkeypatch.setattr(upload_service, "get_user_uploads", fake_get_user_uploads)
 
@@ -210,3 +222,222 @@ async def test_get_user_uploads_empty(monkeypatch, app: FastAPI):
 
 
 
+
+
+@pytest.mark.asyncio
+async def test_presign_upload(monkeypatch, app: FastAPI):
+    app.dependency_overrides[auth_dependency] = lambda: {
+        "user_id": 42,
+        "session_id": uuid.uuid4(),
+    }
+    transport = ASGITransport(app=app)
+    fake_resp = {
+        "upload_id": "token",
+        "upload_url": "https://bucket.example.com/uploads/a.jpg?X-Amz-Signature=x",
+        "method": "PUT",
+        "headers": {"Content-Type": "image/jpeg"},
+        "expires_in": 900,
+    }
+
+    async def fake_create_presigned_upload(user_id, body):
+        assert user_id == 42
+        assert body.content_type == "image/jpeg"
+        return fake_resp
+
+    monkeypatch.setattr(upload_service, "create_presigned_upload", fake_create_presigned_upload)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post(
+            "/api/image/upload/presign",
+            json={
+                "chapter": 1, "line_start": 2, "line_end": 3, "script_id": 1,
+                "filename": "a.jpg", "content_type": "image/jpeg",
+            },
+        )
+
+    assert resp.status_code == 200
+    assert resp.json() == fake_resp
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_complete_upload(monkeypatch, app: FastAPI):
+    async def override_get_db_session():
+        yield None
+    app.dependency_overrides[get_db_session] = override_get_db_session
+    app.dependency_overrides[auth_dependency] = lambda: {
+        "user_id": 42,
+        "session_id": uuid.uuid4(),
+    }
+    transport = ASGITransport(app=app)
+    fake_resp = {"file_path": "https://example.com/foo.jpg", "message": "Uploaded successfully"}
+
+    async def fake_complete(db, user_id, upload_id):
+        assert (user_id, upload_id) == (42, "token")
+        return fake_resp
+
+    monkeypatch.setattr(upload_service, "complete_presigned_upload", fake_complete)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post("/api/image/upload/complete", json={"upload_id": "token"})
+
+    assert resp.status_code == 200
+    assert resp.json() == {**fake_resp, "normalized_path": None}
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_get_upload_variant_redirects(monkeypatch, app: FastAPI):
+    async def override_get_db_session():
+        yield None
+    app.dependency_overrides[get_db_session] = override_get_db_session
+    app.dependency_overrides[auth_dependency] = lambda: {
+        "user_id": 42,
+        "session_id": uuid.uuid4(),
+    }
+    transport = ASGITransport(app=app)
+
+    async def fake_get_variant_url(db, user_id, upload_id, name):
+        assert (user_id, upload_id, name) == (42, 3, "thumb")
+        return "https://example.com/uploads/a.thumb.webp"
+
+    monkeypatch.setattr(upload_service, "get_variant_url", fake_get_variant_url)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get("/api/image/uploads/3/variants/thumb")
+
+    assert resp.status_code == 307
+    assert resp.headers["location"] == "https://example.com/uploads/a.thumb.webp"
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_batch_upload(monkeypatch, app: FastAPI):
+    async def override_get_db_session():
+        yield None
+    app.dependency_overrides[get_db_session] = override_get_db_session
+    app.dependency_overrides[auth_dependency] = lambda: {
+        "user_id": 42,
+        "session_id": uuid.uuid4(),
+    }
+    transport = ASGITransport(app=app)
+
+    async def fake_upload_images(db, files, metadata, user_id):
+        assert user_id == 42
+        assert [f.filename for f in files] == ["a.jpg", "b.jpg"]
+        assert [m.line_start for m in metadata] == [1, 5]
+        return {"items": [
+            {"index": 0, "filename": "a.jpg", "id": 1, "file_path": "https://example.com/a.jpg"},
+            {"index": 1, "filename": "b.jpg", "error": "Failed to store file"},
+        ]}
+
+    monkeypatch.setattr(upload_service, "upload_images", fake_upload_images)
+    metadata = [
+        {"chapter": 1, "line_start": 1, "line_end": 4, "script_id": 1},
+        {"chapter": 1, "line_start": 5, "line_end": 9, "script_id": 1},
+    ]
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.post(
+            "/api/image/upload/batch",
+            files=[
+                ("files", ("a.jpg", io.BytesIO(b"A"), "image/jpeg")),
+                ("files", ("b.jpg", io.BytesIO(b"B"), "image/jpeg")),
+            ],
+            data={"metadata": json.dumps(metadata)},
+        )
+        bad = await ac.post(
+            "/api/image/upload/batch",
+            files=[("files", ("a.jpg", io.BytesIO(b"A"), "image/jpeg"))],
+            data={"metadata": "{}"},
+        )
+
+    assert resp.status_code == 200
+    assert [item["error"] for item in resp.json()["items"]] == [None, "Failed to store file"]
+    assert bad.status_code == 400
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_list_uploads_paginates_and_filters(monkeypatch, app: FastAPI):
+    async def override_get_db_session():
+        yield None
+    app.dependency_overrides[get_read_db_session] = override_get_db_session
+    app.dependency_overrides[read_auth_dependency] = lambda: {
+        "user_id": 42,
+        "session_id": uuid.uuid4(),
+    }
+    transport = ASGITransport(app=app)
+
+    async def fake_get_user_uploads_json(db, user_id, query):
+        assert (query.limit, query.cursor, query.chapter) == (1, "abc", 2)
+        assert query.status == ProcessingStatus.COMPLETED
+        item = {
+            "id": 7, "file_path": "https://example.com/a.jpg", "status": "completed",
+            "chapter": 2, "line_start": 1, "line_end": 3,
+        }
+        return json.dumps([item]).encode(), "next"
+
+    monkeypatch.setattr(upload_service, "get_user_uploads_json", fake_get_user_uploads_json)
+
+    async with AsyncClient(transport=transport, base_url="http://test") as ac:
+        resp = await ac.get(
+            "/api/image/uploads/",
+            params={"limit": 1, "cursor": "abc", "chapter": 2, "status": "completed"},
+        )
+        bad = await ac.get("/api/image/uploads/", params={"status": "deleted"})
+
+    assert resp.status_code == 200
+    assert resp.headers["x-next-cursor"] == "next"
+    assert [item["id"] for item in resp.json()] == [7]
+    assert bad.status_code == 422
+    app.dependency_overrides.clear()
+
+
+@pytest.mark.asyncio
+async def test_write_route_checks_out_one_connection(monkeypatch, app: FastAPI):
+    # Every session holds one pooled connection; count them rather than
+    # overriding the session dependencies.
+    checkouts = []
+
+    @asynccontextmanager
+    async def fake_session():
+        session = object()
+        checkouts.append(("primary", session))
+        yield session
+
+    @asynccontextmanager
+    async def fake_read_session(user_id=None, *, primary=False):
+        session = object()
+        checkouts.append(("read", session))
+        yield session
+
+    monkeypatch.setattr(sessionmanager, "session", fake_session)
+    monkeypatch.setattr(sessionmanager, "read_session", fake_read_session)
+    used = []
+
+    class Dummy:
+        expires_at = datetime.now(timezone.utc) + timedelta(days=1)
+
+    async def fake_get_active_by_id(self, db, session_id):
+        used.append(db)
+        return Dummy()
+
+    async def fake_delete_upload(db, user_id, upload_id):
+        used.append(db)
+        return {"message": "deleted"}
+
+    monkeypatch.setattr(AuthSessionCRUD, "get_active_by_id", fake_get_active_by_id)
+    monkeypatch.setattr(upload_service, "delete_upload", fake_delete_upload)
+    # A session this worker has not seen, so auth has to ask the database.
+    token = jwt_helper.create_access_token(sub=f"42:{uuid.uuid4()}")
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.delete(
+            "/api/image/uploads/3", headers={"Authorization": f"Bearer {token}"}
+        )
+
+    assert resp.status_code == 200
+    assert [kind for kind, _ in checkouts] == ["primary"]
+    # The auth check and the handler share that one session.
+    assert used == [checkouts[0][1], checkouts[0][1]]
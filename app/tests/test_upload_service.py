@@ -1,11 +1,38 @@
+import asyncio
+import hashlib
+import io
+import json
+import re
+from collections import namedtuple
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
 import pytest
+from fastapi import HTTPException
+from pydantic import TypeAdapter
+from sqlalchemy.dialects import postgresql
+from starlette.datastructures import UploadFile
+
+from app.db.crud.image_uploads import ImageUploadCRUD
+from app.services.image_uploads.schemas import (
+    ImageUploadInputRequest,
+    ImageUploadRecord,
+    PresignedUploadRequest,
+    UploadListQuery,
+)
 from app.services.image_uploads.uploads import UploadService
+from app.services.storage.base import PresignedUpload
+from app.services.storage.in_memory import InMemoryStorage
+from app.services.storage.local_disk import LocalDiskStorage
 from app.configs.constants import ProcessingStatus
 
 
 class DummyRow:
-    def __init__(self, file_path: str, status: ProcessingStatus, chapter: int, line_start: int, line_end: int):
+    def __init__(self, id: int, file_path: str, status: ProcessingStatus, chapter: int, line_start: int, line_end: int):
+        self.id = id
+        self.upload_timestamp = datetime(2025, 1, 1, tzinfo=timezone.utc) - timedelta(minutes=id)
         self.file_path = file_path
+        self.normalized_path = None
         self.status = status
         self.chapter = chapter
         self.line_start = line_start
@@ -16,17 +43,20 @@ class DummyRow:
 async def test_get_user_uploads_serializes_status(monkeypatch):
     service = UploadService()
 
-    async def fake_get_by_user(db, user_id):
+    async def fake_get_by_user(db, user_id, **kwargs):
         return [
-            DummyRow("https://a.jpg", ProcessingStatus.UPLOADED, 1, 1, 2),
-            DummyRow("https://b.jpg", ProcessingStatus.PROCESSING, 2, 3, 4),
+            DummyRow(1, "https://a.jpg", ProcessingStatus.UPLOADED, 1, 1, 2),
+            DummyRow(2, "https://b.jpg", ProcessingStatus.PROCESSING, 2, 3, 4),
         ]
 
     monkeypatch.setattr(service.crud, "get_by_user", fake_get_by_user)
 
-    records = await service.get_user_uploads(None, 5)
+    records = (await service.get_user_uploads(None, 5)).items
     assert records[0].model_dump() == {
+        "id": 1,
         "file_path": "https://a.jpg",
+        "normalized_path": None,
+        "variants": {},
         "status": "uploaded",
         "chapter": 1,
         "line_start": 1,
@@ -39,11 +69,446 @@ async def test_get_user_uploads_serializes_status(monkeypatch):
 async def test_get_user_uploads_empty(monkeypatch):
     service = UploadService()
 
-    async def fake_get_by_user(db, user_id):
+    async def fake_get_by_user(db, user_id, **kwargs):
         return []
 
     monkeypatch.setattr(service.crud, "get_by_user", fake_get_by_user)
 
-    records = await service.get_user_uploads(None, 5)
-    assert records == []
-    assert isinstance(records, list)
+    page = await service.get_user_uploads(None, 5)
+    assert page.items == []
+    assert page.next_cursor is None
+
+
+@pytest.mark.asyncio
+async def test_get_user_uploads_pages_with_cursor(monkeypatch):
+    service = UploadService()
+    rows = [DummyRow(i, f"https://{i}.jpg", ProcessingStatus.UPLOADED, 1, i, i) for i in range(1, 6)]
+    calls = []
+
+    async def fake_get_by_user(db, user_id, *, limit, after, **filters):
+        calls.append(filters)
+        remaining = [r for r in rows if after is None or (r.upload_timestamp, r.id) < after]
+        return remaining[:limit]
+
+    monkeypatch.setattr(service.crud, "get_by_user", fake_get_by_user)
+
+    seen, cursor = [], None
+    while True:
+        page = await service.get_user_uploads(
+            None, 5, UploadListQuery(limit=2, cursor=cursor, chapter=1, status="uploaded")
+        )
+        seen += [item.id for item in page.items]
+        cursor = page.next_cursor
+        if cursor is None:
+            break
+
+    assert seen == [1, 2, 3, 4, 5]
+    assert len(calls) == 3
+    assert calls[0]["chapter"] == 1
+    assert calls[0]["status"] is ProcessingStatus.UPLOADED
+
+    with pytest.raises(HTTPException) as exc:
+        await service.get_user_uploads(None, 5, UploadListQuery(cursor="not-a-cursor"))
+    assert exc.value.status_code == 400
+
+
+ListingRow = namedtuple(
+    "ListingRow", "id file_path normalized_path status chapter line_start line_end upload_timestamp"
+)
+
+
+@pytest.mark.asyncio
+async def test_get_user_uploads_json_matches_model_path(monkeypatch):
+    storage = InMemoryStorage()
+    processor = SimpleNamespace(variants={"thumb": 256}, file_ext="webp")
+    service = UploadService(storage=storage, processor=processor)
+    rows = [DummyRow(i, storage.public_url(f"uploads/{i}.jpg"), status, 1, i, i + 1)
+            for i, status in enumerate(ProcessingStatus, start=1)]
+    rows[0].normalized_path = storage.public_url("uploads/1.webp")
+
+    async def fake_get_by_user(db, user_id, **kwargs):
+        return rows
+
+    async def fake_get_listing_by_user(db, user_id, **kwargs):
+        # Plain rows in ``LISTING_COLUMNS`` order, status as stored.
+        return [
+            ListingRow(r.id, r.file_path, r.normalized_path, int(r.status), r.chapter,
+                       r.line_start, r.line_end, r.upload_timestamp)
+            for r in rows
+        ]
+
+    monkeypatch.setattr(service.crud, "get_by_user", fake_get_by_user)
+    monkeypatch.setattr(service.crud, "get_listing_by_user", fake_get_listing_by_user)
+
+    records = TypeAdapter(list[ImageUploadRecord])
+    for query in (UploadListQuery(), UploadListQuery(limit=2)):
+        page = await service.get_user_uploads(None, 5, query)
+        body, next_cursor = await service.get_user_uploads_json(None, 5, query)
+        assert body == records.dump_json(page.items)
+        assert next_cursor == page.next_cursor
+    assert json.loads(body)[0]["variants"]["thumb"].endswith(".webp")
+
+
+class FakeDb:
+    async def commit(self):
+        pass
+
+
+class FakeBlobs:
+    """In-memory stand-in for ImageBlobCRUD."""
+
+    def __init__(self):
+        self.blobs: dict[tuple[int, bytes], dict] = {}
+
+    async def acquire(self, db, *, user_id, content_hash):
+        blob = self.blobs.get((user_id, content_hash))
+        if blob is None:
+            return None
+        blob["ref_count"] += 1
+        return SimpleNamespace(**blob)
+
+    async def register(self, db, *, user_id, content_hash, file_path, normalized_path=None):
+        blob = self.blobs.setdefault(
+            (user_id, content_hash),
+            {"file_path": file_path, "normalized_path": normalized_path, "ref_count": 0},
+        )
+        blob["ref_count"] += 1
+        return SimpleNamespace(**blob)
+
+    async def get_many(self, db, *, user_id, content_hashes):
+        return {
+            h: SimpleNamespace(**self.blobs[(user_id, h)])
+            for h in content_hashes
+            if (user_id, h) in self.blobs
+        }
+
+    async def acquire_many(self, db, *, user_id, counts):
+        acquired = {}
+        for h, n in counts.items():
+            if (user_id, h) in self.blobs:
+                self.blobs[(user_id, h)]["ref_count"] += n
+                acquired[h] = SimpleNamespace(**self.blobs[(user_id, h)])
+        return acquired
+
+    async def register_many(self, db, *, user_id, blobs):
+        registered = {}
+        for h, file_path, normalized_path, n in blobs:
+            blob = self.blobs.setdefault(
+                (user_id, h),
+                {"file_path": file_path, "normalized_path": normalized_path, "ref_count": 0},
+            )
+            blob["ref_count"] += n
+            registered[h] = SimpleNamespace(**blob)
+        return registered
+
+    async def release(self, db, *, user_id, content_hash):
+        blob = self.blobs[(user_id, content_hash)]
+        blob["ref_count"] -= 1
+        if blob["ref_count"] <= 0:
+            del self.blobs[(user_id, content_hash)]
+            return blob["file_path"]
+        return None
+
+
+def make_dedup_service(monkeypatch, storage, processor=None):
+    service = UploadService(storage=storage, processor=processor)
+    service.blobs = FakeBlobs()
+    rows: dict[int, SimpleNamespace] = {}
+
+    async def fake_create(db, **fields):
+        row = SimpleNamespace(id=len(rows) + 1, **fields)
+        rows[row.id] = row
+        return row
+
+    async def fake_create_many(db, params):
+        return [(await fake_create(db, **fields)).id for fields in params]
+
+    async def fake_get_owned(db, *, user_id, upload_id):
+        row = rows.get(upload_id)
+        return row if row and row.user_id == user_id else None
+
+    async def fake_delete(db, row):
+        del rows[row.id]
+
+    monkeypatch.setattr(service.crud, "create", fake_create)
+    monkeypatch.setattr(service.crud, "create_many", fake_create_many)
+    monkeypatch.setattr(service.crud, "get_owned", fake_get_owned)
+    monkeypatch.setattr(service.crud, "delete", fake_delete)
+    return service, rows
+
+
+async def upload(service, data: bytes, user_id: int = 7, filename: str = "page.jpg"):
+    file = UploadFile(file=io.BytesIO(data), filename=filename)
+    return await service.upload_image(
+        FakeDb(), file, user_id=user_id, chapter=1, line_start=2, line_end=3, script_id=1
+    )
+
+
+@pytest.mark.asyncio
+async def test_upload_image_streams_to_storage_backend(monkeypatch):
+    storage = InMemoryStorage()
+    service, rows = make_dedup_service(monkeypatch, storage)
+
+    resp = await upload(service, b"JPEGDATA")
+
+    key = resp.file_path.removeprefix(storage.base_url + "/")
+    assert re.fullmatch(rf"uploads/7/{hashlib.sha256(b'JPEGDATA').hexdigest()}-[0-9a-f]{{32}}\.jpg", key)
+    assert await storage.get(key) == b"JPEGDATA"
+    assert rows[1].file_path == resp.file_path
+    assert rows[1].user_id == 7
+    assert rows[1].content_hash == hashlib.sha256(b"JPEGDATA").digest()
+
+
+@pytest.mark.asyncio
+async def test_duplicate_upload_skips_storage_put(monkeypatch):
+    storage = InMemoryStorage()
+    service, rows = make_dedup_service(monkeypatch, storage)
+    puts = []
+    real_put = storage.put
+
+    async def counting_put(key, source, content_type=None):
+        puts.append(key)
+        await real_put(key, source, content_type)
+
+    monkeypatch.setattr(storage, "put", counting_put)
+
+    first = await upload(service, b"PAGE")
+    second = await upload(service, b"PAGE")
+    other_user = await upload(service, b"PAGE", user_id=8)
+
+    assert first.file_path == second.file_path
+    assert other_user.file_path != first.file_path
+    assert len(puts) == 2
+    assert len(rows) == 3
+
+
+@pytest.mark.asyncio
+async def test_delete_removes_object_only_after_last_reference(monkeypatch):
+    storage = InMemoryStorage()
+    service, rows = make_dedup_service(monkeypatch, storage)
+
+    first = await upload(service, b"PAGE")
+    await upload(service, b"PAGE")
+    key = first.file_path.removeprefix(storage.base_url + "/")
+
+    await service.delete_upload(FakeDb(), 7, 1)
+    assert await storage.get(key) == b"PAGE"
+
+    await service.delete_upload(FakeDb(), 7, 2)
+    assert await storage.get(key) is None
+    assert rows == {}
+
+
+@pytest.mark.asyncio
+async def test_delete_does_not_remove_concurrent_reupload(monkeypatch):
+    storage = InMemoryStorage()
+    service, rows = make_dedup_service(monkeypatch, storage)
+    first = await upload(service, b"PAGE")
+    old_key = first.file_path.removeprefix(storage.base_url + "/")
+
+    # Hold the delete after its commit, before it removes the object.
+    committed, resume = asyncio.Event(), asyncio.Event()
+    real_delete = storage.delete
+
+    async def paused_delete(key):
+        committed.set()
+        await resume.wait()
+        await real_delete(key)
+
+    monkeypatch.setattr(storage, "delete", paused_delete)
+    deleting = asyncio.create_task(service.delete_upload(FakeDb(), 7, 1))
+    await committed.wait()
+
+    again = await upload(service, b"PAGE")
+    resume.set()
+    await deleting
+
+    new_key = again.file_path.removeprefix(storage.base_url + "/")
+    assert new_key != old_key
+    assert await storage.get(old_key) is None
+    assert await storage.get(new_key) == b"PAGE"
+    assert [row.file_path for row in rows.values()] == [again.file_path]
+
+
+@pytest.mark.asyncio
+async def test_delete_rejects_other_users_uploads(monkeypatch):
+    service, rows = make_dedup_service(monkeypatch, InMemoryStorage())
+    await upload(service, b"PAGE")
+
+    with pytest.raises(HTTPException) as exc:
+        await service.delete_upload(FakeDb(), 8, 1)
+    assert exc.value.status_code == 404
+    assert len(rows) == 1
+
+
+def batch_metadata(count: int) -> list[ImageUploadInputRequest]:
+    return [
+        ImageUploadInputRequest(chapter=1, line_start=i, line_end=i, script_id=1)
+        for i in range(count)
+    ]
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_stores_each_new_image_once(monkeypatch):
+    storage = InMemoryStorage()
+    service, rows = make_dedup_service(monkeypatch, storage)
+    puts = []
+    real_put = storage.put
+
+    async def counting_put(key, source, content_type=None):
+        puts.append(key)
+        await real_put(key, source, content_type)
+
+    monkeypatch.setattr(storage, "put", counting_put)
+    first = await upload(service, b"PAGE-1")
+    files = [
+        UploadFile(file=io.BytesIO(data), filename=f"p{i}.jpg")
+        for i, data in enumerate([b"PAGE-1", b"PAGE-2", b"PAGE-2", b"PAGE-3"])
+    ]
+
+    resp = await service.upload_images(FakeDb(), files, batch_metadata(4), user_id=7)
+
+    assert [item.error for item in resp.items] == [None] * 4
+    assert resp.items[0].file_path == first.file_path
+    assert resp.items[1].file_path == resp.items[2].file_path
+    assert len(puts) == 3
+    assert [rows[item.id].line_start for item in resp.items] == [0, 1, 2, 3]
+    refs = {blob["file_path"]: blob["ref_count"] for blob in service.blobs.blobs.values()}
+    assert refs[first.file_path] == 2
+    assert refs[resp.items[1].file_path] == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_reports_failures_per_item(monkeypatch):
+    storage = InMemoryStorage()
+    service, rows = make_dedup_service(monkeypatch, storage)
+    real_put = storage.put
+
+    async def flaky_put(key, source, content_type=None):
+        if (await source.read(3)) == b"BAD":
+            raise RuntimeError("storage unavailable")
+        await source.seek(0)
+        await real_put(key, source, content_type)
+
+    monkeypatch.setattr(storage, "put", flaky_put)
+    files = [
+        UploadFile(file=io.BytesIO(data), filename="p.jpg")
+        for data in [b"GOOD", b"BAD!", b"FINE"]
+    ]
+
+    resp = await service.upload_images(FakeDb(), files, batch_metadata(3), user_id=7)
+
+    assert [item.error for item in resp.items] == [None, "Failed to store file", None]
+    assert resp.items[1].id is None
+    assert len(rows) == 2
+
+
+@pytest.mark.asyncio
+async def test_batch_upload_rejects_mismatched_metadata(monkeypatch):
+    service, _ = make_dedup_service(monkeypatch, InMemoryStorage())
+    files = [UploadFile(file=io.BytesIO(b"A"), filename="a.jpg")]
+
+    with pytest.raises(HTTPException) as exc:
+        await service.upload_images(FakeDb(), files, batch_metadata(2), user_id=7)
+    assert exc.value.status_code == 400
+
+
+class PresignableStorage(InMemoryStorage):
+    """In-memory storage that hands out upload URLs, as an object store would."""
+
+    def presign_upload(self, key, *, content_type, expires_in=900):
+        url = self.presign(key, method="PUT", expires_in=expires_in)
+        return PresignedUpload(url=url, method="PUT", headers={"Content-Type": content_type})
+
+
+def presign_request(**overrides) -> PresignedUploadRequest:
+    fields = dict(
+        chapter=1, line_start=2, line_end=3, script_id=1,
+        filename="page.jpg", content_type="image/jpeg",
+    )
+    fields.update(overrides)
+    return PresignedUploadRequest(**fields)
+
+
+@pytest.mark.asyncio
+async def test_presigned_upload_flow(monkeypatch):
+    storage = PresignableStorage()
+    service = UploadService(storage=storage)
+    rows = {}
+
+    async def fake_create_or_get(db, **fields):
+        return rows.setdefault((fields["user_id"], fields["file_path"]), fields)
+
+    monkeypatch.setattr(service.crud, "create_or_get", fake_create_or_get)
+
+    presigned = await service.create_presigned_upload(7, presign_request())
+    assert presigned.method == "PUT"
+    assert presigned.headers["Content-Type"] == "image/jpeg"
+
+    with pytest.raises(HTTPException) as exc:
+        await service.complete_presigned_upload(None, 7, presigned.upload_id)
+    assert exc.value.status_code == 409
+
+    # The client uploads straight to storage.
+    key = presigned.upload_url.split("?")[0].removeprefix(storage.base_url + "/")
+    await storage.put(key, UploadFile(file=io.BytesIO(b"JPEGDATA")), "image/jpeg")
+
+    resp = await service.complete_presigned_upload(None, 7, presigned.upload_id)
+    again = await service.complete_presigned_upload(None, 7, presigned.upload_id)
+
+    assert resp.file_path == again.file_path == storage.public_url(key)
+    assert len(rows) == 1
+    assert rows[(7, resp.file_path)]["chapter"] == 1
+
+
+@pytest.mark.asyncio
+async def test_create_or_get_inserts_once():
+    statements = []
+    existing = SimpleNamespace(id=1)
+
+    class RecordingDb:
+        async def execute(self, stmt):
+            statements.append(stmt)
+            # The INSERT hit the unique index; the lookup finds the winner.
+            row = None if len(statements) == 1 else existing
+            return SimpleNamespace(scalars=lambda: SimpleNamespace(first=lambda: row))
+
+        async def commit(self):
+            pass
+
+    row = await ImageUploadCRUD().create_or_get(
+        RecordingDb(), user_id=7, file_path="https://cdn/a.jpg", chapter=1, line_start=1, line_end=2
+    )
+
+    assert row is existing
+    insert = str(statements[0].compile(dialect=postgresql.dialect()))
+    assert "ON CONFLICT (user_id, file_path) WHERE content_hash IS NULL DO NOTHING" in insert
+    assert len(statements) == 2
+
+
+@pytest.mark.asyncio
+@pytest.mark.parametrize("backend", ["local", "memory"])
+async def test_presign_rejected_by_storage_clients_cannot_reach(tmp_path, backend):
+    storage = (
+        LocalDiskStorage(str(tmp_path), "http://files.test", "secret")
+        if backend == "local" else InMemoryStorage()
+    )
+    service = UploadService(storage=storage)
+
+    with pytest.raises(HTTPException) as exc:
+        await service.create_presigned_upload(7, presign_request())
+    assert exc.value.status_code == 501
+
+
+@pytest.mark.asyncio
+async def test_presigned_upload_rejects_other_users_and_non_images():
+    service = UploadService(storage=PresignableStorage())
+
+    with pytest.raises(HTTPException) as exc:
+        await service.create_presigned_upload(7, presign_request(content_type="text/html"))
+    assert exc.value.status_code == 400
+
+    presigned = await service.create_presigned_upload(7, presign_request())
+    with pytest.raises(HTTPException) as exc:
+        await service.complete_presigned_upload(None, 8, presigned.upload_id)
+    assert exc.value.status_code == 400
@@ -0,0 +1,216 @@
+import asyncio
+import json
+import uuid
+from contextlib import asynccontextmanager
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+import pytest
+from fastapi import FastAPI, HTTPException
+from httpx import ASGITransport, AsyncClient
+
+from app.configs.constants import ProcessingStatus
+from app.db.pg_engine import get_read_db_session
+from app.services.auth.auth_dependency import read_auth_dependency
+from app.services.image_uploads import status_events
+from app.services.image_uploads.pagination import decode_cursor, encode_cursor
+from app.services.image_uploads.status_events import StatusEvent, UploadStatusHub
+
+T0 = datetime(2024, 1, 1, tzinfo=timezone.utc)
+
+
+def event(upload_id: int, status=ProcessingStatus.COMPLETED, user_id: int = 1, seconds: int = 0):
+    return StatusEvent(user_id, upload_id, status, T0 + timedelta(seconds=seconds))
+
+
+def payload(e: StatusEvent) -> str:
+    return json.dumps(
+        {"user_id": e.user_id, "id": e.upload_id, "status": int(e.status), "updated_at": e.updated_at.isoformat()}
+    )
+
+
+def parse(chunk: bytes) -> dict:
+    fields = dict(line.split(": ", 1) for line in chunk.decode().strip().split("\n"))
+    fields["data"] = json.loads(fields["data"])
+    return fields
+
+
+class FakeUploads:
+    """``changed_since`` over an in-memory table."""
+
+    def __init__(self, events: list[StatusEvent]):
+        self.rows = [
+            SimpleNamespace(user_id=e.user_id, id=e.upload_id, status=int(e.status), updated_at=e.updated_at)
+            for e in events
+        ]
+        self.calls = []
+
+    async def changed_since(self, db, user_id, *, after, limit):
+        self.calls.append(after)
+        rows = sorted(
+            (r for r in self.rows if r.user_id == user_id and (r.updated_at, r.id) > after),
+            key=lambda r: (r.updated_at, r.id),
+        )
+        return rows[:limit]
+
+
+def make_hub(rows=(), **kwargs) -> UploadStatusHub:
+    @asynccontextmanager
+    async def sessions():
+        yield None
+
+    kwargs.setdefault("overlap", 0)
+    hub = UploadStatusHub(sessions=sessions, **kwargs)
+    hub.crud = FakeUploads(list(rows))
+    return hub
+
+
+def test_event_round_trips_through_payload():
+    e = event(7, ProcessingStatus.FAILED, user_id=3, seconds=5)
+    assert StatusEvent.from_payload(payload(e)) == e
+    fields = parse(e.to_sse())
+    assert fields["event"] == "status"
+    assert decode_cursor(fields["id"]) == e.key
+    assert fields["data"] == {"id": 7, "status": "failed", "updated_at": e.updated_at.isoformat()}
+
+
+@pytest.mark.asyncio
+async def test_live_events_reach_only_that_users_streams():
+    hub = make_hub()
+    mine = hub.open_stream(1)
+    other = hub.open_stream(2)
+    assert (await anext(mine)).startswith(b"retry:")
+    await anext(other)
+
+    pending = asyncio.ensure_future(anext(mine))
+    await asyncio.sleep(0)
+    hub.on_message(payload(event(10)))
+    assert parse(await pending)["data"]["id"] == 10
+    assert len(hub) == 2
+
+    hub.close()
+    with pytest.raises(StopAsyncIteration):
+        await anext(other)
+    await mine.aclose()
+    await other.aclose()
+    assert len(hub) == 0
+    assert hub.crud.calls == []
+
+
+@pytest.mark.asyncio
+async def test_resume_catches_up_in_pages():
+    rows = [event(i, seconds=i) for i in range(1, 6)] + [event(99, user_id=2)]
+    hub = make_hub(rows, catchup_limit=2)
+    hub.close()
+    stream = hub.open_stream(1, encode_cursor(*rows[0].key))
+    chunks = [chunk async for chunk in stream]
+    assert chunks[0].startswith(b"retry:")
+    assert [parse(c)["data"]["id"] for c in chunks[1:]] == [2, 3, 4, 5]
+    assert hub.crud.calls[1] == rows[2].key
+
+
+@pytest.mark.asyncio
+async def test_overflow_and_reconnect_fall_back_to_catch_up():
+    rows = [event(i, seconds=i) for i in range(1, 4)]
+    hub = make_hub(rows, queue_size=2)
+    stream = hub.open_stream(1, encode_cursor(T0, 0))
+    await anext(stream)
+    # Catch-up runs before anything queued is read.
+    assert [parse(await anext(stream))["data"]["id"] for _ in rows] == [1, 2, 3]
+
+    # Three events overflow a two-event inbox; the stream re-reads instead.
+    hub.crud.rows.append(SimpleNamespace(user_id=1, id=4, status=2, updated_at=T0 + timedelta(seconds=4)))
+    for i in (4, 4, 4):
+        hub.on_message(payload(event(i, seconds=4)))
+    assert parse(await anext(stream))["data"]["id"] == 4
+    assert hub.crud.calls[-1] == rows[-1].key
+
+    hub.on_reconnect()
+    pending = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    hub.on_message(payload(event(5, seconds=5)))
+    assert parse(await pending)["data"]["id"] == 5
+    assert len(hub.crud.calls) == 3
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_catch_up_rereads_overlap_for_late_commits():
+    rows = [event(i, seconds=10 + i) for i in range(1, 4)]
+    hub = make_hub(rows, overlap=5, catchup_limit=2)
+    stream = hub.open_stream(1, encode_cursor(T0, 0))
+    await anext(stream)
+    assert [parse(await anext(stream))["data"]["id"] for _ in rows] == [1, 2, 3]
+
+    # Stamped before upload 3's change but committed after it was sent.
+    late = event(9, seconds=12)
+    hub.crud.rows.append(
+        SimpleNamespace(user_id=1, id=9, status=int(late.status), updated_at=late.updated_at)
+    )
+    hub.on_reconnect()
+    # Only the late change is new; the overlap re-read skips what was sent,
+    # paging through the window however small the page.
+    assert parse(await anext(stream))["data"]["id"] == 9
+    assert (rows[-1].updated_at - timedelta(seconds=5), 3) in hub.crud.calls
+
+    pending = asyncio.ensure_future(anext(stream))
+    await asyncio.sleep(0)
+    hub.on_message(payload(rows[-1]))
+    hub.on_message(payload(event(3, ProcessingStatus.FAILED, seconds=20)))
+    assert parse(await pending)["data"]["status"] == "failed"
+    await stream.aclose()
+
+
+@pytest.mark.asyncio
+async def test_idle_stream_sends_heartbeats():
+    hub = make_hub(heartbeat=0.01)
+    stream = hub.open_stream(1)
+    await anext(stream)
+    assert await anext(stream) == b": keep-alive\n\n"
+    await stream.aclose()
+
+
+def test_bad_payloads_and_cursors():
+    hub = make_hub()
+    with hub.subscribe(1):
+        hub.on_message("not json")
+    with pytest.raises(HTTPException) as excinfo:
+        hub.open_stream(1, "garbage")
+    assert excinfo.value.status_code == 400
+    with pytest.raises(HTTPException) as excinfo:
+        make_hub(enabled=False).open_stream(1)
+    assert excinfo.value.status_code == 404
+
+
+@pytest.mark.asyncio
+async def test_events_endpoint_releases_sessions(monkeypatch, app: FastAPI):
+    rows = [event(1, seconds=1), event(2, ProcessingStatus.PROCESSING, seconds=2)]
+    hub = make_hub(rows)
+    hub.close()
+    monkeypatch.setattr(status_events, "upload_status_hub", hub)
+    monkeypatch.setattr("app.api.v1.routes.upload_status_hub", hub)
+    closed = []
+
+    class Session:
+        def __init__(self, name):
+            self.name = name
+
+        async def close(self):
+            closed.append(self.name)
+
+    async def override_read_db():
+        yield Session("read_db")
+
+    app.dependency_overrides[get_read_db_session] = override_read_db
+    app.dependency_overrides[read_auth_dependency] = lambda: {"user_id": 1, "session_id": uuid.uuid4()}
+
+    async with AsyncClient(transport=ASGITransport(app=app), base_url="http://test") as ac:
+        resp = await ac.get(
+            "/api/image/uploads/events", headers={"Last-Event-ID": encode_cursor(T0, 0)}
+        )
+    assert resp.status_code == 200
+    assert resp.headers["content-type"].startswith("text/event-stream")
+    assert closed == ["read_db"]
+    chunks = [c + "\n\n" for c in resp.text.split("\n\n") if c.startswith("id:")]
+    assert [parse(c.encode())["data"]["status"] for c in chunks] == ["completed", "processing"]
+    app.dependency_overrides.clear()
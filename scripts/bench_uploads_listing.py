@@ -0,0 +1,117 @@
+"""
+Compare the two ways of producing a ``GET /api/image/uploads/`` body.
+
+``model``: ORM rows -> one ``ImageUploadRecord`` each
+(``UploadService.get_user_uploads``), validated again and encoded as
+FastAPI does for ``response_model=list[ImageUploadRecord]``.
+
+``fast``: column tuples -> JSON bytes (``UploadService.get_user_uploads_json``).
+
+The database is replaced by in-memory rows, so this measures only the
+Python side: building rows, models and JSON.
+
+    python -m scripts.bench_uploads_listing --rows 50 200 --repeat 300
+"""
+import argparse
+import asyncio
+import json
+import time
+from datetime import datetime, timedelta, timezone
+from types import SimpleNamespace
+
+from pydantic import TypeAdapter
+
+from app.configs.constants import ProcessingStatus
+from app.db.crud.image_uploads import LISTING_COLUMNS
+from app.db.models.image_uploads import ImageUploads
+from app.services.image_uploads.schemas import ImageUploadRecord, UploadListQuery
+from app.services.image_uploads.uploads import UploadService
+from app.services.storage.in_memory import InMemoryStorage
+
+RECORDS = TypeAdapter(list[ImageUploadRecord])
+
+
+def make_values(count: int, storage: InMemoryStorage) -> list[dict]:
+    start = datetime(2025, 1, 1, tzinfo=timezone.utc)
+    statuses = list(ProcessingStatus)
+    return [
+        dict(
+            id=i,
+            user_id=1,
+            file_path=storage.public_url(f"uploads/1/{i:08d}.jpg"),
+            normalized_path=storage.public_url(f"uploads/1/{i:08d}.webp") if i % 2 else None,
+            upload_timestamp=start - timedelta(seconds=i),
+            chapter=i % 40,
+            line_start=i,
+            line_end=i + 3,
+            status=int(statuses[i % len(statuses)]),
+        )
+        for i in range(1, count + 1)
+    ]
+
+
+def make_service(values: list[dict], storage: InMemoryStorage) -> UploadService:
+    service = UploadService(
+        storage=storage, processor=SimpleNamespace(variants={"thumb": 256, "small": 720}, file_ext="webp")
+    )
+    names = [column.key for column in LISTING_COLUMNS]
+
+    # What the database driver hands back: ORM rows are built per call, like
+    # a real query; the fast path receives plain tuples.
+    async def get_by_user(db, user_id, **filters):
+        return [ImageUploads(**v) for v in values]
+
+    async def get_listing_by_user(db, user_id, **filters):
+        return [SimpleRow(v[name] for name in names) for v in values]
+
+    service.crud.get_by_user = get_by_user
+    service.crud.get_listing_by_user = get_listing_by_user
+    return service
+
+
+class SimpleRow(tuple):
+    """A tuple with the two attributes the pager reads, like a SQLAlchemy ``Row``."""
+
+    id = property(lambda self: self[0])
+    upload_timestamp = property(lambda self: self[7])
+
+
+async def model_path(service: UploadService, query: UploadListQuery) -> bytes:
+    page = await service.get_user_uploads(None, 1, query)
+    # FastAPI's ``response_model`` handling: validate, dump, ``json.dumps``.
+    content = RECORDS.dump_python(RECORDS.validate_python(page.items), mode="json")
+    return json.dumps(content, ensure_ascii=False, separators=(",", ":")).encode()
+
+
+async def fast_path(service: UploadService, query: UploadListQuery) -> bytes:
+    body, _ = await service.get_user_uploads_json(None, 1, query)
+    return body
+
+
+async def measure(fn, service: UploadService, query: UploadListQuery, repeat: int) -> float:
+    await fn(service, query)
+    started = time.perf_counter()
+    for _ in range(repeat):
+        await fn(service, query)
+    return (time.perf_counter() - started) / repeat
+
+
+async def main(row_counts: list[int], repeat: int) -> None:
+    storage = InMemoryStorage()
+    print(f"{'rows':>6} {'model ms':>10} {'fast ms':>10} {'speedup':>8}")
+    for count in row_counts:
+        values = make_values(count, storage)
+        service = make_service(values, storage)
+        query = UploadListQuery(limit=min(count, 200))
+        assert json.loads(await model_path(service, query)) == json.loads(await fast_path(service, query))
+        slow = await measure(model_path, service, query, repeat)
+        fast = await measure(fast_path, service, query, repeat)
+        print(f"{count:>6} {slow * 1000:>10.3f} {fast * 1000:>10.3f} {slow / fast:>7.1f}x")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--rows", type=int, nargs="+", default=[10, 50, 200])
+    parser.add_argument("--repeat", type=int, default=200)
+    args = parser.parse_args()
+    asyncio.run(main(args.rows, args.repeat))
@@ -93,12 +93,90 @@ CREATE TABLE public.image_upload (
     line_start smallint,
     line_end smallint,
     status smallint,
-    script_id smallint
+    script_id smallint,
+    content_hash bytea,
+    normalized_path character varying(255),
+    attempts smallint DEFAULT 0 NOT NULL,
+    claimed_at timestamp with time zone,
+    updated_at timestamp with time zone DEFAULT now() NOT NULL,
+    next_attempt_at timestamp with time zone
 );
 
 
 ALTER TABLE public.image_upload OWNER TO postgres;
 
+--
+-- Name: image_blobs; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE public.image_blobs (
+    user_id bigint NOT NULL,
+    content_hash bytea NOT NULL,
+    file_path character varying(255) NOT NULL,
+    normalized_path character varying(255),
+    ref_count integer DEFAULT 1 NOT NULL,
+    created_at timestamp with time zone DEFAULT now() NOT NULL
+);
+
+
+ALTER TABLE public.image_blobs OWNER TO postgres;
+
+--
+-- Name: email_outbox; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE public.email_outbox (
+    id bigint NOT NULL,
+    recipient character varying(500) NOT NULL,
+    subject text NOT NULL,
+    body text NOT NULL,
+    subtype character varying(10) DEFAULT 'html'::character varying NOT NULL,
+    status smallint DEFAULT 0 NOT NULL,
+    attempts smallint DEFAULT 0 NOT NULL,
+    next_attempt_at timestamp with time zone DEFAULT now() NOT NULL,
+    last_error text,
+    created_at timestamp with time zone DEFAULT now() NOT NULL,
+    sent_at timestamp with time zone
+);
+
+
+ALTER TABLE public.email_outbox OWNER TO postgres;
+
+--
+-- Name: email_outbox_id_seq; Type: SEQUENCE; Schema: public; Owner: postgres
+--
+
+CREATE SEQUENCE public.email_outbox_id_seq
+    START WITH 1
+    INCREMENT BY 1
+    NO MINVALUE
+    NO MAXVALUE
+    CACHE 1;
+
+
+ALTER SEQUENCE public.email_outbox_id_seq OWNER TO postgres;
+
+--
+-- Name: email_outbox_id_seq; Type: SEQUENCE OWNED BY; Schema: public; Owner: postgres
+--
+
+ALTER SEQUENCE public.email_outbox_id_seq OWNED BY public.email_outbox.id;
+
+
+--
+-- Name: image_ocr_results; Type: TABLE; Schema: public; Owner: postgres
+--
+
+CREATE TABLE public.image_ocr_results (
+    upload_id integer NOT NULL,
+    text text NOT NULL,
+    lines jsonb DEFAULT '[]'::jsonb NOT NULL,
+    created_at timestamp with time zone DEFAULT now() NOT NULL
+);
+
+
+ALTER TABLE public.image_ocr_results OWNER TO postgres;
+
 --
 -- Name: image_upload_id_seq; Type: SEQUENCE; Schema: public; Owner: postgres
 --
@@ -162,6 +240,13 @@ ALTER SEQUENCE public.quranic_scripts_id_seq OWNED BY public.quranic_scripts.id;
 ALTER TABLE ONLY public.app_users ALTER COLUMN id SET DEFAULT nextval('public.app_users_id_seq'::regclass);
 
 
+--
+-- Name: email_outbox id; Type: DEFAULT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.email_outbox ALTER COLUMN id SET DEFAULT nextval('public.email_outbox_id_seq'::regclass);
+
+
 --
 -- Name: image_upload id; Type: DEFAULT; Schema: public; Owner: postgres
 --
@@ -192,11 +277,35 @@ COPY public.auth_sessions (id, user_id, refresh_hash, created_at, expires_at, la
 \.
 
 
+--
+-- Data for Name: email_outbox; Type: TABLE DATA; Schema: public; Owner: postgres
+--
+
+COPY public.email_outbox (id, recipient, subject, body, subtype, status, attempts, next_attempt_at, last_error, created_at, sent_at) FROM stdin;
+\.
+
+
 --
 -- Data for Name: image_upload; Type: TABLE DATA; Schema: public; Owner: postgres
 --
 
-COPY public.image_upload (id, user_id, file_path, upload_timestamp, chapter, line_start, line_end, status, script_id) FROM stdin;
+COPY public.image_upload (id, user_id, file_path, upload_timestamp, chapter, line_start, line_end, status, script_id, content_hash, normalized_path, attempts, claimed_at, updated_at, next_attempt_at) FROM stdin;
+\.
+
+
+--
+-- Data for Name: image_blobs; Type: TABLE DATA; Schema: public; Owner: postgres
+--
+
+COPY public.image_blobs (user_id, content_hash, file_path, normalized_path, ref_count, created_at) FROM stdin;
+\.
+
+
+--
+-- Data for Name: image_ocr_results; Type: TABLE DATA; Schema: public; Owner: postgres
+--
+
+COPY public.image_ocr_results (upload_id, text, lines, created_at) FROM stdin;
 \.
 
 
@@ -216,6 +325,13 @@ COPY public.quranic_scripts (id, script_name) FROM stdin;
 SELECT pg_catalog.setval('public.app_users_id_seq', 1, true);
 
 
+--
+-- Name: email_outbox_id_seq; Type: SEQUENCE SET; Schema: public; Owner: postgres
+--
+
+SELECT pg_catalog.setval('public.email_outbox_id_seq', 1, false);
+
+
 --
 -- Name: image_upload_id_seq; Type: SEQUENCE SET; Schema: public; Owner: postgres
 --
@@ -246,6 +362,30 @@ ALTER TABLE ONLY public.auth_sessions
     ADD CONSTRAINT auth_sessions_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: email_outbox email_outbox_pkey; Type: CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.email_outbox
+    ADD CONSTRAINT email_outbox_pkey PRIMARY KEY (id);
+
+
+--
+-- Name: image_blobs image_blobs_pkey; Type: CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.image_blobs
+    ADD CONSTRAINT image_blobs_pkey PRIMARY KEY (user_id, content_hash);
+
+
+--
+-- Name: image_ocr_results image_ocr_results_pkey; Type: CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.image_ocr_results
+    ADD CONSTRAINT image_ocr_results_pkey PRIMARY KEY (upload_id);
+
+
 --
 -- Name: image_upload image_upload_pkey; Type: CONSTRAINT; Schema: public; Owner: postgres
 --
@@ -262,6 +402,13 @@ ALTER TABLE ONLY public.quranic_scripts
     ADD CONSTRAINT quranic_scripts_pkey PRIMARY KEY (id);
 
 
+--
+-- Name: auth_sessions_refresh_hash_key; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE UNIQUE INDEX auth_sessions_refresh_hash_key ON public.auth_sessions USING btree (refresh_hash);
+
+
 --
 -- Name: auth_sessions_expires_at_idx; Type: INDEX; Schema: public; Owner: postgres
 --
@@ -283,6 +430,48 @@ CREATE INDEX auth_sessions_is_revoked_idx ON public.auth_sessions USING btree (i
 CREATE INDEX auth_sessions_user_id_idx ON public.auth_sessions USING btree (user_id);
 
 
+--
+-- Name: email_outbox_pending_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX email_outbox_pending_idx ON public.email_outbox USING btree (next_attempt_at) WHERE (status = 0);
+
+
+--
+-- Name: image_upload_user_id_content_hash_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX image_upload_user_id_content_hash_idx ON public.image_upload USING btree (user_id, content_hash) WHERE (content_hash IS NOT NULL);
+
+
+--
+-- Name: image_upload_user_id_upload_timestamp_id_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX image_upload_user_id_upload_timestamp_id_idx ON public.image_upload USING btree (user_id, upload_timestamp DESC, id DESC);
+
+
+--
+-- Name: image_upload_pending_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX image_upload_pending_idx ON public.image_upload USING btree (status, id) WHERE (status = ANY (ARRAY[0, 1]));
+
+
+--
+-- Name: image_upload_user_id_updated_at_id_idx; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE INDEX image_upload_user_id_updated_at_id_idx ON public.image_upload USING btree (user_id, updated_at, id);
+
+
+--
+-- Name: image_upload_user_id_file_path_key; Type: INDEX; Schema: public; Owner: postgres
+--
+
+CREATE UNIQUE INDEX image_upload_user_id_file_path_key ON public.image_upload USING btree (user_id, file_path) WHERE (content_hash IS NULL);
+
+
 --
 -- Name: auth_sessions auth_sessions_user_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
 --
@@ -299,6 +488,14 @@ ALTER TABLE ONLY public.image_upload
     ADD CONSTRAINT fk_script FOREIGN KEY (script_id) REFERENCES public.quranic_scripts(id);
 
 
+--
+-- Name: image_ocr_results image_ocr_results_upload_id_fkey; Type: FK CONSTRAINT; Schema: public; Owner: postgres
+--
+
+ALTER TABLE ONLY public.image_ocr_results
+    ADD CONSTRAINT image_ocr_results_upload_id_fkey FOREIGN KEY (upload_id) REFERENCES public.image_upload(id) ON DELETE CASCADE;
+
+
 --
 -- PostgreSQL database dump complete
 --